@@ -5,3 +5,7 @@ class CoreConfig(AppConfig):
     """Имя приложения."""
 
     name = "core"
+
+    def ready(self):
+        """Подключает обработчики сигналов."""
+        from . import auth  # noqa: F401
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_logged_out
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+USER_KEY = "core:user:{}:slim"
+# Поля, которые читают запросы. Пароль, почта и права в общий кэш не
+# попадают: права читаются из базы при первом обращении к ним.
+SNAPSHOT_FIELDS = ("id", "username", "first_name", "last_name", "is_active")
+
+User = get_user_model()
+
+
+def snapshot(user):
+    """Поля SNAPSHOT_FIELDS и хэш сессии вместо самого пароля."""
+    values = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    values["session_auth_hash"] = user.get_session_auth_hash()
+    return values
+
+
+def restore(values):
+    """Пользователь из снимка; остальные поля отложены до обращения."""
+    user = User.from_db(
+        DEFAULT_DB_ALIAS,
+        SNAPSHOT_FIELDS,
+        [values[name] for name in SNAPSHOT_FIELDS],
+    )
+    session_auth_hash = values["session_auth_hash"]
+    # Пароль отложен: без подмены проверка сессии читала бы его из базы.
+    user.get_session_auth_hash = lambda: session_auth_hash
+    return user
+
+
+def forget(user_id):
+    """Убирает снимок пользователя из кэша."""
+    cache.delete(USER_KEY.format(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Снимок обновляется при сохранении и удалении пользователя и при
+    выходе, так что смена пароля сразу меняет хэш сессий (и выкидывает
+    остальные сессии), а изменения в обход ORM живут не дольше
+    AUTH_USER_CACHE_TIMEOUT.
+    """
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(
+                    key, snapshot(user), settings.AUTH_USER_CACHE_TIMEOUT
+                )
+            return user
+        user = restore(values)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, raw=False, **kwargs):
+    """Хэш сессии и активность читаются из снимка — сбрасываем его."""
+    if not raw:
+        forget(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    """Выход сбрасывает снимок, следующий вход прочитает базу."""
+    if user is not None:
+        forget(user.pk)
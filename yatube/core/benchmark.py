@@ -0,0 +1,50 @@
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+
+
+@contextmanager
+def benchmark_database():
+    """Временная тестовая база, чтобы замеры не трогали рабочие данные."""
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    cache.clear()
+    try:
+        yield connection
+    finally:
+        cache.clear()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def cpu_time(func, repeat=20):
+    """Медиана процессорного времени func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        timings.append((time.process_time() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure(func, repeat=20):
+    """Медиана времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def percentile(timings, share):
+    """Перцентиль share (0..100) по методу ближайшего ранга."""
+    ordered = sorted(timings)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(share / 100 * len(ordered)))
+    return ordered[rank - 1]
@@ -0,0 +1,53 @@
+from urllib.parse import urlsplit
+
+BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "sqlite": "core.cache.sqlite.SQLiteCache",
+    "redis": "core.cache.resp.RespCache",
+}
+SHARED_MAX_ENTRIES = 100000
+
+
+def cache_backend(url):
+    """Настройки одного кэша по адресу.
+
+    locmem://              — память процесса (по умолчанию);
+    file:///path/to/dir    — файлы в каталоге;
+    sqlite:///path/to.db   — файл SQLite, общий для процессов машины;
+    redis://host:port/db   — Redis или совместимый сервер.
+    """
+    scheme = urlsplit(url).scheme
+    if scheme not in BACKENDS:
+        raise ValueError(f"Неизвестный кэш: {url}")
+    config = {"BACKEND": BACKENDS[scheme]}
+    if scheme in ("file", "sqlite"):
+        config["LOCATION"] = urlsplit(url).path
+        config["OPTIONS"] = {"MAX_ENTRIES": SHARED_MAX_ENTRIES}
+    elif scheme == "redis":
+        config["LOCATION"] = url
+    return config
+
+
+def cache_config(url, local_entries=0, local_timeout=5, shared_only=()):
+    """CACHES для адреса url.
+
+    Если local_entries больше нуля и кэш общий, перед ним ставится
+    LRU процесса на local_entries записей (TieredCache), а сам общий
+    кэш доступен под алиасом shared.
+    """
+    backend = cache_backend(url)
+    if not local_entries or url.startswith("locmem:"):
+        return {"default": backend}
+    return {
+        "default": {
+            "BACKEND": "core.cache.tiered.TieredCache",
+            "OPTIONS": {
+                "SHARED": "shared",
+                "MAX_ENTRIES": local_entries,
+                "LOCAL_TIMEOUT": local_timeout,
+                "SHARED_ONLY": shared_only,
+            },
+        },
+        "shared": backend,
+    }
@@ -0,0 +1,243 @@
+import os
+import pickle
+import socket
+import threading
+from urllib.parse import urlsplit
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# INCRBY только существующего ключа, атомарно: INCRBY сам создал бы
+# ключ без срока, а Django ждёт ValueError.
+INCR_SCRIPT = (
+    "if redis.call('EXISTS', KEYS[1]) == 0 then return false end "
+    "return redis.call('INCRBY', KEYS[1], ARGV[1])"
+)
+
+
+class RespError(Exception):
+    """Сервер ответил ошибкой."""
+
+
+def encode(*args):
+    """Команда в виде массива bulk-строк RESP."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = b"%d" % arg
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+def read_reply(stream):
+    """Читает один ответ RESP из файла сокета."""
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Соединение закрыто сервером.")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        return stream.read(size + 2)[:-2]
+    if kind == b"*":
+        size = int(rest)
+        if size < 0:
+            return None
+        return [read_reply(stream) for _ in range(size)]
+    raise RespError(f"Неизвестный ответ: {line!r}")
+
+
+class RespConnection:
+    """Соединение с сервером по протоколу Redis (RESP2)."""
+
+    def __init__(self, host, port, db=0, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile("rb")
+        if db:
+            self.execute("SELECT", db)
+
+    def execute(self, *args):
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Отправляет команды одним пакетом и читает все ответы."""
+        self.sock.sendall(b"".join(encode(*args) for args in commands))
+        replies, error = [], None
+        for _ in commands:
+            try:
+                replies.append(read_reply(self.stream))
+            except RespError as exc:
+                error = error or exc
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+def dump(value):
+    """Целые числа храним строкой, чтобы работал INCRBY."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return b"%d" % value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def load(data):
+    # pickle начинается с байта PROTO (0x80), число — с цифры или минуса.
+    if data[:1] == b"\x80":
+        return pickle.loads(data)
+    return int(data)
+
+
+class RespCache(BaseCache):
+    """Общий кэш на Redis или совместимом сервере.
+
+    LOCATION — адрес вида redis://host:port/db. Клиент свой и
+    минимальный: команды GET/SET/MGET/DEL/EXISTS/PEXPIRE, EVAL
+    для incr и конвейер для пачек.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        url = urlsplit(location)
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 6379
+        self.db = int(url.path.strip("/") or 0)
+        self.socket_timeout = params.get("OPTIONS", {}).get("SOCKET_TIMEOUT")
+        self._local = threading.local()
+
+    @property
+    def _client(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = RespConnection(
+                self.host, self.port, self.db, self.socket_timeout
+            )
+            local.pid = os.getpid()
+        return local.connection
+
+    def _call(self, *commands, retry=True):
+        """Выполняет команды конвейером.
+
+        Если сервер перезапустили, команды повторяются один раз с новым
+        соединением. Неидемпотентные (retry=False) не повторяются:
+        они могли выполниться до обрыва.
+        """
+        try:
+            return self._client.pipeline(commands)
+        except (ConnectionError, OSError):
+            self._local.pid = None
+            if not retry:
+                raise
+            return self._client.pipeline(commands)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _set_command(self, key, value, timeout, *flags):
+        command = ["SET", key, dump(value)]
+        if timeout is not None:
+            command += ["PX", max(int(timeout * 1000), 1)]
+        return (*command, *flags)
+
+    def _timeout(self, timeout):
+        """Относительный таймаут в секундах или None, если бессрочно."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return timeout
+
+    def get(self, key, default=None, version=None):
+        (data,) = self._call(("GET", self._key(key, version)))
+        return default if data is None else load(data)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        (values,) = self._call(("MGET", *keys))
+        return {
+            original: load(data)
+            for original, data in zip(keys.values(), values)
+            if data is not None
+        }
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        keys = [self._key(key, version) for key in data]
+        if timeout is not None and timeout <= 0:
+            self.delete_many(data, version)
+            return []
+        if keys:
+            self._call(
+                *(
+                    self._set_command(key, value, timeout)
+                    for key, value in zip(keys, data.values())
+                )
+            )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            return False
+        command = self._set_command(
+            self._key(key, version), value, timeout, "NX"
+        )
+        return self._call(command)[0] == "OK"
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        try:
+            (value,) = self._call(
+                ("EVAL", INCR_SCRIPT, 1, key, delta), retry=False
+            )
+        except RespError as exc:
+            raise ValueError(str(exc))
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        timeout = self._timeout(timeout)
+        if timeout is None:
+            command = ("PERSIST", key)
+            exists = ("EXISTS", key)
+            return bool(self._call(command, exists)[1])
+        return self._call(("PEXPIRE", key, int(timeout * 1000)))[0] == 1
+
+    def has_key(self, key, version=None):
+        return self._call(("EXISTS", self._key(key, version)))[0] == 1
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._call(("DEL", *keys))
+
+    def clear(self):
+        self._call(("FLUSHDB",))
+
+    def close(self, **kwargs):
+        # Соединения живут в потоках и переиспользуются между запросами.
+        pass
@@ -0,0 +1,174 @@
+import socketserver
+import threading
+import time
+
+from .resp import INCR_SCRIPT, RespError, read_reply
+
+
+def reply(value):
+    """Ответ сервера в формате RESP."""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-ERR %s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode()
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(map(reply, value))
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class Store:
+    """Данные сервера: {база: {ключ: (значение, истекает)}}."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dbs = {}
+
+    def alive(self, db, key):
+        entry = db.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del db[key]
+            return None
+        return entry
+
+
+class Session:
+    """Команды одного клиента; поддерживается только то, что нужно кэшу."""
+
+    def __init__(self, store):
+        self.store = store
+        self.number = 0
+
+    @property
+    def db(self):
+        return self.store.dbs.setdefault(self.number, {})
+
+    def run(self, name, *args):
+        name = name.decode()
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            return RespError(f"unknown command '{name}'")
+        with self.store.lock:
+            try:
+                return handler(*args)
+            except TypeError:
+                return RespError(f"wrong number of arguments for '{name}'")
+
+    def cmd_ping(self):
+        return "PONG"
+
+    def cmd_select(self, number):
+        self.number = int(number)
+        return "OK"
+
+    def cmd_get(self, key):
+        entry = self.store.alive(self.db, key)
+        return None if entry is None else entry[0]
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *flags):
+        flags = [flag.upper() for flag in flags]
+        expires = None
+        if b"PX" in flags:
+            milliseconds = int(flags[flags.index(b"PX") + 1])
+            expires = time.monotonic() + milliseconds / 1000
+        if b"NX" in flags and self.store.alive(self.db, key) is not None:
+            return None
+        self.db[key] = (value, expires)
+        return "OK"
+
+    def cmd_del(self, *keys):
+        return sum(self.db.pop(key, None) is not None for key in keys)
+
+    def cmd_exists(self, *keys):
+        return sum(self.store.alive(self.db, key) is not None for key in keys)
+
+    def cmd_incrby(self, key, delta):
+        entry = self.store.alive(self.db, key) or (b"0", None)
+        try:
+            value = int(entry[0]) + int(delta)
+        except ValueError:
+            return RespError("value is not an integer or out of range")
+        self.db[key] = (b"%d" % value, entry[1])
+        return value
+
+    def cmd_eval(self, script, numkeys, *args):
+        # Lua здесь нет: сервер знает только скрипт RespCache.incr.
+        if script.decode() != INCR_SCRIPT or int(numkeys) != 1:
+            return RespError("unknown script")
+        key, delta = args
+        if self.store.alive(self.db, key) is None:
+            return None
+        return self.cmd_incrby(key, delta)
+
+    def cmd_pexpire(self, key, milliseconds):
+        entry = self.store.alive(self.db, key)
+        if entry is None:
+            return 0
+        expires = time.monotonic() + int(milliseconds) / 1000
+        self.db[key] = (entry[0], expires)
+        return 1
+
+    def cmd_persist(self, key):
+        entry = self.store.alive(self.db, key)
+        if entry is None or entry[1] is None:
+            return 0
+        self.db[key] = (entry[0], None)
+        return 1
+
+    def cmd_flushdb(self):
+        self.db.clear()
+        return "OK"
+
+    def cmd_dbsize(self):
+        return len(self.db)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        session = Session(self.server.store)
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except (ConnectionError, RespError):
+                return
+            self.wfile.write(reply(session.run(*command)))
+
+
+class RespServer(socketserver.ThreadingTCPServer):
+    """Локальная замена Redis для разработки, тестов и замеров.
+
+    Хранит данные в памяти одного процесса и понимает только
+    команды, которыми пользуется RespCache.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=("127.0.0.1", 0)):
+        super().__init__(address, Handler)
+        self.store = Store()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        """Запускает сервер в фоновом потоке."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,186 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+)
+ALIVE = "(expires IS NULL OR expires > ?)"
+
+
+def dump(value):
+    """Целые числа храним как есть, чтобы incr был одним UPDATE."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def load(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в отдельном файле SQLite, общий для процессов одной машины.
+
+    Для разработки и одного сервера: не требует внешних служб,
+    переживает перезапуск и, в отличие от LocMemCache, виден
+    всем воркерам. LOCATION — путь к файлу.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и процесса: sqlite3 нельзя
+        # передавать между ними, а воркеры получают кэш через fork.
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            local.connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            local.connection.execute("PRAGMA journal_mode=WAL")
+            local.connection.execute("PRAGMA synchronous=NORMAL")
+            local.connection.execute(SCHEMA)
+            local.pid = os.getpid()
+        return local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self._db.execute(
+            f"SELECT value FROM cache WHERE key = ? AND {ALIVE}",
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return default if row is None else load(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        marks = ", ".join("?" * len(keys))
+        rows = self._db.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({marks}) "
+            f"AND {ALIVE}",
+            (*keys, time.time()),
+        )
+        return {keys[key]: load(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version), dump(value), expires)
+            for key, value in data.items()
+        ]
+        db = self._db
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            self._cull(db)
+            db.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", rows
+            )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        db = self._db
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            self._cull(db)
+            db.execute(
+                "INSERT INTO cache VALUES (?, ?, ?) ON CONFLICT(key) "
+                "DO UPDATE SET value = excluded.value, "
+                "expires = excluded.expires "
+                "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+                (
+                    self._key(key, version),
+                    dump(value),
+                    self.get_backend_timeout(timeout),
+                    time.time(),
+                ),
+            )
+            return db.execute("SELECT changes()").fetchone()[0] == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        with db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute(
+                "UPDATE cache SET value = value + ? WHERE key = ? "
+                f"AND typeof(value) = 'integer' AND {ALIVE}",
+                (delta, key, time.time()),
+            )
+            row = db.execute(
+                f"SELECT value FROM cache WHERE key = ? AND {ALIVE}",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+        if not isinstance(row[0], int):
+            raise ValueError("Key '%s' is not an integer" % key)
+        return row[0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            f"UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}",
+            (
+                self.get_backend_timeout(timeout),
+                self._key(key, version),
+                time.time(),
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        row = self._db.execute(
+            f"SELECT 1 FROM cache WHERE key = ? AND {ALIVE}",
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            marks = ", ".join("?" * len(keys))
+            self._db.execute(f"DELETE FROM cache WHERE key IN ({marks})", keys)
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache")
+
+    def _cull(self, db):
+        """Как DatabaseCache: сначала просроченное, затем часть записей."""
+        count = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count < self._max_entries:
+            return
+        db.execute(
+            "DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        )
+        count = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count >= self._max_entries and self._cull_frequency:
+            db.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache "
+                "ORDER BY expires IS NULL, expires LIMIT ?)",
+                (count // self._cull_frequency,),
+            )
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """Небольшой LRU в памяти процесса перед общим кэшем.
+
+    OPTIONS:
+    SHARED — алиас общего кэша в CACHES или его настройки словарём;
+    LOCAL_TIMEOUT — сколько секунд копия живёт в памяти процесса;
+    SHARED_ONLY — префиксы изменяемых ключей (версии, счётчики),
+    которые всегда читаются из общего кэша.
+
+    Запись идёт сразу в общий кэш, поэтому другие процессы видят
+    её не позже чем через LOCAL_TIMEOUT, а ключи SHARED_ONLY — сразу.
+    """
+
+    def __init__(self, location, params):
+        options = params.get("OPTIONS", {})
+        super().__init__(params)
+        self._shared = options["SHARED"]
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.shared_only = tuple(options.get("SHARED_ONLY", ()))
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = self.local_misses = 0
+
+    @property
+    def shared(self):
+        if isinstance(self._shared, str):
+            return caches[self._shared]
+        if isinstance(self._shared, dict):
+            params = dict(self._shared)
+            backend = import_string(params.pop("BACKEND"))
+            self._shared = backend(params.pop("LOCATION", ""), params)
+        return self._shared
+
+    def _local_key(self, key, version):
+        if key.startswith(self.shared_only):
+            return None
+        return self.make_key(key, version=version)
+
+    def _remember(self, local_key, value):
+        expires = time.monotonic() + self.local_timeout
+        with self._lock:
+            self._lru[local_key] = (value, expires)
+            self._lru.move_to_end(local_key)
+            while len(self._lru) > self._max_entries:
+                self._lru.popitem(last=False)
+
+    def _recall(self, local_key):
+        with self._lock:
+            entry = self._lru.get(local_key)
+            if entry is None or entry[1] <= time.monotonic():
+                self._lru.pop(local_key, None)
+                self.local_misses += 1
+                return MISSING
+            self._lru.move_to_end(local_key)
+            self.local_hits += 1
+            return entry[0]
+
+    def _forget(self, keys, version):
+        with self._lock:
+            for key in keys:
+                self._lru.pop(self.make_key(key, version=version), None)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            value = self._recall(local_key)
+            if value is not MISSING:
+                return value
+        value = self.shared.get(key, MISSING, version=version)
+        if value is MISSING:
+            return default
+        if local_key is not None:
+            self._remember(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remote = {}, []
+        for key in keys:
+            local_key = self._local_key(key, version)
+            value = MISSING if local_key is None else self._recall(local_key)
+            if value is MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            for key, value in fetched.items():
+                local_key = self._local_key(key, version)
+                if local_key is not None:
+                    self._remember(local_key, value)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget([key], version)
+        self.shared.set(key, value, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget(data, version)
+        return self.shared.set_many(data, timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget([key], version)
+        return self.shared.add(key, value, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget([key], version)
+        return self.shared.incr(key, delta, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def has_key(self, key, version=None):
+        return self.shared.has_key(key, version=version)
+
+    def delete(self, key, version=None):
+        self._forget([key], version)
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self._forget(keys, version)
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
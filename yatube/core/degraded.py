@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+CLOSED = "closed"
+OPEN = "open"
+PROBE = "probe"
+
+
+def keeps_stale_copy(view):
+    """Помечает представление, чью страницу хранят на случай аварии."""
+    view.stale_copy = True
+    return view
+
+
+class CircuitBreaker:
+    """Следит за запросами к базе и включает аварийный режим.
+
+    Режим включается, когда за последние DEGRADED_WINDOW секунд хотя
+    бы DEGRADED_FAILURE_RATE запросов к базе упали с OperationalError
+    или шли дольше DEGRADED_SLOW_QUERY секунд. Через DEGRADED_COOLDOWN
+    секунд один запрос пропускается к базе как проба: если он прошёл
+    без медленных и упавших запросов, режим выключается.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = deque()
+        self.opened_at = None
+        self.probing = False
+
+    def record(self, duration, failed=False):
+        """Учитывает запрос к базе; возвращает, был ли он плохим."""
+        bad = failed or duration > settings.DEGRADED_SLOW_QUERY
+        now = time.monotonic()
+        with self.lock:
+            self.samples.append((now, bad))
+            while self.samples[0][0] < now - settings.DEGRADED_WINDOW:
+                self.samples.popleft()
+            if self.opened_at is None and self.overloaded():
+                self.opened_at = now
+        return bad
+
+    def overloaded(self):
+        if len(self.samples) < settings.DEGRADED_MIN_QUERIES:
+            return False
+        failures = sum(bad for _, bad in self.samples)
+        return failures / len(self.samples) >= settings.DEGRADED_FAILURE_RATE
+
+    def state(self):
+        """CLOSED, OPEN или PROBE — для запроса, который пришёл сейчас."""
+        with self.lock:
+            if self.opened_at is None:
+                return CLOSED
+            cooled = (
+                time.monotonic() - self.opened_at
+                >= settings.DEGRADED_COOLDOWN
+            )
+            if cooled and not self.probing:
+                self.probing = True
+                return PROBE
+            return OPEN
+
+    def finish_probe(self, ok):
+        """Итог пробного запроса: закрыть или снова открыть."""
+        with self.lock:
+            self.probing = False
+            if ok:
+                self.opened_at = None
+                self.samples.clear()
+            else:
+                self.opened_at = time.monotonic()
+
+    def reset(self):
+        """Выключает аварийный режим и забывает историю."""
+        with self.lock:
+            self.samples.clear()
+            self.opened_at = None
+            self.probing = False
+
+
+breaker = CircuitBreaker()
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ...benchmark import benchmark_database, measure
+
+User = get_user_model()
+
+PASSWORD = "bench-password"
+MODES = (
+    (
+        "база",
+        "django.contrib.sessions.backends.db",
+        "django.contrib.auth.backends.ModelBackend",
+    ),
+    (
+        "кэш",
+        "django.contrib.sessions.backends.cached_db",
+        "core.auth.CachedModelBackend",
+    ),
+)
+ROUTES = ("posts:index", "api:index", "about:author")
+IDENTITY = ('FROM "django_session"', 'FROM "auth_user"')
+
+
+class Command(BaseCommand):
+    """Сравнивает сессии и пользователя из базы и из кэша."""
+
+    help = (
+        "Запросы к базе и медиана времени на запрос вошедшего "
+        "пользователя: сессии и пользователь из базы против "
+        "cached_db и core.auth.CachedModelBackend. Кэш страниц прогрет."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rows = []
+        with benchmark_database() as connection:
+            User.objects.create_user(username="bench", password=PASSWORD)
+            for mode, engine, backend in MODES:
+                with override_settings(
+                    SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]
+                ):
+                    client = Client()
+                    client.login(username="bench", password=PASSWORD)
+                    for name in ROUTES:
+                        url = reverse(name)
+                        client.get(url)
+                        with CaptureQueriesContext(connection) as queries:
+                            client.get(url)
+                        total = len(queries)
+                        identity = sum(
+                            any(table in query["sql"] for table in IDENTITY)
+                            for query in queries
+                        )
+                        timing = measure(
+                            lambda: client.get(url), options["repeat"]
+                        )
+                        rows.append((name, mode, total, identity, timing))
+        self.stdout.write(
+            f"{'маршрут':<16}{'режим':<8}{'запросов':>10}"
+            f"{'личность':>10}{'мс':>8}"
+        )
+        for name, mode, total, identity, timing in rows:
+            self.stdout.write(
+                f"{name:<16}{mode:<8}{total:>10}{identity:>10}{timing:>8.2f}"
+            )
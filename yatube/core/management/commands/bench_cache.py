@@ -0,0 +1,104 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from ...cache.config import BACKENDS, cache_backend
+from ...cache.server import RespServer
+
+PAYLOAD = "x" * 2048
+
+
+def build(config):
+    """Экземпляр кэша по словарю настроек, минуя CACHES."""
+    params = dict(config)
+    backend = import_string(params.pop("BACKEND"))
+    return backend(params.pop("LOCATION", ""), params)
+
+
+def run_worker(task):
+    """Один воркер: запросы к популярным ключам по закону Ципфа.
+
+    Промах стоит «рендера» в render_ms миллисекунд и записи в кэш.
+    """
+    config, seed, requests, keys, render_ms = task
+    cache = build(config)
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, keys + 1)]
+    hits = 0
+    started = time.perf_counter()
+    for key in rng.choices(range(keys), weights, k=requests):
+        name = f"bench:{key}"
+        if cache.get(name) is None:
+            time.sleep(render_ms / 1000)
+            cache.set(name, PAYLOAD, 300)
+        else:
+            hits += 1
+    return hits, time.perf_counter() - started, getattr(cache, "local_hits", 0)
+
+
+class Command(BaseCommand):
+    """Сравнивает долю попаданий кэшей при нескольких процессах."""
+
+    help = (
+        "Запускает воркеры в отдельных процессах и показывает долю "
+        "попаданий и пропускную способность для каждого вида кэша."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--keys", type=int, default=500)
+        parser.add_argument("--render-ms", type=float, default=1.0)
+        parser.add_argument("--local-entries", type=int, default=100)
+
+    def handle(self, *args, **options):
+        server = RespServer().start()
+        with tempfile.TemporaryDirectory() as directory:
+            redis = cache_backend(server.url)
+            configs = {
+                "locmem": {"BACKEND": BACKENDS["locmem"], "LOCATION": "b"},
+                "sqlite": cache_backend(f"sqlite://{directory}/cache.db"),
+                "redis": redis,
+                "tiered": {
+                    "BACKEND": "core.cache.tiered.TieredCache",
+                    "OPTIONS": {
+                        "SHARED": redis,
+                        "MAX_ENTRIES": options["local_entries"],
+                    },
+                },
+            }
+            rows = [
+                (name, *self.run(config, options))
+                for name, config in configs.items()
+            ]
+        server.stop()
+        self.stdout.write(
+            f"{'кэш':<8}{'попадания':>12}{'из памяти':>12}{'запр/с':>10}"
+        )
+        for name, hit_rate, local_rate, throughput in rows:
+            self.stdout.write(
+                f"{name:<8}{hit_rate:>11.1f}%{local_rate:>11.1f}%"
+                f"{throughput:>10.0f}"
+            )
+
+    def run(self, config, options):
+        """Доля попаданий, доля из LRU процесса и запросов в секунду."""
+        build(config).clear()
+        workers, requests = options["workers"], options["requests"]
+        tasks = [
+            (config, seed, requests, options["keys"], options["render_ms"])
+            for seed in range(workers)
+        ]
+        # fork: дочерним процессам не нужно заново настраивать Django.
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers) as pool:
+            results = pool.map(run_worker, tasks)
+        total = workers * requests
+        hits = sum(result[0] for result in results)
+        local = sum(result[2] for result in results)
+        elapsed = max(result[1] for result in results)
+        return hits / total * 100, local / total * 100, total / elapsed
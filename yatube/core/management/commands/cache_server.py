@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from ...cache.server import RespServer
+
+
+class Command(BaseCommand):
+    """Запускает локальную замену Redis."""
+
+    help = (
+        "Сервер с протоколом Redis в памяти процесса: общий кэш для "
+        "нескольких воркеров без установки Redis (CACHE_URL=redis://...)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=6379)
+
+    def handle(self, *args, **options):
+        server = RespServer((options["host"], options["port"]))
+        self.stdout.write(f"Кэш слушает {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
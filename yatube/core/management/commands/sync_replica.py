@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ... import replicas
+
+
+class Command(BaseCommand):
+    """Обновляет копии-реплики основной базы."""
+
+    help = (
+        "Локальная замена реплик: раз в --interval секунд копирует "
+        "основную базу SQLite в файлы DATABASE_REPLICAS. С --once "
+        "копирует один раз."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=2.0)
+        parser.add_argument("--once", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                for alias in settings.DATABASE_REPLICAS:
+                    started = time.perf_counter()
+                    replicas.sync(alias)
+                    self.stdout.write(
+                        f"{alias}: {time.perf_counter() - started:.2f} с"
+                    )
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
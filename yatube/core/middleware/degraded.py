@@ -0,0 +1,151 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+
+from core.degraded import CLOSED, OPEN, PROBE, breaker
+
+COPY_KEY = "core:stale:{}"
+FRESH_KEY = "core:stale-fresh:{}"
+SAFE_METHODS = ("GET", "HEAD")
+# Параметры, которые читают страницы с копиями (паджинация).
+COPY_PARAMS = ("page", "after", "before")
+
+
+@contextmanager
+def outermost_wrapper(connection, wrapper):
+    """execute_wrapper снаружи уже подключённых обёрток соединения."""
+    connection.execute_wrappers.insert(0, wrapper)
+    try:
+        yield
+    finally:
+        connection.execute_wrappers.remove(wrapper)
+
+
+def try_later():
+    """Быстрый ответ 503, не трогающий базу."""
+    response = HttpResponse(render_to_string("core/503.html"), status=503)
+    response["Retry-After"] = str(settings.DEGRADED_COOLDOWN)
+    return response
+
+
+def copy_path(request):
+    """Путь копии страницы или None, если в запросе чужие параметры.
+
+    Ключ строится из пути и параметров COPY_PARAMS: произвольные
+    строки запроса не плодят копий, которые живут сутки.
+    """
+    params = request.GET
+    if any(
+        name not in COPY_PARAMS or len(params.getlist(name)) > 1
+        for name in params
+    ):
+        return None
+    query = urlencode(
+        [(name, params[name]) for name in COPY_PARAMS if name in params]
+    )
+    return f"{request.path}?{query}" if query else request.path
+
+
+def stale_copy(request):
+    """Сохранённая копия страницы с плашкой аварийного режима или None."""
+    path = copy_path(request)
+    copy = None if path is None else cache.get(COPY_KEY.format(path))
+    if copy is None:
+        return None
+    content, content_type = copy
+    banner = render_to_string("includes/degraded.html").encode()
+    response = HttpResponse(
+        content.replace(b"<main>", b"<main>" + banner, 1),
+        content_type=content_type,
+    )
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def keep_copy(request, response):
+    """Сохраняет удачный анонимный ответ, не чаще раза в минуту."""
+    path = copy_path(request)
+    if (
+        path is None
+        or request.method != "GET"
+        or response.status_code != 200
+        or response.streaming
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    ):
+        return
+    if cache.add(FRESH_KEY.format(path), 1, settings.DEGRADED_COPY_REFRESH):
+        cache.set(
+            COPY_KEY.format(path),
+            (response.content, response["Content-Type"]),
+            settings.DEGRADED_COPY_TIMEOUT,
+        )
+
+
+class DegradedModeMiddleware:
+    """Аварийный режим только для чтения при перегрузке базы.
+
+    Замеряет каждый запрос к базе для core.degraded.breaker. Пока
+    режим включён, страницы представлений с keeps_stale_copy отдаются
+    из сохранённых копий с плашкой, а запросы на запись сразу получают
+    503. Копии — последние удачные ответы анонимным пользователям:
+    в них нет чужих имён и токенов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = breaker.state()
+        request.degraded = state == OPEN
+        if request.degraded and request.method not in SAFE_METHODS:
+            return try_later()
+        bad = []
+
+        def track(execute, sql, params, many, context):
+            started = time.monotonic()
+            failed = False
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError:
+                failed = True
+                raise
+            finally:
+                if breaker.record(time.monotonic() - started, failed):
+                    bad.append(True)
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(outermost_wrapper(connection, track))
+                response = self.get_response(request)
+        finally:
+            if state == PROBE:
+                breaker.finish_probe(ok=not bad)
+        if (
+            state == CLOSED
+            and not request.degraded
+            and getattr(request, "keeps_stale_copy", False)
+        ):
+            keep_copy(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.keeps_stale_copy = getattr(view_func, "stale_copy", False)
+        if not request.degraded or not request.keeps_stale_copy:
+            return None
+        return stale_copy(request) or try_later()
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, OperationalError) or not getattr(
+            request, "keeps_stale_copy", False
+        ):
+            return None
+        response = stale_copy(request)
+        request.degraded = response is not None
+        return response
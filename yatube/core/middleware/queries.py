@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter, namedtuple
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger("yatube.queries")
+
+Query = namedtuple("Query", "sql duration origin")
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+def query_shape(sql):
+    """SQL без различий в длине списков IN: «форма» запроса."""
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def query_origin():
+    """Откуда выполнен запрос: строка шаблона и строка кода проекта."""
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and template is None:
+        filename = frame.f_code.co_filename
+        node = frame.f_locals.get("self")
+        if frame.f_code.co_name == "render_annotated" and isinstance(
+            node, Node
+        ):
+            origin = node.origin
+            name = origin.template_name or origin.name
+            template = f"{name}:{node.token.lineno}"
+        elif (
+            code is None
+            and filename.startswith(settings.BASE_DIR)
+            and filename != __file__
+        ):
+            code = "%s:%d" % (
+                os.path.relpath(filename, settings.BASE_DIR),
+                frame.f_lineno,
+            )
+        frame = frame.f_back
+    return " ".join(filter(None, (template, code))) or "?"
+
+
+class QueryRecorder:
+    """Записывает запросы ко всем базам, пока активен.
+
+    Используется middleware и тестами:
+
+        with QueryRecorder() as recorder:
+            client.get(url)
+        recorder.count, recorder.n_plus_one()
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                Query(sql, time.perf_counter() - started, query_origin())
+            )
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        """Время в базе, мс."""
+        return sum(query.duration for query in self.queries) * 1000
+
+    def n_plus_one(self, threshold=None):
+        """Повторы одной формы SELECT: [(форма, число, места вызова)]."""
+        if threshold is None:
+            threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD
+        shapes = Counter(
+            query_shape(query.sql)
+            for query in self.queries
+            if query.sql.startswith("SELECT")
+        )
+        return [
+            (
+                shape,
+                repeats,
+                sorted(
+                    {
+                        query.origin
+                        for query in self.queries
+                        if query_shape(query.sql) == shape
+                    }
+                ),
+            )
+            for shape, repeats in shapes.items()
+            if repeats >= threshold
+        ]
+
+
+@lru_cache(maxsize=None)
+def load_budgets():
+    """Бюджеты запросов маршрутов из файлов QUERY_BUDGET_FILES."""
+    budgets = {}
+    for path in settings.QUERY_BUDGET_FILES:
+        with open(path, encoding="utf-8") as budget_file:
+            budgets.update(json.load(budget_file))
+    return budgets
+
+
+class QueryBudgetMiddleware:
+    """Считает запросы каждого ответа и ищет кандидатов в N+1.
+
+    Итог пишет в заголовки X-DB-Queries, X-DB-Time (мс) и
+    X-DB-N-Plus-One и в лог yatube.queries; превышение бюджета
+    маршрута и повторы запросов — предупреждения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        match = request.resolver_match
+        route = match.view_name if match else request.path
+        repeated = recorder.n_plus_one()
+        response["X-DB-Queries"] = str(recorder.count)
+        response["X-DB-Time"] = "%.1f" % recorder.total_time
+        response["X-DB-N-Plus-One"] = str(len(repeated))
+        logger.info(
+            "%s %s: %d queries, %.1f ms",
+            request.method,
+            route,
+            recorder.count,
+            recorder.total_time,
+        )
+        for shape, repeats, origins in repeated:
+            logger.warning(
+                "N+1 в %s: %d x %s (%s)",
+                route,
+                repeats,
+                shape,
+                ", ".join(origins),
+            )
+        budget = load_budgets().get(route)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                "%s: %d запросов при бюджете %d",
+                route,
+                recorder.count,
+                budget,
+            )
+        return response
@@ -0,0 +1,61 @@
+import math
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core import replicas
+
+COOKIE = "db_written_at"
+WRITES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def written_at(request):
+    """Время последней записи пользователя из cookie или None."""
+    try:
+        return float(request.COOKIES[COOKIE])
+    except (KeyError, ValueError):
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтений запроса.
+
+    GET-запросы к представлениям с пометкой replica_reads читают
+    свежую реплику, остальные — основную базу. Ответ на запрос, который
+    писал в основную базу, ставит cookie со временем записи: пока ни
+    одна реплика не снята после неё, пользователь читает основную базу
+    и видит свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrote = []
+
+        def track(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith(WRITES):
+                wrote.append(True)
+            return execute(sql, params, many, context)
+
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(track):
+                response = self.get_response(request)
+        finally:
+            replicas.use(None)
+        if wrote:
+            response.set_cookie(
+                COOKIE,
+                "%.3f" % time.time(),
+                max_age=math.ceil(settings.DATABASE_REPLICA_MAX_LAG),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in ("GET", "HEAD") and getattr(
+            view_func, "replica_reads", False
+        ):
+            replicas.use(replicas.choose(written_at(request)))
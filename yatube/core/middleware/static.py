@@ -0,0 +1,99 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse
+
+# Кодировки в порядке предпочтения: (Content-Encoding, суффикс файла).
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Файлы без хэша в имени могут смениться при следующем деплое.
+SHORT = "public, max-age=60"
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def scan(root):
+    """{имя: суффиксы сжатых копий} всех файлов каталога root."""
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(suffixes):
+                continue
+            name = os.path.relpath(
+                os.path.join(directory, filename), root
+            ).replace(os.sep, "/")
+            files[name] = {
+                suffix
+                for suffix in suffixes
+                if filename + suffix in filenames
+            }
+    return files
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную collectstatic статику без отдельного сервера.
+
+    Список файлов STATIC_ROOT читается один раз при старте. Из сжатых
+    копий выбирается подходящая по Accept-Encoding, файлы с хэшем
+    в имени кэшируются браузером навсегда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        self.files = scan(self.root) if self.root else {}
+        self.immutable = set(
+            getattr(staticfiles_storage, "hashed_files", {}).values()
+        )
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path.startswith(
+            self.prefix
+        ):
+            name = request.path.replace(self.prefix, "", 1)
+            if name in self.files:
+                return self.serve(request, name)
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        path = os.path.join(self.root, *name.split("/"))
+        accepted = accepted_encodings(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        encoding = None
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and suffix in self.files[name]:
+                encoding = coding
+                path += suffix
+                break
+        content_type = mimetypes.guess_type(name)[0]
+        response = FileResponse(
+            open(path, "rb"),
+            content_type=content_type or "application/octet-stream",
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if self.files[name]:
+            response["Vary"] = "Accept-Encoding"
+        response["Cache-Control"] = (
+            IMMUTABLE if name in self.immutable else SHORT
+        )
+        return response
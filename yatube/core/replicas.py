@@ -0,0 +1,114 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_local = threading.local()
+
+
+def replica_reads(view):
+    """Помечает представление, чьи GET-запросы можно читать с реплики."""
+    view.replica_reads = True
+    return view
+
+
+def current():
+    """Реплика, с которой читает текущий запрос, или None."""
+    return getattr(_local, "alias", None)
+
+
+def use(alias):
+    """Направляет чтения этого потока на реплику alias (None — основная)."""
+    _local.alias = alias
+
+
+def cache_timeout(timeout):
+    """Срок жизни записи кэша, посчитанной в текущем запросе.
+
+    Данные с реплики могут отставать от версий тегов, поднятых уже
+    после снимка, поэтому такие записи живут не дольше допустимого
+    отставания и не закрепляют устаревшую копию до следующей записи.
+    """
+    if current() is None:
+        return timeout
+    lag = settings.DATABASE_REPLICA_MAX_LAG
+    return lag if timeout is None else min(timeout, lag)
+
+
+def synced_at(alias):
+    """Момент, на который снята копия-реплика, или None, если её нет.
+
+    Реплика здесь — файл SQLite, который обновляет sync(): время
+    изменения файла равно началу копирования.
+    """
+    name = connections[alias].settings_dict["NAME"]
+    try:
+        return os.path.getmtime(name)
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def choose(written_at=None, now=None):
+    """Случайная реплика, достаточно свежая для этого пользователя.
+
+    Реплика не годится, если она отстала больше чем на
+    DATABASE_REPLICA_MAX_LAG секунд или снята раньше последней записи
+    пользователя (written_at). Тогда чтения идут в основную базу.
+    """
+    now = time.time() if now is None else now
+    fresh = []
+    for alias in settings.DATABASE_REPLICAS:
+        moment = synced_at(alias)
+        if moment is None or now - moment > settings.DATABASE_REPLICA_MAX_LAG:
+            continue
+        if written_at is not None and moment < written_at:
+            continue
+        fresh.append(alias)
+    return random.choice(fresh) if fresh else None
+
+
+def sync(alias, source=DEFAULT_DB_ALIAS):
+    """Снимает копию основной базы в файл реплики alias.
+
+    Копия пишется во временный файл и подменяет реплику целиком, так
+    что читатели не ждут блокировок: новые соединения открывают уже
+    новую копию. Возвращает момент снимка.
+    """
+    started = time.time()
+    target = connections[alias].settings_dict["NAME"]
+    partial = f"{target}.partial"
+    connection = connections[source]
+    connection.ensure_connection()
+    copy = sqlite3.connect(partial)
+    try:
+        connection.connection.backup(copy)
+    finally:
+        copy.close()
+    os.utime(partial, (started, started))
+    os.replace(partial, target)
+    return started
+
+
+class ReplicaRouter:
+    """Чтения помеченных запросов — с выбранной реплики, запись — в основную.
+
+    Реплику на время запроса выбирает
+    core.middleware.replicas.ReplicaMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import time
+from contextlib import contextmanager
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+try:
+    import brotli
+except ImportError:
+    # Без пакета brotli собираются только копии .gz.
+    brotli = None
+
+# Сжимается только текст: картинки и шрифты уже сжаты.
+COMPRESSIBLE = (".css", ".js", ".map", ".svg", ".ico", ".json", ".txt")
+MIN_SIZE = 256
+# Имя файла в ContentAddressedStorage: каталог/ab/cd/<sha256>.<расширение>.
+CONTENT_NAME = re.compile(
+    r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$"
+)
+# Число загрузок, получивших имя файла, чья транзакция ещё не
+# зафиксирована; DELETING — файл сейчас удаляют (deleting()).
+HOLD_KEY = "core:media:hold:{}"
+HOLD_TIMEOUT = 600
+DELETE_TIMEOUT = 60
+DELETING = -(10**6)
+HOLD_POLL = 0.05
+
+
+def compressors():
+    """(суффикс, функция сжатия) доступных кодировок."""
+    yield ".gz", lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield ".br", lambda data: brotli.compress(data, quality=11)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Хэшированные имена по манифесту и заранее сжатые копии файлов.
+
+    collectstatic кладёт рядом с текстовыми файлами name.gz и name.br;
+    копия остаётся, только если она меньше исходника. Пока
+    collectstatic не запускали (разработка, тесты), шаблоны получают
+    имена без хэша. Файл, которого нет среди собранных, — ValueError:
+    страница без стилей или скриптов хуже заметной ошибки сборки.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE):
+                yield from self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы, названные по SHA-256 содержимого, в каталогах-шардах.
+
+    posts/photo.JPG сохраняется как posts/ab/cd/abcd….jpg: в одном
+    каталоге не больше нескольких тысяч файлов даже при миллионах
+    картинок, а одинаковое содержимое хранится один раз — повторная
+    загрузка возвращает уже сохранённое имя. Удалять файл можно,
+    только когда на него не ссылается ни одна запись (posts.media),
+    и только внутри deleting().
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(
+            posixpath.dirname(name),
+            digest[:2],
+            digest[2:4],
+            digest + extension,
+        )
+
+    def hold(self, name):
+        """Не даёт удалить name до фиксации текущей транзакции.
+
+        Пока файл удаляют, ждём: после удаления _save запишет его заново.
+        """
+        key = HOLD_KEY.format(name)
+        while not cache.add(key, 1, HOLD_TIMEOUT):
+            try:
+                if cache.incr(key) > 0:
+                    break
+                cache.decr(key)
+            except ValueError:
+                # Ключ истёк или удаление закончилось между вызовами.
+                continue
+            time.sleep(HOLD_POLL)
+        transaction.on_commit(lambda: self.unhold(name))
+
+    def unhold(self, name):
+        try:
+            cache.decr(HOLD_KEY.format(name))
+        except ValueError:
+            pass
+
+    @contextmanager
+    def deleting(self, name):
+        """Право удалить name: True, если его не держит ни одна загрузка.
+
+        Загрузки того же содержимого ждут, пока блок не закончится.
+        Отказ оставляет лишний файл, но не битую ссылку.
+        """
+        key = HOLD_KEY.format(name)
+        claimed = cache.add(key, DELETING, DELETE_TIMEOUT)
+        if not claimed:
+            try:
+                claimed = cache.incr(key, DELETING) == DELETING
+                if not claimed:
+                    cache.decr(key, DELETING)
+            except ValueError:
+                claimed = cache.add(key, DELETING, DELETE_TIMEOUT)
+        try:
+            yield claimed
+        finally:
+            if claimed:
+                cache.delete(key)
+
+    def _save(self, name, content):
+        target = self.content_name(name, content)
+        # Иначе release() параллельного запроса мог бы удалить файл
+        # между этой проверкой и сохранением ссылающегося поста.
+        self.hold(target)
+        if self.exists(target):
+            return target
+        # Пишем под временным именем и переименовываем: одновременная
+        # загрузка того же содержимого не получит имя с суффиксом.
+        partial = super()._save(f"{target}.partial", content)
+        os.replace(self.path(partial), self.path(target))
+        return target
@@ -0,0 +1,78 @@
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.auth import SNAPSHOT_FIELDS, USER_KEY, CachedModelBackend
+
+User = get_user_model()
+PASSWORD = "test-password"
+
+
+class CachedAuthTests(TestCase):
+    """Тесты сессий и пользователя из кэша."""
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="Reader", password=PASSWORD
+        )
+        self.client = Client()
+        self.client.login(username="Reader", password=PASSWORD)
+
+    def test_no_identity_queries(self):
+        """Прогретая страница вошедшего пользователя не ходит в базу."""
+        url = reverse("posts:index")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context["user"], self.user)
+        self.assertTrue(response.context["user"].is_authenticated)
+
+    def test_slim_snapshot(self):
+        """В кэше только нужные поля и хэш сессии, без пароля и прав."""
+        self.client.get(reverse("posts:index"))
+        values = cache.get(USER_KEY.format(self.user.pk))
+        self.assertEqual(set(values), {*SNAPSHOT_FIELDS, "session_auth_hash"})
+        self.assertEqual(
+            values["session_auth_hash"], self.user.get_session_auth_hash()
+        )
+
+    def test_deferred_fields(self):
+        """Поля вне снимка читаются из базы при обращении."""
+        User.objects.filter(pk=self.user.pk).update(
+            is_staff=True, is_superuser=True, email="reader@example.com"
+        )
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        user = backend.get_user(self.user.pk)
+        self.assertEqual(user.username, "Reader")
+        self.assertTrue(user.has_perm("posts.change_post"))
+        self.assertEqual(user.email, "reader@example.com")
+
+    def test_password_change(self):
+        """Смена пароля завершает старые сессии."""
+        self.client.get(reverse("posts:index"))
+        self.assertIsNotNone(cache.get(USER_KEY.format(self.user.pk)))
+        self.user.set_password("new-password")
+        self.user.save()
+        self.assertIsNone(cache.get(USER_KEY.format(self.user.pk)))
+        response = self.client.get(reverse("posts:index"))
+        self.assertFalse(response.context["user"].is_authenticated)
+        self.assertNotIn(SESSION_KEY, self.client.session)
+
+    def test_deactivated(self):
+        """Отключённый пользователь больше не входит по сессии."""
+        self.client.get(reverse("posts:index"))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse("posts:index"))
+        self.assertFalse(response.context["user"].is_authenticated)
+
+    def test_logout(self):
+        """Выход убирает сессию и снимок пользователя из кэша."""
+        self.client.get(reverse("posts:index"))
+        self.client.get(reverse("users:logout"))
+        self.assertIsNone(cache.get(USER_KEY.format(self.user.pk)))
+        response = self.client.get(reverse("posts:index"))
+        self.assertFalse(response.context["user"].is_authenticated)
@@ -0,0 +1,233 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from core.cache.config import cache_config
+from core.cache.resp import RespCache
+from core.cache.server import RespServer
+from core.cache.sqlite import SQLiteCache
+from core.cache.tiered import TieredCache
+
+
+class CacheContract:
+    """Общие проверки для всех бэкендов кэша."""
+
+    def make_cache(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        """Фикстуры."""
+        self.cache = self.make_cache()
+        self.cache.clear()
+
+    def test_set_get(self):
+        """Значения любого типа читаются обратно."""
+        values = {
+            "int": 42,
+            "str": "Тестовый пост",
+            "list": [(1, 2, None)],
+            "bool": True,
+        }
+        for key, value in values.items():
+            with self.subTest(key=key):
+                self.cache.set(key, value)
+                self.assertEqual(self.cache.get(key), value)
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.get("missing", "default"), "default")
+
+    def test_many(self):
+        """Пачки ключей пишутся и читаются одним вызовом."""
+        self.cache.set_many({"a": 1, "b": "два"})
+        self.assertEqual(
+            self.cache.get_many(["a", "b", "c"]), {"a": 1, "b": "два"}
+        )
+        self.cache.delete_many(["a", "b"])
+        self.assertEqual(self.cache.get_many(["a", "b"]), {})
+
+    def test_add(self):
+        """add не перезаписывает существующий ключ."""
+        self.assertTrue(self.cache.add("key", 1))
+        self.assertFalse(self.cache.add("key", 2))
+        self.assertEqual(self.cache.get("key"), 1)
+
+    def test_incr(self):
+        """incr атомарно меняет число и не создаёт ключ."""
+        self.cache.set("counter", 10, None)
+        self.assertEqual(self.cache.incr("counter"), 11)
+        self.assertEqual(self.cache.incr("counter", -3), 8)
+        self.assertEqual(self.cache.get("counter"), 8)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
+
+    def test_expiry(self):
+        """Просроченный ключ не читается и освобождает место для add."""
+        self.cache.set("key", 1, 0.05)
+        self.assertTrue(self.cache.has_key("key"))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("key"))
+        self.assertTrue(self.cache.add("key", 2))
+        self.cache.set("key", 3, 0)
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_delete_and_clear(self):
+        """delete и clear удаляют данные."""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("b"))
+
+
+class SQLiteCacheTests(CacheContract, SimpleTestCase):
+    """Тесты кэша в файле SQLite."""
+
+    def make_cache(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "cache.db")
+        return SQLiteCache(self.path, {})
+
+    def test_shared_between_instances(self):
+        """Два экземпляра над одним файлом видят данные друг друга."""
+        other = SQLiteCache(self.path, {})
+        self.cache.set("key", "value")
+        self.assertEqual(other.get("key"), "value")
+        other.set("n", 1)
+        self.assertEqual(self.cache.incr("n"), 2)
+
+    def test_cull(self):
+        """Кэш не растёт больше MAX_ENTRIES."""
+        cache = SQLiteCache(self.path, {"OPTIONS": {"MAX_ENTRIES": 10}})
+        for number in range(30):
+            cache.set(f"key{number}", number)
+        count = cache._db.execute("SELECT COUNT(*) FROM cache").fetchone()
+        self.assertLessEqual(count[0], 10)
+
+
+class RespCacheTests(CacheContract, SimpleTestCase):
+    """Тесты клиента Redis на локальном сервере-заменителе."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.server = RespServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def make_cache(self):
+        return RespCache(self.server.url, {})
+
+    def test_databases_are_separate(self):
+        """Номер базы в адресе разделяет данные."""
+        other = RespCache(self.server.url[:-1] + "1", {})
+        self.cache.set("key", 1)
+        self.assertIsNone(other.get("key"))
+
+    def test_incr_keeps_expiry(self):
+        """incr не продлевает и не воскрешает истёкший ключ."""
+        self.cache.set("counter", 1, 0.05)
+        self.assertEqual(self.cache.incr("counter"), 2)
+        time.sleep(0.1)
+        with self.assertRaises(ValueError):
+            self.cache.incr("counter")
+        self.assertFalse(self.cache.has_key("counter"))
+
+    def test_incr_not_retried(self):
+        """Оборванный incr не повторяется: он мог уже выполниться."""
+        self.cache.set("counter", 1, None)
+        connection = self.cache._client
+        with mock.patch.object(
+            connection, "pipeline", side_effect=ConnectionError
+        ) as pipeline:
+            with self.assertRaises(ConnectionError):
+                self.cache.incr("counter")
+        pipeline.assert_called_once()
+        self.assertEqual(self.cache.get("counter"), 1)
+
+
+class TieredCacheTests(CacheContract, SimpleTestCase):
+    """Тесты двухуровневого кэша."""
+
+    def make_cache(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shared = SQLiteCache(
+            os.path.join(directory.name, "cache.db"), {}
+        )
+        return TieredCache(
+            "",
+            {
+                "OPTIONS": {
+                    "SHARED": self.shared,
+                    "MAX_ENTRIES": 2,
+                    "SHARED_ONLY": ("version:",),
+                }
+            },
+        )
+
+    def test_local_copy(self):
+        """Повторное чтение идёт из памяти процесса."""
+        self.cache.set("key", "value")
+        self.cache.get("key")
+        self.shared.set("key", "changed")
+        self.assertEqual(self.cache.get("key"), "value")
+        self.assertEqual(self.cache.local_hits, 1)
+
+    def test_local_copy_expires(self):
+        """Копия в памяти живёт LOCAL_TIMEOUT секунд."""
+        self.cache.local_timeout = 0.05
+        self.cache.set("key", "value")
+        self.cache.get("key")
+        self.shared.set("key", "changed")
+        time.sleep(0.1)
+        self.assertEqual(self.cache.get("key"), "changed")
+
+    def test_shared_only(self):
+        """Изменяемые ключи всегда читаются из общего кэша."""
+        self.cache.set("version:feed", 1, None)
+        self.cache.get("version:feed")
+        self.shared.incr("version:feed")
+        self.assertEqual(self.cache.get("version:feed"), 2)
+
+    def test_lru(self):
+        """В памяти держится не больше MAX_ENTRIES записей."""
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key)
+            self.cache.get(key)
+        self.assertEqual(list(self.cache._lru), [":1:b", ":1:c"])
+
+
+class CacheConfigTests(SimpleTestCase):
+    """Тесты настроек кэша по адресу."""
+
+    def test_backends(self):
+        """Схема адреса выбирает бэкенд."""
+        backends = {
+            "locmem://": "django.core.cache.backends.locmem.LocMemCache",
+            "sqlite:///tmp/cache.db": "core.cache.sqlite.SQLiteCache",
+            "redis://cache:6379/2": "core.cache.resp.RespCache",
+        }
+        for url, backend in backends.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    cache_config(url)["default"]["BACKEND"], backend
+                )
+        with self.assertRaises(ValueError):
+            cache_config("memcached://cache")
+
+    def test_tiered(self):
+        """Локальный уровень ставится только перед общим кэшем."""
+        config = cache_config("redis://cache:6379/0", local_entries=100)
+        self.assertEqual(
+            config["default"]["BACKEND"], "core.cache.tiered.TieredCache"
+        )
+        self.assertEqual(config["shared"]["LOCATION"], "redis://cache:6379/0")
+        config = cache_config("locmem://", local_entries=100)
+        self.assertNotIn("shared", config)
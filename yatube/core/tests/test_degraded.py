@@ -0,0 +1,127 @@
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core.degraded import CLOSED, OPEN, PROBE, breaker
+from core.middleware.degraded import COPY_KEY
+from posts.models import Post
+
+User = get_user_model()
+
+
+@contextmanager
+def slow_database(delay=0.0, error=False):
+    """Обёртка базы, которая тормозит или падает, как при блокировке."""
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(delay)
+        if error:
+            raise OperationalError("database is locked")
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+@override_settings(
+    DEGRADED_MIN_QUERIES=3,
+    DEGRADED_SLOW_QUERY=0.01,
+    DEGRADED_COOLDOWN=60,
+)
+class DegradedModeTests(TestCase):
+    """Тесты аварийного режима."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.post = Post.objects.create(text="Тестовый пост", author=cls.author)
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        breaker.reset()
+        self.addCleanup(breaker.reset)
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def overload(self):
+        """Медленная база включает аварийный режим."""
+        with slow_database(delay=0.02):
+            for i in range(5):
+                self.guest_client.get(
+                    reverse("posts:group_list", args=(f"missing-{i}",))
+                )
+        self.assertEqual(breaker.state(), OPEN)
+
+    def test_stale_copy(self):
+        """В аварийном режиме лента отдаётся из копии с плашкой."""
+        url = reverse("posts:index")
+        self.assertContains(self.guest_client.get(url), "Тестовый пост")
+        self.overload()
+        Post.objects.create(text="Новый пост", author=self.author)
+        with slow_database(error=True):
+            response = self.guest_client.get(url)
+        self.assertContains(response, "Тестовый пост")
+        self.assertContains(response, "работает только на чтение")
+        self.assertNotContains(response, "Новый пост")
+
+    def test_copy_params(self):
+        """Копия хранится по паджинации, чужие параметры её не плодят."""
+        url = reverse("posts:index")
+        self.guest_client.get(url, {"page": 1, "utm_source": "feed"})
+        self.assertIsNone(cache.get(f"{COPY_KEY.format(url)}?page=1"))
+        self.assertIsNone(
+            cache.get(f"{COPY_KEY.format(url)}?page=1&utm_source=feed")
+        )
+        self.guest_client.get(url, {"page": 1})
+        self.assertIsNotNone(cache.get(f"{COPY_KEY.format(url)}?page=1"))
+
+    def test_writes_try_later(self):
+        """Запись и страницы без копии сразу получают 503."""
+        self.overload()
+        with slow_database(error=True):
+            response = self.author_client.post(
+                reverse("posts:post_create"), {"text": "Пост"}
+            )
+            self.assertEqual(response.status_code, 503)
+            self.assertIn("Retry-After", response)
+            response = self.guest_client.get(
+                reverse("posts:post_detail", args=(self.post.id,))
+            )
+            self.assertEqual(response.status_code, 503)
+        self.assertFalse(Post.objects.filter(text="Пост").exists())
+
+    def test_copies_are_anonymous(self):
+        """Ответы вошедшим пользователям не сохраняются в копии."""
+        url = reverse("posts:index")
+        self.author_client.get(url)
+        self.overload()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 503)
+
+    def test_database_error(self):
+        """Ошибка базы на странице с копией — отдаём копию, а не 500."""
+        url = reverse("posts:post_detail", args=(self.post.id,))
+        self.guest_client.get(url)
+        with slow_database(error=True):
+            response = self.guest_client.get(url)
+        self.assertContains(response, "Тестовый пост")
+        self.assertContains(response, "работает только на чтение")
+
+    def test_probe(self):
+        """После паузы один запрос проверяет базу и выключает режим."""
+        self.overload()
+        with override_settings(DEGRADED_COOLDOWN=0):
+            self.assertEqual(breaker.state(), PROBE)
+            self.assertEqual(breaker.state(), OPEN)
+            breaker.finish_probe(ok=False)
+            self.assertEqual(breaker.state(), PROBE)
+            breaker.finish_probe(ok=True)
+        self.assertEqual(breaker.state(), CLOSED)
@@ -0,0 +1,137 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from core import replicas
+from core.middleware.replicas import COOKIE
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_REPLICA_MAX_LAG=5)
+class ChooseTests(SimpleTestCase):
+    """Тесты выбора реплики."""
+
+    def choose(self, synced_at, written_at=None):
+        with mock.patch.object(replicas, "synced_at", return_value=synced_at):
+            return replicas.choose(written_at, now=100)
+
+    def test_fresh(self):
+        """Свежая реплика выбирается, отставшая или пропавшая — нет."""
+        self.assertEqual(self.choose(97), "replica")
+        self.assertIsNone(self.choose(90))
+        self.assertIsNone(self.choose(None))
+
+    def test_read_your_writes(self):
+        """Реплика, снятая до записи пользователя, не выбирается."""
+        self.assertIsNone(self.choose(97, written_at=98))
+        self.assertEqual(self.choose(99, written_at=98), "replica")
+
+    def test_router(self):
+        """Чтения идут на выбранную реплику, запись — всегда в основную."""
+        router = replicas.ReplicaRouter()
+        self.addCleanup(replicas.use, None)
+        self.assertIsNone(router.db_for_read(Post))
+        replicas.use("replica")
+        self.assertEqual(router.db_for_read(Post), "replica")
+        self.assertEqual(router.db_for_write(Post), "default")
+        self.assertFalse(router.allow_migrate("replica", "posts"))
+        self.assertTrue(router.allow_migrate("default", "posts"))
+
+    def test_cache_timeout(self):
+        """Кэш, посчитанный по реплике, живёт не дольше отставания."""
+        self.addCleanup(replicas.use, None)
+        self.assertEqual(replicas.cache_timeout(3600), 3600)
+        replicas.use("replica")
+        self.assertEqual(replicas.cache_timeout(3600), 5)
+        self.assertEqual(replicas.cache_timeout(None), 5)
+
+
+class ReplicaReadsTests(TransactionTestCase):
+    """Тесты чтения лент с реплики."""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.author = User.objects.create_user(username="Author")
+        Post.objects.create(text="Тестовый пост", author=self.author)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def tearDown(self):
+        """Убираем посты из поискового индекса."""
+        Post.objects.all().delete()
+        search.rebuild()
+
+    def replica_queries(self, url, synced_at, method="get", **data):
+        """Число запросов к реплике при обработке url."""
+        with mock.patch.object(
+            replicas, "synced_at", return_value=synced_at
+        ), CaptureQueriesContext(connections["replica"]) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400)
+        return len(queries), response
+
+    def test_feeds_read_replica(self):
+        """Ленты и API читают свежую реплику, устаревшую — нет."""
+        for url in (reverse("posts:index"), reverse("api:index")):
+            with self.subTest(url=url):
+                cache.clear()
+                count, _ = self.replica_queries(url, time.time())
+                self.assertGreater(count, 0)
+                cache.clear()
+                count, _ = self.replica_queries(url, time.time() - 60)
+                self.assertEqual(count, 0)
+
+    def test_writes_use_primary(self):
+        """Запись ставит cookie, и до новой копии чтения идут в основную."""
+        count, response = self.replica_queries(
+            reverse("posts:post_create"),
+            time.time() - 1,
+            method="post",
+            text="Новый пост",
+        )
+        self.assertEqual(count, 0)
+        self.assertIn(COOKIE, response.cookies)
+        count, _ = self.replica_queries(
+            reverse("posts:index"), time.time() - 1
+        )
+        self.assertEqual(count, 0)
+        cache.clear()
+        count, _ = self.replica_queries(reverse("posts:index"), time.time())
+        self.assertGreater(count, 0)
+
+    def test_sync(self):
+        """sync копирует основную базу в файл реплики целиком."""
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, "replica.sqlite3")
+            with mock.patch.dict(
+                connections["replica"].settings_dict, NAME=name
+            ):
+                started = replicas.sync("replica")
+                self.assertEqual(replicas.synced_at("replica"), started)
+            copy = sqlite3.connect(name)
+            try:
+                (count,) = copy.execute(
+                    f"SELECT COUNT(*) FROM {Post._meta.db_table}"
+                ).fetchone()
+            finally:
+                copy.close()
+        self.assertEqual(count, 1)
@@ -0,0 +1,159 @@
+import gzip
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from core import storage
+from core.middleware.static import accepted_encodings
+
+CSS = "body { color: black; }\n" * 100
+
+
+class StaticPipelineTests(SimpleTestCase):
+    """Тесты сборки статики и её раздачи."""
+
+    def setUp(self):
+        """Фикстуры: исходная статика и пустой STATIC_ROOT."""
+        self.directory = tempfile.TemporaryDirectory()
+        source = os.path.join(self.directory.name, "static")
+        os.makedirs(os.path.join(source, "css"))
+        with open(os.path.join(source, "css", "site.css"), "w") as css:
+            css.write(CSS)
+        with open(os.path.join(source, "logo.png"), "wb") as png:
+            png.write(b"\x89PNG" + bytes(1000))
+        self.settings = override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=os.path.join(self.directory.name, "root"),
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        """Убираем временные каталоги."""
+        self.settings.disable()
+        self.directory.cleanup()
+
+    def test_without_manifest(self):
+        """До collectstatic шаблоны получают имена без хэша."""
+        self.assertEqual(static("css/site.css"), "/static/css/site.css")
+
+    def test_collectstatic(self):
+        """Хэш в имени и сжатые копии только для текста."""
+        call_command("collectstatic", interactive=False, verbosity=0)
+        url = static("css/site.css")
+        self.assertRegex(url, r"^/static/css/site\.[0-9a-f]{12}\.css$")
+        root = os.path.join(self.directory.name, "root")
+        hashed = os.path.join(root, url.replace("/static/", "", 1))
+        with gzip.open(hashed + ".gz", "rt") as compressed:
+            self.assertEqual(compressed.read(), CSS)
+        self.assertEqual(
+            os.path.exists(hashed + ".br"), storage.brotli is not None
+        )
+        self.assertEqual(
+            [name for name in os.listdir(root) if name.endswith(".png.gz")],
+            [],
+        )
+
+    def test_middleware(self):
+        """Сжатая копия по Accept-Encoding, вечный кэш для хэша."""
+        call_command("collectstatic", interactive=False, verbosity=0)
+        client = Client()
+        url = static("css/site.css")
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertIn("immutable", response["Cache-Control"])
+        body = b"".join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), CSS.encode())
+        response = client.get("/static/css/site.css")
+        self.assertNotIn("immutable", response["Cache-Control"])
+
+    def test_accepted_encodings(self):
+        """Разбор Accept-Encoding с весами."""
+        self.assertEqual(
+            accepted_encodings("br;q=1.0, gzip;q=0, identity"),
+            {"br", "identity"},
+        )
+
+
+# Файлы, на которые ссылаются шаблоны. Каталога static может не быть
+# в рабочей копии: недостающие файлы тест создаёт сам.
+TEMPLATE_STATIC = (
+    "css/bootstrap.min.css",
+    "js/bootstrap.bundle.min.js",
+    "img/logo.png",
+    "img/fav/fav.ico",
+    "img/fav/apple-touch-icon.png",
+    "img/fav/favicon-16x16.png",
+    "img/fav/favicon-32x32.png",
+)
+
+
+class CollectedSiteTests(TestCase):
+    """Страницы с настоящей статикой проекта после collectstatic."""
+
+    def setUp(self):
+        """Фикстуры: недостающая статика и пустой STATIC_ROOT."""
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        sources = [
+            path for path in settings.STATICFILES_DIRS if os.path.isdir(path)
+        ]
+        missing = os.path.join(self.directory.name, "missing")
+        for name in TEMPLATE_STATIC:
+            if not any(
+                os.path.exists(os.path.join(path, name)) for path in sources
+            ):
+                path = os.path.join(missing, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as placeholder:
+                    placeholder.write(f"/* {name} */\n")
+        if os.path.isdir(missing):
+            sources.append(missing)
+        self.settings = override_settings(
+            STATICFILES_DIRS=sources,
+            STATIC_ROOT=os.path.join(self.directory.name, "root"),
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        """Убираем собранную статику."""
+        self.settings.disable()
+        self.directory.cleanup()
+        cache.clear()
+
+    def test_pages_render(self):
+        """Страницы открываются, вся статика в адресах с хэшем."""
+        call_command("collectstatic", interactive=False, verbosity=0)
+        response = self.client.get(reverse("posts:index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.content.decode(),
+            r"/static/js/bootstrap\.bundle\.min\.[0-9a-f]{12}\.js",
+        )
+        self.assertNotIn("cdn.jsdelivr.net", response.content.decode())
+        names = re.findall(r"/static/([^\"' ,>]+)", response.content.decode())
+        for name in names:
+            with self.subTest(name=name):
+                self.assertRegex(name, r"\.[0-9a-f]{12}\.\w+$")
+        response = self.client.get(reverse("admin:login"))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response.content.decode(),
+            r"/static/admin/css/base\.[0-9a-f]{12}\.css",
+        )
+
+    def test_missing_file(self):
+        """Файла нет среди собранных — ошибка, а не адрес без хэша."""
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with self.assertRaises(ValueError):
+            static("css/missing.css")
@@ -1,9 +1,116 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
 
+from . import search
 from .models import Comment, Follow, Group, Post
+from .paginators import CursorPaginator
 
+AFTER_VAR = "after"
+BEFORE_VAR = "before"
+CURSOR_VARS = (AFTER_VAR, BEFORE_VAR)
 
-class PostAdmin(admin.ModelAdmin):
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator списков админки без полного COUNT(*).
+
+    Без фильтров число строк оценивается по наибольшему первичному
+    ключу (один шаг индекса), с фильтрами — считается не дальше
+    POSTS_ADMIN_COUNT_LIMIT строк.
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            return (
+                self.object_list.aggregate(last=Max("pk"))["last"] or 0
+            )
+        return (
+            self.object_list.order_by()[: settings.POSTS_ADMIN_COUNT_LIMIT]
+            .count()
+        )
+
+
+class CursorChangeList(ChangeList):
+    """Список админки, который листается курсором по сортировке модели.
+
+    Глубокие страницы не читают OFFSET строк. При сортировке по
+    колонке остаются обычные номера страниц.
+    """
+
+    cursor_page = None
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        for name in CURSOR_VARS:
+            lookup_params.pop(name, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        """Ссылки фильтров и сортировки ведут на первую страницу."""
+        new_params = new_params or {}
+        remove = list(remove or []) + [
+            name for name in CURSOR_VARS if name not in new_params
+        ]
+        return super().get_query_string(new_params, remove)
+
+    def cursor_ordering(self, request):
+        """Сортировка модели с явным именем первичного ключа."""
+        pk_name = self.lookup_opts.pk.name
+        return [
+            part.replace("pk", pk_name) if part.lstrip("-") == "pk" else part
+            for part in self.get_ordering(request, self.queryset)
+        ]
+
+    def get_results(self, request):
+        """Страница по курсору; страница с OFFSET не строится вовсе.
+
+        Число строк — оценка EstimatedCountPaginator, она выводится
+        рядом со ссылками курсора.
+        """
+        if ORDER_VAR in self.params or self.show_all:
+            return super().get_results(request)
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        paginator = CursorPaginator(
+            self.queryset, self.list_per_page, self.cursor_ordering(request)
+        )
+        self.cursor_page = paginator.get_page(
+            after=self.params.get(AFTER_VAR),
+            before=self.params.get(BEFORE_VAR),
+        )
+        self.result_list = self.cursor_page.object_list
+        self.multi_page = self.cursor_page.has_other_pages()
+        self.first_url = self.get_query_string()
+        self.next_url = self.get_query_string(
+            {AFTER_VAR: self.cursor_page.next_cursor}
+        )
+        self.previous_url = self.get_query_string(
+            {BEFORE_VAR: self.cursor_page.previous_cursor}
+        )
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Админка больших таблиц: курсор вместо OFFSET, оценка числа строк."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/scalable_change_list.html"
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
+class PostAdmin(ScalableAdmin):
     """Интерфейс Post в админке."""
 
     list_display = (
@@ -13,13 +120,46 @@ class PostAdmin(admin.ModelAdmin):
         "author",
         "group",
     )
-    list_editable = ("group",)
+    list_select_related = ("author", "group")
+    raw_id_fields = ("author",)
+    autocomplete_fields = ("group",)
     search_fields = ("text",)
     list_filter = ("pub_date",)
+    date_hierarchy = "pub_date"
+    empty_value_display = "-пусто-"
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по полнотекстовому индексу вместо icontains по text."""
+        if not search.match_query(search_term):
+            return queryset, False
+        return search.matching(queryset, search_term), False
+
+
+class GroupAdmin(admin.ModelAdmin):
+    """Интерфейс Group в админке."""
+
+    list_display = ("pk", "title", "slug")
+    search_fields = ("title", "slug")
+
+
+class CommentAdmin(ScalableAdmin):
+    """Интерфейс Comment в админке."""
+
+    list_display = ("pk", "text", "post", "author", "created")
+    list_select_related = ("post", "author")
+    raw_id_fields = ("post", "author")
     empty_value_display = "-пусто-"
 
 
+class FollowAdmin(ScalableAdmin):
+    """Интерфейс Follow в админке."""
+
+    list_display = ("pk", "user", "author")
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
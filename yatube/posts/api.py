@@ -0,0 +1,239 @@
+from functools import wraps
+from operator import itemgetter
+
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
+
+from core.replicas import replica_reads
+
+from . import fanout, identity
+from .models import Comment, Post, UserStats
+from .paginators import CursorPaginator, InvalidCursor
+from .thumbnails import image_thumbnail_url
+from .views import POST_LIMIT
+
+MAX_LIMIT = 100
+BATCH_LIMIT = 100
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+# Поле ответа -> (столбцы values(), построение значения из строки).
+POST_FIELDS = {
+    "id": (("id",), itemgetter("id")),
+    "text": (("text",), itemgetter("text")),
+    "pub_date": (("pub_date",), itemgetter("pub_date")),
+    "author": (("author__username",), itemgetter("author__username")),
+    "group": (("group__slug",), itemgetter("group__slug")),
+    "image": (("image",), lambda row: _media_url(row["image"])),
+    "thumbnail": (
+        ("image", "thumbnail_of", "image_width"),
+        lambda row: image_thumbnail_url(
+            row["image"], row["thumbnail_of"], row["image_width"]
+        )
+        or None,
+    ),
+}
+COMMENT_FIELDS = {
+    "id": "id",
+    "author": "author__username",
+    "text": "text",
+    "created": "created",
+}
+
+
+class ApiError(Exception):
+    """Ошибка запроса: HTTP-статус и сообщение для клиента."""
+
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def json_response(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={"ensure_ascii": False}
+    )
+
+
+def api_view(view):
+    """Только GET с чтением реплики; ошибки — JSON, а не HTML."""
+
+    @replica_reads
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return json_response(view(request, *args, **kwargs))
+        except Http404:
+            return json_response({"detail": "Не найдено."}, 404)
+        except ApiError as error:
+            return json_response({"detail": error.detail}, error.status)
+
+    return wrapper
+
+
+def requested_fields(request):
+    """Поля из ?fields=a,b; без параметра — все."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(POST_FIELDS)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in POST_FIELDS]
+    if unknown:
+        raise ApiError(400, f"Неизвестные поля: {', '.join(unknown)}.")
+    return fields
+
+
+def page_limit(request):
+    raw = request.GET.get("limit")
+    if raw is None:
+        return POST_LIMIT
+    if not raw.isdigit() or not 1 <= int(raw) <= MAX_LIMIT:
+        raise ApiError(400, f"limit — число от 1 до {MAX_LIMIT}.")
+    return int(raw)
+
+
+def columns(fields, extra=()):
+    """Столбцы values() для полей ответа и курсора, без повторов."""
+    result = dict.fromkeys(extra)
+    for name in fields:
+        result.update(dict.fromkeys(POST_FIELDS[name][0]))
+    return list(result)
+
+
+def serialize(row, fields):
+    return {name: POST_FIELDS[name][1](row) for name in fields}
+
+
+def cursor_page(request, queryset, serialize_row, values):
+    """Страница после ?after=: {"results": [...], "next": адрес}.
+
+    Строки читаются через values() со столбцами полей ответа и
+    сортировки queryset, модели не создаются.
+    """
+    ordering = CursorPaginator(queryset, 1).fields
+    paginator = CursorPaginator(
+        queryset.values(*dict.fromkeys([*values, *ordering])),
+        page_limit(request),
+    )
+    try:
+        page = paginator.page(after=request.GET.get("after"))
+    except InvalidCursor:
+        raise ApiError(400, "Неверный курсор.")
+    following = None
+    if page.has_next():
+        query = request.GET.copy()
+        query["after"] = page.next_cursor
+        following = f"{request.path}?{query.urlencode()}"
+    return {
+        "results": [serialize_row(row) for row in page],
+        "next": following,
+    }
+
+
+def post_page(request, queryset):
+    fields = requested_fields(request)
+    return cursor_page(
+        request,
+        queryset,
+        lambda row: serialize(row, fields),
+        columns(fields),
+    )
+
+
+@api_view
+def index(request):
+    """Общая лента."""
+    return post_page(request, Post.objects.all())
+
+
+@api_view
+def group_posts(request, slug):
+    """Лента группы и сама группа."""
+    group = identity.groups.get_or_404(slug)
+    data = {
+        "group": {
+            "slug": group.slug,
+            "title": group.title,
+            "description": group.description,
+        }
+    }
+    data.update(post_page(request, Post.objects.filter(group=group)))
+    return data
+
+
+@api_view
+def profile(request, username):
+    """Лента автора и его счётчики."""
+    author = identity.users.get_or_404(username)
+    stats = UserStats.objects.for_user(author.id)
+    data = {
+        "author": {
+            "username": author.username,
+            "posts_count": stats.posts_count,
+            "followers_count": stats.followers_count,
+            "following_count": stats.following_count,
+        }
+    }
+    data.update(post_page(request, Post.objects.filter(author=author)))
+    return data
+
+
+@api_view
+def follow_index(request):
+    """Лента подписок вошедшего пользователя."""
+    if not request.user.is_authenticated:
+        raise ApiError(401, "Нужна авторизация.")
+    return post_page(request, fanout.follow_feed(request.user))
+
+
+@api_view
+def post_detail(request, post_id):
+    """Один пост."""
+    fields = requested_fields(request)
+    row = Post.objects.filter(id=post_id).values(*columns(fields)).first()
+    if row is None:
+        raise Http404
+    return serialize(row, fields)
+
+
+@api_view
+def post_comments(request, post_id):
+    """Комментарии поста по курсору."""
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    return cursor_page(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        lambda row: {
+            name: row[column] for name, column in COMMENT_FIELDS.items()
+        },
+        COMMENT_FIELDS.values(),
+    )
+
+
+@api_view
+def posts_batch(request):
+    """Посты по списку ?ids=1,2,3 за один запрос, в порядке списка."""
+    raw = [item.strip() for item in request.GET.get("ids", "").split(",")]
+    if not all(item.isdigit() for item in raw):
+        raise ApiError(400, "ids — id постов через запятую.")
+    ids = list(dict.fromkeys(int(item) for item in raw))
+    if len(ids) > BATCH_LIMIT:
+        raise ApiError(400, f"Не больше {BATCH_LIMIT} id за раз.")
+    fields = requested_fields(request)
+    rows = {
+        row["id"]: row
+        for row in Post.objects.filter(id__in=ids).values(
+            *columns(fields, ("id",))
+        )
+    }
+    return {
+        "results": [serialize(rows[pk], fields) for pk in ids if pk in rows],
+        "missing": [pk for pk in ids if pk not in rows],
+    }
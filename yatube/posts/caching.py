@@ -0,0 +1,373 @@
+import math
+import random
+import time
+from collections.abc import Sequence
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+
+from core.replicas import cache_timeout
+
+from .identity import attach
+from .paginators import CursorPaginator
+
+VERSION_KEY = "posts:version:{}"
+PAGE_KEY = "posts:page:{}:{}:{}"
+FRAGMENT_KEY = "posts:fragment:{}:{}"
+STATS_KEY = "posts:cache:{}:{}"
+STALE_KEY = "posts:stale:{}"
+LOCK_KEY = "posts:lock:{}"
+
+KINDS = ("page", "card", "comments")
+FILL_OUTCOMES = ("early", "stale", "waited")
+FILL_POLL = 0.05
+CARD_TEMPLATE = "includes/article.html"
+COMMENTS_TEMPLATE = "includes/comments_list.html"
+
+
+def post_tag(post_id):
+    """Тег текста, картинки и группы поста."""
+    return f"post:{post_id}"
+
+
+def user_tag(user_id):
+    """Тег имени пользователя в карточках."""
+    return f"user:{user_id}"
+
+
+def group_tag(group_id):
+    """Тег названия и адреса группы в карточках."""
+    return f"group-info:{group_id}"
+
+
+def comments_tag(post_id):
+    """Тег комментариев поста."""
+    return f"comments:{post_id}"
+
+
+def stats_tag(user_id):
+    """Тег счётчиков подписок пользователя в профиле."""
+    return f"stats:{user_id}"
+
+
+def card_tags(post_id, author_id, group_id):
+    """Теги, от которых зависит карточка поста."""
+    tags = [post_tag(post_id), user_tag(author_id)]
+    if group_id:
+        tags.append(group_tag(group_id))
+    return tags
+
+
+def get_versions(tags):
+    """Текущие версии тегов (лент и фрагментов) одним запросом к кэшу.
+
+    Новая версия начинается с текущего времени в миллисекундах, а не
+    с единицы: если ключ версии вытеснят из кэша, старые фрагменты
+    с прежними номерами не оживут.
+    """
+    keys = {tag: VERSION_KEY.format(tag) for tag in tags}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    missing = {}
+    for tag, key in keys.items():
+        if key in stored:
+            versions[tag] = stored[key]
+        else:
+            missing[key] = versions[tag] = int(time.time() * 1000)
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def bump(tags):
+    """Сдвигает версии тегов: все фрагменты с ними становятся старыми."""
+    for tag in tags:
+        try:
+            cache.incr(VERSION_KEY.format(tag))
+        except ValueError:
+            # Версии ещё нет, её заведёт следующее чтение.
+            pass
+
+
+def record(kind, hits, misses):
+    """Копит попадания и промахи кэша фрагментов."""
+    for outcome, value in (("hit", hits), ("miss", misses)):
+        add_stat(kind, outcome, value)
+
+
+def add_stat(kind, outcome, value=1):
+    """Прибавляет value к счётчику kind/outcome."""
+    if not value:
+        return
+    key = STATS_KEY.format(kind, outcome)
+    if not cache.add(key, value, None):
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            cache.add(key, value, None)
+
+
+def refresh_early(delta, expires, now):
+    """Пора ли пересчитать запись до истечения срока.
+
+    Вероятность растёт к концу срока и с ценой пересчёта delta
+    (XFetch), так что запись обычно обновляется заранее, одним
+    запросом, а не всеми сразу в момент истечения.
+    """
+    if expires is None:
+        return False
+    beta = settings.POSTS_EARLY_REFRESH_BETA
+    return now - delta * beta * math.log(random.random()) >= expires
+
+
+def store(key, stale_key, compute):
+    """Считает значение и кладёт его в кэш со сроком и ценой пересчёта."""
+    started = time.time()
+    value = compute()
+    delta = time.time() - started
+    timeout = cache_timeout(settings.POSTS_CACHE_TIMEOUT)
+    expires = None if timeout is None else started + timeout
+    cache.set_many(
+        {key: (value, delta, expires), stale_key: value}, timeout
+    )
+    return value
+
+
+def fill(kind, key, stale_name, compute):
+    """Значение key из кэша; пересчитывает его один запрос из многих.
+
+    При промахе считает тот, кто первым взял блокировку в общем кэше
+    (одну на все процессы), остальные получают прошлое значение
+    stale_name, а если его нет — ждут до POSTS_FILL_WAIT секунд
+    и только потом считают сами. Незадолго до истечения срока запись
+    с некоторой вероятностью пересчитывается заранее (refresh_early).
+    """
+    stale_key = STALE_KEY.format(stale_name)
+    lock_key = LOCK_KEY.format(key)
+    lock_timeout = settings.POSTS_FILL_LOCK_TIMEOUT
+    entry = cache.get(key)
+    if entry is not None:
+        record(kind, 1, 0)
+        value, delta, expires = entry
+        if not refresh_early(delta, expires, time.time()):
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            return value
+        add_stat("fill", "early")
+    else:
+        record(kind, 0, 1)
+        if not cache.add(lock_key, 1, lock_timeout):
+            return wait_for(key, stale_key, compute)
+    try:
+        return store(key, stale_key, compute)
+    finally:
+        cache.delete(lock_key)
+
+
+def wait_for(key, stale_key, compute):
+    """Прошлое значение или результат чужого пересчёта key."""
+    stale = cache.get(stale_key)
+    if stale is not None:
+        add_stat("fill", "stale")
+        return stale
+    deadline = time.monotonic() + settings.POSTS_FILL_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(FILL_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            add_stat("fill", "waited")
+            return entry[0]
+    return store(key, stale_key, compute)
+
+
+def fragment_key(name, tags, versions=None):
+    """Ключ фрагмента: имя и версии всех его тегов."""
+    if versions is None:
+        versions = get_versions(tags)
+    return FRAGMENT_KEY.format(
+        name, ".".join(str(versions[tag]) for tag in tags)
+    )
+
+
+def cached_fragment(kind, name, tags, render):
+    """Фрагмент из кэша или render(), сохранённый до смены тегов."""
+    return fill(kind, fragment_key(name, tags), f"fragment:{name}", render)
+
+
+def stats(kinds=KINDS):
+    """Возвращает {вид: (попадания, промахи)}."""
+    keys = [
+        STATS_KEY.format(kind, outcome)
+        for kind in kinds
+        for outcome in ("hit", "miss")
+    ]
+    stored = cache.get_many(keys)
+    return {
+        kind: (
+            stored.get(STATS_KEY.format(kind, "hit"), 0),
+            stored.get(STATS_KEY.format(kind, "miss"), 0),
+        )
+        for kind in kinds
+    }
+
+
+def fill_stats():
+    """Сколько раз пересчёт не устроил давку: {исход: число}.
+
+    early — запись пересчитана заранее, stale — отдано прошлое
+    значение, пока пересчитывает другой запрос, waited — дождались
+    чужого пересчёта.
+    """
+    keys = {
+        outcome: STATS_KEY.format("fill", outcome)
+        for outcome in FILL_OUTCOMES
+    }
+    stored = cache.get_many(keys.values())
+    return {outcome: stored.get(key, 0) for outcome, key in keys.items()}
+
+
+def reset_stats(kinds=KINDS):
+    """Обнуляет счётчики попаданий и пересчётов."""
+    cache.delete_many(
+        [
+            STATS_KEY.format(kind, outcome)
+            for kind in kinds
+            for outcome in ("hit", "miss")
+        ]
+        + [STATS_KEY.format("fill", outcome) for outcome in FILL_OUTCOMES]
+    )
+
+
+def post_refs(posts):
+    """(id, автор, группа) постов — всё, что нужно для ключей карточек."""
+    return [(post.pk, post.author_id, post.group_id) for post in posts]
+
+
+class CachedPosts(Sequence):
+    """Посты страницы по закэшированному списку (id, автор, группа).
+
+    Длина известна без базы; сами посты читаются, только если
+    к ним обратились, и только те, чьих карточек нет в кэше.
+    """
+
+    def __init__(self, refs, queryset):
+        self.refs = refs
+        self.ids = [ref[0] for ref in refs]
+        self.queryset = queryset
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return self.posts[index]
+
+    def fetch(self, ids):
+        """Посты по id, словарём; авторы и группы — из кэша объектов."""
+        found = self.queryset.select_related(None).in_bulk(ids)
+        attach(found.values())
+        return found
+
+    @cached_property
+    def posts(self):
+        found = self.fetch(self.ids)
+        return [found[pk] for pk in self.ids if pk in found]
+
+
+def page_key(feed, number, tags=()):
+    """Ключ списка постов страницы при текущих версиях ленты и tags."""
+    tags = [feed, *tags]
+    versions = get_versions(tags)
+    return PAGE_KEY.format(
+        feed, ".".join(str(versions[tag]) for tag in tags), number
+    )
+
+
+def cached_page_refs(feed, number, tags=()):
+    """Закэшированный список (id, автор, группа) страницы или None."""
+    entry = cache.get(page_key(feed, number, tags))
+    return None if entry is None else entry[0]
+
+
+def cache_page_ids(page_obj, feed, queryset, tags=()):
+    """Подставляет в страницу список id из кэша или кэширует его.
+
+    Ключ включает версию ленты и тегов tags, от которых она зависит,
+    поэтому новые и удалённые посты меняют его сразу, без ожидания
+    таймаута. После изменения ленты
+    страницу пересчитывает один запрос, остальные до его окончания
+    получают прошлый список (fill).
+    """
+    posts = []
+
+    def compute():
+        posts.extend(page_obj.object_list)
+        return post_refs(posts)
+
+    refs = fill(
+        "page",
+        page_key(feed, page_obj.number, tags),
+        f"page:{feed}:{page_obj.number}",
+        compute,
+    )
+    page_obj.object_list = posts or CachedPosts(refs, queryset)
+    return page_obj
+
+
+def render_cards(posts):
+    """Карточки постов страницы; готовые берутся из кэша пачкой."""
+    if isinstance(posts, CachedPosts):
+        refs = posts.refs
+    else:
+        posts = list(posts)
+        refs = post_refs(posts)
+    tags = {ref[0]: card_tags(*ref) for ref in refs}
+    versions = get_versions(set(chain.from_iterable(tags.values())))
+    ids = [ref[0] for ref in refs]
+    keys = {
+        pk: fragment_key(f"card:{pk}", tags[pk], versions) for pk in ids
+    }
+    cards = cache.get_many(keys.values())
+    missing = [pk for pk in ids if keys[pk] not in cards]
+    record("card", len(ids) - len(missing), len(missing))
+    if missing:
+        if isinstance(posts, CachedPosts):
+            found = posts.fetch(missing)
+        else:
+            found = {post.pk: post for post in posts}
+        rendered = {
+            keys[pk]: render_to_string(CARD_TEMPLATE, {"post": found[pk]})
+            for pk in missing
+            if pk in found
+        }
+        cache.set_many(
+            rendered, cache_timeout(settings.POSTS_CACHE_TIMEOUT)
+        )
+        cards.update(rendered)
+    return [cards[keys[pk]] for pk in ids if keys[pk] in cards]
+
+
+def render_comments(post, comments, after=None):
+    """Порция комментариев поста после курсора after.
+
+    Порция хранится до следующего комментария поста; запрос к базе
+    выполняется только при промахе.
+    """
+
+    def render():
+        paginator = CursorPaginator(
+            comments, settings.POSTS_COMMENTS_PER_PAGE
+        )
+        return render_to_string(
+            COMMENTS_TEMPLATE,
+            {"post": post, "page": paginator.page(after=after)},
+        )
+
+    return cached_fragment(
+        "comments",
+        f"comments:{post.pk}:{after or ''}",
+        [comments_tag(post.pk)],
+        render,
+    )
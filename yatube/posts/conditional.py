@@ -0,0 +1,109 @@
+import hashlib
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+
+from . import fanout, feeds, identity
+from .caching import (
+    cached_page_refs,
+    card_tags,
+    comments_tag,
+    get_versions,
+    group_tag,
+    stats_tag,
+    user_tag,
+)
+from .models import Post
+
+
+def make_etag(request, tags, form=False):
+    """ETag из версий тегов страницы и того, кто её смотрит.
+
+    В шапке каждой страницы имя пользователя, поэтому зритель и его
+    тег входят в ETag всегда. Если на странице форма (form), ETag
+    вошедшего пользователя зависит и от CSRF-токена: вход меняет
+    токен, и закэшированная страница со старым не отдаётся как 304.
+    """
+    tags = set(tags)
+    viewer = request.user.pk if request.user.is_authenticated else 0
+    if viewer:
+        tags.add(user_tag(viewer))
+    versions = get_versions(tags)
+    stamp = ";".join(f"{tag}={versions[tag]}" for tag in sorted(tags))
+    if form and viewer:
+        # get_token каждый раз маскирует токен заново, а CSRF_COOKIE
+        # меняется только при смене токена.
+        get_token(request)
+        stamp += f";csrf={request.META['CSRF_COOKIE']}"
+    return hashlib.md5(f"{viewer};{stamp}".encode()).hexdigest()
+
+
+def feed_etag(request, feed, tags=(), feed_tags=()):
+    """ETag страницы ленты по закэшированному списку её постов.
+
+    feed_tags — теги, от которых зависит сам список (см.
+    caching.page_key). Пока список страницы не в кэше (первый показ
+    после изменения ленты) или лента листается курсором, ETag нет
+    и страница рендерится полностью.
+    """
+    if settings.POSTS_CURSOR_PAGINATION:
+        return None
+    number = request.GET.get("page", "1")
+    if not number.isdigit():
+        return None
+    refs = cached_page_refs(feed, int(number), feed_tags)
+    if refs is None:
+        return None
+    tags = [feed, *feed_tags, *tags]
+    for ref in refs:
+        tags.extend(card_tags(*ref))
+    return make_etag(request, tags)
+
+
+def index_etag(request):
+    return feed_etag(request, feeds.ALL)
+
+
+def group_etag(request, slug):
+    group_id = identity.groups.pk(slug)
+    if group_id is None:
+        return None
+    return feed_etag(
+        request, feeds.group_feed(group_id), [group_tag(group_id)]
+    )
+
+
+def profile_etag(request, username):
+    author_id = identity.users.pk(username)
+    if author_id is None:
+        return None
+    tags = [user_tag(author_id), stats_tag(author_id)]
+    if request.user.is_authenticated:
+        # Кнопка «Подписаться/Отписаться».
+        tags.append(feeds.follow_feed(request.user.pk))
+    return feed_etag(request, feeds.author_feed(author_id), tags)
+
+
+def post_detail_etag(request, post_id):
+    post = (
+        Post.objects.filter(id=post_id)
+        .values_list("author_id", "group_id")
+        .first()
+    )
+    if post is None:
+        return None
+    author_id, group_id = post
+    return make_etag(
+        request,
+        card_tags(post_id, author_id, group_id)
+        + [comments_tag(post_id), feeds.author_feed(author_id)],
+        form=True,
+    )
+
+
+def follow_index_etag(request):
+    return feed_etag(
+        request,
+        feeds.follow_feed(request.user.pk),
+        feed_tags=fanout.following_tags(request.user.pk),
+    )
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from core.replicas import cache_timeout
+
+from . import feeds
+from .models import Post
+
+COUNT_KEY = "posts:count:{}"
+ESTIMATED_KEY = "posts:count:{}:estimated"
+
+
+def get_count(feed, queryset):
+    """Число постов в ленте: из кэша, а на холодном кэше — оценка.
+
+    Точное значение, посчитанное однажды, дальше поддерживается
+    сигналами Post и живёт POSTS_COUNT_TIMEOUT секунд — это
+    ограничивает расхождение от записей в обход ORM. Ленты без
+    счётчика (feeds.is_counted) считаются каждый раз.
+    """
+    if not feeds.is_counted(feed):
+        return queryset.order_by().count()
+    key = COUNT_KEY.format(feed)
+    count = cache.get(key)
+    if count is None:
+        count, exact = estimate_count(feed, queryset)
+        timeout = (
+            settings.POSTS_COUNT_TIMEOUT
+            if exact
+            else settings.POSTS_COUNT_ESTIMATE_TIMEOUT
+        )
+        cache.add(key, count, cache_timeout(timeout))
+    return count
+
+
+def estimate_count(feed, queryset):
+    """Возвращает (число, точное ли оно).
+
+    Общую ленту не считаем на самом холодном кэше: максимальный id
+    берётся из первичного ключа за один шаг индекса и превышает
+    настоящее число на количество удалённых постов. Оценка нужна
+    один раз, пока кэш пуст; когда она истечёт, ленту посчитает
+    COUNT(*), и дальше счётчик точный. Отфильтрованные ленты
+    считаются по индексу внешнего ключа и дёшевы.
+    """
+    if feed == feeds.ALL and cache.add(ESTIMATED_KEY.format(feed), 1, None):
+        last_id = Post.objects.aggregate(last_id=Max("id"))["last_id"]
+        return last_id or 0, False
+    return queryset.order_by().count(), True
+
+
+def change(feed_keys, delta):
+    """Сдвигает закэшированные счётчики лент на delta."""
+    for feed in feed_keys:
+        try:
+            cache.incr(COUNT_KEY.format(feed), delta)
+        except ValueError:
+            # Холодный счётчик посчитается при следующем чтении.
+            pass
+
+
+def forget(feed_keys):
+    """Сбрасывает счётчики лент, чтобы пересчитать их при чтении."""
+    cache.delete_many([COUNT_KEY.format(feed) for feed in feed_keys])
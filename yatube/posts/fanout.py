@@ -0,0 +1,255 @@
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from core.replicas import cache_timeout
+
+from . import caching, feeds
+from .models import Follow, Inbox, Post, UserStats
+from .thumbnails import executor
+
+BACKFILL_BATCH = 1000
+FEED_ORDERING = ("-feed_pub_date", "-feed_post_id")
+FOLLOWING_KEY = "posts:following:{}:{}"
+
+logger = logging.getLogger("yatube.fanout")
+
+
+def is_celebrity(author_id):
+    """Автор с множеством подписчиков читается из его постов напрямую."""
+    return UserStats.objects.for_user(author_id).celebrity
+
+
+def promote(author_id):
+    """Отмечает автора, дошедшего до порога; возвращает is_celebrity().
+
+    Отметка ставится по уже прочитанным счётчикам, так что обычная
+    подписка стоит одного SELECT, как и is_celebrity().
+    """
+    stats = UserStats.objects.for_user(author_id)
+    if (
+        not stats.celebrity
+        and stats.followers_count >= settings.POSTS_FANOUT_THRESHOLD
+    ):
+        UserStats.objects.filter(user_id=author_id).update(celebrity=True)
+        stats.celebrity = True
+    return stats.celebrity
+
+
+def demote(author_id):
+    """Снимает отметку с автора ниже нижней границы; True, если сняли.
+
+    Граница ниже порога (гистерезис), поэтому один пользователь,
+    подписываясь и отписываясь, не запускает refill_author раз за разом.
+    """
+    return bool(
+        UserStats.objects.filter(
+            user_id=author_id,
+            celebrity=True,
+            followers_count__lt=settings.POSTS_FANOUT_LEAVE_THRESHOLD,
+        ).update(celebrity=False)
+    )
+
+
+def _insert(entries):
+    """Вставляет записи лент пачками, не держа в памяти все сразу."""
+    entries = iter(entries)
+    for batch in iter(lambda: list(islice(entries, BACKFILL_BATCH)), []):
+        Inbox.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list(
+        "user_id", flat=True
+    )
+    _insert(
+        Inbox(
+            user_id=user_id,
+            post_id=post.id,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика все посты автора.
+
+    Один INSERT ... SELECT: посты не читаются в Python и не
+    вставляются пачками, сколько бы их ни было.
+    """
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"{ops.insert_statement(ignore_conflicts=True)} "
+            f"{Inbox._meta.db_table} (user_id, post_id, author_id, pub_date) "
+            f"SELECT %s, id, author_id, pub_date "
+            f"FROM {Post._meta.db_table} WHERE author_id = %s "
+            f"{ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)}",
+            (user_id, author_id),
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты подписчика посты автора."""
+    Inbox.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def refill_author(author_id):
+    """Раскладывает автора всем подписчикам заново.
+
+    Нужен, когда автор опускается ниже порога: его посты, вышедшие,
+    пока он читался напрямую, в ленты не попали.
+    """
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        "user_id", flat=True
+    )
+    for user_id in followers.iterator():
+        backfill(user_id, author_id)
+    caching.bump([feeds.author_feed(author_id)])
+
+
+def following_tags(user_id):
+    """Теги лент авторов, на которых подписан пользователь.
+
+    Пост автора сдвигает версию только его ленты, а не лент подписок
+    всех его подписчиков; ключ страницы и ETag ленты подписок читают
+    версии этих тегов. Список авторов хранится, пока не сменится
+    версия feeds.follow_feed, то есть до подписки или отписки.
+    """
+    feed = feeds.follow_feed(user_id)
+    key = FOLLOWING_KEY.format(user_id, caching.get_versions([feed])[feed])
+    authors = cache.get(key)
+    if authors is None:
+        authors = list(
+            Follow.objects.filter(user_id=user_id).values_list(
+                "author_id", flat=True
+            )
+        )
+        cache.set(
+            key, authors, cache_timeout(settings.POSTS_CACHE_TIMEOUT)
+        )
+    return [feeds.author_feed(author_id) for author_id in authors]
+
+
+def _refill_in_worker(author_id):
+    try:
+        refill_author(author_id)
+    except Exception:
+        logger.exception("Не удалось разложить посты автора %s", author_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_refill(author_id):
+    """Ставит refill_author в фоновый пул после фиксации транзакции.
+
+    Автор может быть у тысячи подписчиков: запрос отписки не ждёт,
+    пока его посты разложатся по их лентам.
+    """
+    transaction.on_commit(
+        lambda: executor().submit(_refill_in_worker, author_id)
+    )
+
+
+class MergedFeed:
+    """Несколько непересекающихся лент постов как одна.
+
+    Запрос — UNION ALL веток с общей сортировкой: SQLite сливает
+    ветки, каждую из которых читает по её индексу, без временной
+    сортировки всей ленты. filter(), select_related() и values()
+    применяются к каждой ветке: после union() Django их не делает.
+    """
+
+    model = Post
+
+    def __init__(self, branches, ordering=()):
+        self.branches = [branch.order_by() for branch in branches]
+        self.ordering = tuple(ordering)
+
+    def _each(self, method, *args, **kwargs):
+        return MergedFeed(
+            [
+                getattr(branch, method)(*args, **kwargs)
+                for branch in self.branches
+            ],
+            self.ordering,
+        )
+
+    def filter(self, *args, **kwargs):
+        return self._each("filter", *args, **kwargs)
+
+    def select_related(self, *fields):
+        return self._each("select_related", *fields)
+
+    def values(self, *fields):
+        return self._each("values", *fields)
+
+    def order_by(self, *fields):
+        return MergedFeed(self.branches, fields)
+
+    @property
+    def ordered(self):
+        return bool(self.ordering)
+
+    @property
+    def query(self):
+        return self.merged().query
+
+    def merged(self):
+        """Ветки одним запросом UNION ALL."""
+        first, *rest = self.branches
+        return first.union(*rest, all=True).order_by(*self.ordering)
+
+    def count(self):
+        return self.merged().count()
+
+    def in_bulk(self, id_list):
+        return self.model._default_manager.in_bulk(id_list)
+
+    def __getitem__(self, index):
+        return self.merged()[index]
+
+    def __iter__(self):
+        return iter(self.merged())
+
+
+def follow_feed(user):
+    """Посты ленты подписок пользователя.
+
+    Обычно это только его материализованная лента. Авторы выше
+    порога подписчиков не раскладываются при записи, их посты
+    добавляются при чтении (fan-out-on-read) отдельными ветками
+    MergedFeed: по ветке на автора, чтобы каждая шла по индексу
+    автора в порядке ленты.
+    """
+    celebrities = list(
+        Follow.objects.filter(
+            user=user, author__stats__celebrity=True
+        ).values_list("author_id", flat=True)
+    )
+    # Сортируем по столбцам самой ленты, чтобы порядок брался
+    # из её индекса; по этим же полям идёт и курсор.
+    inbox = Post.objects.filter(inbox_entries__user=user).annotate(
+        feed_pub_date=F("inbox_entries__pub_date"),
+        feed_post_id=F("inbox_entries__post"),
+    )
+    if not celebrities:
+        return inbox.order_by(*FEED_ORDERING)
+    # В ленте могли остаться записи авторов, разложенных до отметки.
+    branches = [inbox.exclude(author_id__in=celebrities)]
+    branches.extend(
+        Post.objects.filter(author_id=author_id).annotate(
+            feed_pub_date=F("pub_date"), feed_post_id=F("id")
+        )
+        for author_id in celebrities
+    )
+    return MergedFeed(branches, FEED_ORDERING)
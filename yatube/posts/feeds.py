@@ -0,0 +1,34 @@
+ALL = "all"
+
+
+def group_feed(group_id):
+    """Лента группы."""
+    return f"group:{group_id}"
+
+
+def author_feed(author_id):
+    """Лента автора (профиль)."""
+    return f"author:{author_id}"
+
+
+def follow_feed(user_id):
+    """Лента подписок пользователя."""
+    return f"follow:{user_id}"
+
+
+def is_counted(feed):
+    """Держится ли число постов ленты в кэше счётчиков.
+
+    Ленты подписок не считаются: иначе каждый пост автора сдвигал бы
+    счётчики всех его подписчиков. Их длину даёт COUNT по
+    материализованной ленте (posts.fanout).
+    """
+    return not feed.startswith(follow_feed(""))
+
+
+def post_feeds(post):
+    """Ленты, в которые попадает пост (без лент подписчиков)."""
+    feeds = [ALL, author_feed(post.author_id)]
+    if post.group_id:
+        feeds.append(group_feed(post.group_id))
+    return feeds
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth import get_user_model
 
-from .models import Comment, Post
+from .models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -38,3 +38,26 @@ class CommentForm(forms.ModelForm):
         if data == "":
             raise forms.ValidationError("Поле надо заполнить")
         return data
+
+
+class SearchForm(forms.Form):
+    """Форма поиска постов."""
+
+    q = forms.CharField(label="Что ищем", max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        label="Группа",
+        required=False,
+        to_field_name="slug",
+    )
+    author = forms.CharField(label="Автор", max_length=150, required=False)
+
+    def clean_author(self):
+        """Автор по имени пользователя."""
+        username = self.cleaned_data["author"]
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise forms.ValidationError("Такого автора нет")
+        return author
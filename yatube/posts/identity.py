@@ -0,0 +1,139 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from core.replicas import cache_timeout
+
+from .models import Group
+
+User = get_user_model()
+
+ID_KEY = "posts:identity:{}:{}"
+NAME_KEY = "posts:identity:{}:name:{}"
+# Отметка «такого адреса нет»: id объектов начинаются с единицы.
+MISSING = 0
+
+
+class IdentityMap:
+    """Кэш редко меняющихся объектов по id и по адресу (slug, username).
+
+    Хранятся только поля из fields; остальные поля экземпляра
+    отложены и при обращении читаются из базы. Несуществующие адреса
+    тоже кэшируются, на POSTS_IDENTITY_MISSING_TIMEOUT секунд. Записи
+    сбрасывают сигналы сохранения и удаления (posts.signals).
+    """
+
+    def __init__(self, model, lookup, fields):
+        self.model = model
+        self.lookup = lookup
+        self.fields = fields
+        self.name = model._meta.model_name
+
+    def id_key(self, pk):
+        return ID_KEY.format(self.name, pk)
+
+    def name_key(self, value):
+        # Адрес приходит из URL: любые символы и длина.
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return NAME_KEY.format(self.name, digest)
+
+    def build(self, values):
+        return self.model.from_db(DEFAULT_DB_ALIAS, self.fields, values)
+
+    def remember(self, rows):
+        data = {}
+        for values in rows:
+            pk = values[0]
+            data[self.id_key(pk)] = values
+            data[self.name_key(values[self.fields.index(self.lookup)])] = pk
+        cache.set_many(data, cache_timeout(settings.POSTS_IDENTITY_TIMEOUT))
+
+    def get(self, value):
+        """Объект по адресу или None, если такого нет."""
+        pk = cache.get(self.name_key(value))
+        if pk == MISSING:
+            return None
+        if pk is not None:
+            values = cache.get(self.id_key(pk))
+            # После смены адреса старый ключ ведёт к объекту с новым.
+            if values and values[self.fields.index(self.lookup)] == value:
+                return self.build(values)
+        values = (
+            self.model._default_manager.filter(**{self.lookup: value})
+            .values_list(*self.fields)
+            .first()
+        )
+        if values is None:
+            cache.set(
+                self.name_key(value),
+                MISSING,
+                cache_timeout(settings.POSTS_IDENTITY_MISSING_TIMEOUT),
+            )
+            return None
+        self.remember([values])
+        return self.build(values)
+
+    def get_or_404(self, value):
+        found = self.get(value)
+        if found is None:
+            raise Http404(
+                f"No {self.model._meta.object_name} matches the given query."
+            )
+        return found
+
+    def pk(self, value):
+        """id объекта по адресу или None."""
+        found = self.get(value)
+        return None if found is None else found.pk
+
+    def in_bulk(self, ids):
+        """{id: объект} для ids: из кэша, недостающие — одним запросом."""
+        ids = set(ids)
+        keys = {pk: self.id_key(pk) for pk in ids}
+        stored = cache.get_many(keys.values())
+        found = {
+            pk: self.build(stored[key])
+            for pk, key in keys.items()
+            if key in stored
+        }
+        missing = ids - set(found)
+        if missing:
+            rows = list(
+                self.model._default_manager.filter(pk__in=missing)
+                .values_list(*self.fields)
+            )
+            self.remember(rows)
+            found.update((values[0], self.build(values)) for values in rows)
+        return found
+
+    def forget(self, instance):
+        cache.delete_many(
+            [
+                self.id_key(instance.pk),
+                self.name_key(getattr(instance, self.lookup)),
+            ]
+        )
+
+
+groups = IdentityMap(
+    Group, "slug", ("id", "title", "slug", "description")
+)
+users = IdentityMap(
+    User, "username", ("id", "username", "first_name", "last_name")
+)
+
+
+def attach(posts):
+    """Подставляет авторов и группы постов из кэша, без JOIN."""
+    posts = list(posts)
+    authors = users.in_bulk(post.author_id for post in posts)
+    found = groups.in_bulk(post.group_id for post in posts if post.group_id)
+    for post in posts:
+        post.author = authors[post.author_id]
+        if post.group_id:
+            post.group = found[post.group_id]
+    return posts
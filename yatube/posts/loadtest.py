@@ -0,0 +1,230 @@
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import percentile
+
+from .models import Group, Post
+from .urls import app_name, urlpatterns
+
+User = get_user_model()
+
+ROUTES = tuple(pattern.name for pattern in urlpatterns)
+# Маршруты, которые пишут в базу: включаются только явно.
+WRITE_ROUTES = (
+    "post_create",
+    "post_edit",
+    "add_comment",
+    "profile_follow",
+    "profile_unfollow",
+)
+PERCENTILES = (50, 95, 99)
+
+
+def _url(name, *args):
+    return reverse(f"{app_name}:{name}", args=args)
+
+
+class Sample:
+    """Случайная выборка данных для адресов маршрутов.
+
+    Виртуальные клиенты входят под авторами выбранных постов, чтобы
+    у каждого был свой пост для post_edit.
+    """
+
+    def __init__(self, rng, size=1000):
+        # Случайные id вместо ORDER BY RANDOM(): не сортируем всю таблицу.
+        last_id = (
+            Post.objects.order_by("-id").values_list("id", flat=True).first()
+            or 0
+        )
+        ids = [rng.randint(1, last_id) for _ in range(size if last_id else 0)]
+        self.posts = list(
+            Post.objects.filter(id__in=ids).values_list("id", "author_id")
+        )
+        if not self.posts:
+            raise ValueError("Нет постов: сначала generate_dataset.")
+        self.own = defaultdict(list)
+        for post_id, author_id in self.posts:
+            self.own[author_id].append(post_id)
+        self.users = User.objects.in_bulk(list(self.own))
+        self.groups = list(
+            Group.objects.values_list("slug", flat=True)[:size]
+        ) or [None]
+        self.words = ["день", "город", "утро", "новости", "погода"]
+
+    def request(self, name, user_id, rng):
+        """(метод, путь, данные) запроса к маршруту name."""
+        post_id, author_id = rng.choice(self.posts)
+        author = self.users[author_id].username
+        return getattr(self, f"_{name}")(
+            rng, post_id, author, rng.choice(self.own[user_id])
+        )
+
+    def _index(self, rng, post_id, author, own):
+        return "get", _url("index"), None
+
+    def _group_list(self, rng, post_id, author, own):
+        slug = rng.choice(self.groups)
+        if slug is None:
+            return self._index(rng, post_id, author, own)
+        return "get", _url("group_list", slug), None
+
+    def _profile(self, rng, post_id, author, own):
+        return "get", _url("profile", author), None
+
+    def _post_detail(self, rng, post_id, author, own):
+        return "get", _url("post_detail", post_id), None
+
+    def _post_comments(self, rng, post_id, author, own):
+        return "get", _url("post_comments", post_id), None
+
+    def _search(self, rng, post_id, author, own):
+        return "get", _url("search"), {"q": rng.choice(self.words)}
+
+    def _follow_index(self, rng, post_id, author, own):
+        return "get", _url("follow_index"), None
+
+    def _post_create(self, rng, post_id, author, own):
+        return "post", _url("post_create"), {"text": "Нагрузочный пост"}
+
+    def _post_edit(self, rng, post_id, author, own):
+        return "post", _url("post_edit", own), {"text": "Правка поста"}
+
+    def _add_comment(self, rng, post_id, author, own):
+        return "post", _url("add_comment", post_id), {"text": "Комментарий"}
+
+    def _profile_follow(self, rng, post_id, author, own):
+        return "get", _url("profile_follow", author), None
+
+    def _profile_unfollow(self, rng, post_id, author, own):
+        return "get", _url("profile_unfollow", author), None
+
+
+class InProcessClient:
+    """Запросы к WSGI-приложению в этом же процессе."""
+
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, path, data):
+        return getattr(self.client, method)(path, data).status_code
+
+
+class HttpClient:
+    """Запросы по HTTP к запущенному серверу (runserver, gunicorn)."""
+
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        login = self.base_url + reverse("users:login")
+        self.session.get(login)
+        self.session.post(
+            login,
+            {
+                "username": username,
+                "password": password,
+                "csrfmiddlewaretoken": self.session.cookies.get("csrftoken"),
+            },
+            headers={"Referer": login},
+        )
+
+    def request(self, method, path, data):
+        url = self.base_url + path
+        if method == "get":
+            response = self.session.get(
+                url, params=data, allow_redirects=False
+            )
+        else:
+            data = dict(
+                data, csrfmiddlewaretoken=self.session.cookies.get("csrftoken")
+            )
+            response = self.session.post(
+                url, data, headers={"Referer": url}, allow_redirects=False
+            )
+        return response.status_code
+
+
+class Report:
+    """Итоги прогона: задержки и ошибки по маршрутам."""
+
+    def __init__(self, timings, errors, elapsed):
+        self.timings = timings
+        self.errors = errors
+        self.elapsed = elapsed
+
+    def rows(self):
+        """(маршрут, запросов, ошибок, запр/с, p50, p95, p99), мс."""
+        everything = [
+            timing for timings in self.timings.values() for timing in timings
+        ]
+        routes = [
+            (name, timings, self.errors.get(name, 0))
+            for name, timings in sorted(self.timings.items())
+        ]
+        routes.append(("всего", everything, sum(self.errors.values())))
+        return [
+            (
+                name,
+                len(timings),
+                errors,
+                len(timings) / self.elapsed,
+                *(percentile(timings, share) for share in PERCENTILES),
+            )
+            for name, timings, errors in routes
+        ]
+
+
+def run(make_client, sample, routes, clients, requests_per_client, seed=0):
+    """Гоняет clients потоков по requests_per_client запросов.
+
+    Маршрут каждого запроса выбирается случайно из routes; ответ 4xx,
+    5xx или исключение считаются ошибкой.
+    """
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(number, user_id, client):
+        rng = random.Random(seed + number)
+        try:
+            for _ in range(requests_per_client):
+                name = rng.choice(routes)
+                method, path, data = sample.request(name, user_id, rng)
+                started = time.perf_counter()
+                try:
+                    status = client.request(method, path, data)
+                except Exception:
+                    status = None
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings[name].append(elapsed)
+                    if status is None or status >= 400:
+                        errors[name] += 1
+        finally:
+            close_old_connections()
+
+    # Вход до старта потоков: он пишет сессии и не должен попадать
+    # в замеры.
+    users = random.Random(seed).choices(sorted(sample.own), k=clients)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(number, user_id, make_client(sample.users[user_id])),
+        )
+        for number, user_id in enumerate(users)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Report(timings, errors, time.perf_counter() - started)
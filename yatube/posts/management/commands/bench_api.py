@@ -0,0 +1,102 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core.benchmark import benchmark_database, cpu_time
+
+from ...models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Сравнивает HTML-страницы и JSON API на одних и тех же данных."""
+
+    help = (
+        "Байты ответа и процессорное время на страницу: index, "
+        "group_list, profile, post_detail и follow_index против "
+        "/api/v1/. --cold очищает кэш перед каждым запросом."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=20_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--cold", action="store_true")
+
+    def pages(self):
+        """(маршрут, адрес HTML, адрес API) для одних и тех же данных."""
+        group = Group.objects.annotate(total=Count("posts")).latest("total")
+        author = User.objects.annotate(total=Count("posts")).latest("total")
+        post = Post.objects.latest("pub_date")
+        return [
+            ("index", reverse("posts:index"), reverse("api:index")),
+            (
+                "group_list",
+                reverse("posts:group_list", args=(group.slug,)),
+                reverse("api:group_list", args=(group.slug,)),
+            ),
+            (
+                "profile",
+                reverse("posts:profile", args=(author.username,)),
+                reverse("api:profile", args=(author.username,)),
+            ),
+            (
+                "post_detail",
+                reverse("posts:post_detail", args=(post.id,)),
+                reverse("api:post_detail", args=(post.id,)),
+            ),
+            (
+                "follow_index",
+                reverse("posts:follow_index"),
+                reverse("api:follow_index"),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            call_command(
+                "generate_dataset",
+                users=500,
+                posts=options["posts"],
+                comments=options["posts"],
+                follows=5000,
+                stdout=StringIO(),
+            )
+            client = Client()
+            reader = (
+                Follow.objects.values("user")
+                .annotate(total=Count("id"))
+                .latest("total")
+            )
+            client.force_login(User.objects.get(pk=reader["user"]))
+
+            def fetch(url):
+                if options["cold"]:
+                    cache.clear()
+                return client.get(url)
+
+            rows = []
+            for name, html_url, api_url in self.pages():
+                row = [name]
+                for url in (html_url, api_url):
+                    response = fetch(url)
+                    row.append(len(response.content))
+                    row.append(
+                        cpu_time(lambda: fetch(url), options["repeat"])
+                    )
+                rows.append(row)
+        self.stdout.write(
+            f"{'маршрут':<14}{'HTML, Б':>10}{'мс ЦП':>8}"
+            f"{'API, Б':>10}{'мс ЦП':>8}"
+        )
+        for name, html_bytes, html_cpu, api_bytes, api_cpu in rows:
+            self.stdout.write(
+                f"{name:<14}{html_bytes:>10}{html_cpu:>8.2f}"
+                f"{api_bytes:>10}{api_cpu:>8.2f}"
+            )
@@ -0,0 +1,65 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageFilter
+
+from ... import thumbnails
+
+# Типичные загрузки: снимок телефона, уменьшенное фото, скриншот.
+SIZES = ((4032, 3024), (1600, 1200), (1280, 720))
+
+
+def sample(size):
+    """JPEG, похожий на фотографию: шум с размытием и градиентом."""
+    noise = Image.effect_noise(size, 64).filter(ImageFilter.GaussianBlur(3))
+    gradient = Image.linear_gradient("L").resize(size)
+    image = Image.merge("RGB", (noise, gradient, noise.transpose(1)))
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    """Замер вариантов картинки: размер в байтах и время кодирования."""
+
+    help = (
+        "Сравнивает прежнюю миниатюру 960px JPEG с вариантами по ширине "
+        "и формату для типичных размеров загрузок."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Форматы: {', '.join(thumbnails.FORMATS)}")
+        for size in SIZES:
+            upload = sample(size)
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                _, variants = thumbnails.render_variants(BytesIO(upload))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"\n{size[0]}x{size[1]}: загрузка {len(upload) // 1024} КБ, "
+                f"все варианты за {min(timings):.0f} мс"
+            )
+            header = "".join(f"{name:>10}" for name in thumbnails.FORMATS)
+            self.stdout.write(f"{'ширина':>8}{header}")
+            widths = sorted({width for width, _ in variants})
+            for width in widths:
+                row = "".join(
+                    f"{len(variants[width, name]) // 1024:>7} КБ"
+                    for name in thumbnails.FORMATS
+                )
+                self.stdout.write(f"{width:>8}{row}")
+            baseline = variants[thumbnails.SIZE[0], thumbnails.FALLBACK]
+            mobile = min(
+                len(variants[widths[0], name])
+                for name in thumbnails.FORMATS
+            )
+            self.stdout.write(
+                f"Телефон: {mobile // 1024} КБ вместо "
+                f"{len(baseline) // 1024} КБ прежней миниатюры "
+                f"({mobile / len(baseline) * 100:.0f}%)"
+            )
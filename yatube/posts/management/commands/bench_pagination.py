@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from core.benchmark import benchmark_database, measure
+
+from ...models import Post
+from ...paginators import CursorPaginator
+from ...views import POST_LIMIT
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Сравнивает первую и глубокую страницу ленты в двух режимах."""
+
+    help = (
+        "Замер задержки первой и глубокой страницы ленты "
+        "для номерной и курсорной пагинации."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, default=5000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        deep = options["page"]
+        with benchmark_database():
+            author = User.objects.create_user(username="bench")
+            Post.objects.bulk_create(
+                (
+                    Post(text=f"Пост {number}", author=author)
+                    for number in range(deep * POST_LIMIT)
+                )
+            )
+            posts = Post.objects.select_related("author")
+            # Курсор глубокой страницы берём заранее: в жизни он приходит
+            # из ссылки «Следующая» и ничего не стоит.
+            cursor_paginator = CursorPaginator(posts, POST_LIMIT)
+            anchor = posts.order_by(*cursor_paginator.ordering)[
+                (deep - 1) * POST_LIMIT - 1
+            ]
+            cursor = cursor_paginator.encode_cursor(anchor)
+
+            def numbered(number):
+                page = Paginator(posts, POST_LIMIT).get_page(number)
+                return list(page)
+
+            def keyset(after):
+                paginator = CursorPaginator(posts, POST_LIMIT)
+                return list(paginator.get_page(after=after))
+
+            repeat = options["repeat"]
+            rows = (
+                ("page", 1, measure(lambda: numbered(1), repeat)),
+                ("page", deep, measure(lambda: numbered(deep), repeat)),
+                ("cursor", 1, measure(lambda: keyset(None), repeat)),
+                ("cursor", deep, measure(lambda: keyset(cursor), repeat)),
+            )
+        self.stdout.write(f"{'режим':<8}{'страница':>10}{'мс':>10}")
+        for mode, number, elapsed in rows:
+            self.stdout.write(f"{mode:<8}{number:>10}{elapsed:>10.2f}")
@@ -0,0 +1,72 @@
+import random
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.benchmark import benchmark_database, measure
+
+from ... import search
+from ...models import Post
+from ...views import POST_LIMIT
+
+User = get_user_model()
+
+WORDS = (
+    "сегодня вчера город море река лес дорога поезд кошка собака утро "
+    "вечер дождь снег солнце книга музыка кофе работа отпуск друзья "
+    "праздник погода новости фото прогулка парк мост окно дом"
+).split()
+# Редкое слово попадает в малую долю постов, частое — почти в каждый.
+RARE, COMMON = "черника", "сегодня"
+
+
+class Command(BaseCommand):
+    """Сравнивает поиск по индексу FTS5 с icontains по тексту постов."""
+
+    help = (
+        "Замер первой страницы поиска по редкому и частому слову: "
+        "icontains по posts_post.text против индекса FTS5."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def posts(self, count, author):
+        generator = random.Random(0)
+        for number in range(count):
+            words = generator.choices(WORDS, k=12)
+            if number % 1000 == 0:
+                words.append(RARE)
+            yield Post(text=" ".join(words), author=author)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            author = User.objects.create_user(username="bench")
+            posts = self.posts(options["posts"], author)
+            size = options["batch_size"]
+            for batch in iter(lambda: list(islice(posts, size)), []):
+                Post.objects.bulk_create(batch)
+            # bulk_create не вызывает сигналов: индекс строим целиком.
+            search.rebuild()
+
+            def icontains(word):
+                return list(
+                    Post.objects.filter(text__icontains=word)[:POST_LIMIT]
+                )
+
+            def fts(word):
+                return list(search.SearchPaginator(word, POST_LIMIT).page())
+
+            repeat = options["repeat"]
+            rows = [
+                (mode, word, measure(lambda: func(word), repeat))
+                for word in (RARE, COMMON)
+                for mode, func in (("icontains", icontains), ("fts5", fts))
+            ]
+        self.stdout.write(f"Постов: {options['posts']}")
+        self.stdout.write(f"{'режим':<10}{'слово':>10}{'мс':>10}")
+        for mode, word, elapsed in rows:
+            self.stdout.write(f"{mode:<10}{word:>10}{elapsed:>10.2f}")
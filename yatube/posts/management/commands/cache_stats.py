@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from ... import caching
+
+
+class Command(BaseCommand):
+    """Показывает долю попаданий в кэш фрагментов лент."""
+
+    help = (
+        "Попадания и промахи кэша списков постов и карточек и сколько "
+        "пересчётов обошлось без давки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Обнулить счётчики после вывода.",
+        )
+
+    def handle(self, *args, **options):
+        for kind, (hits, misses) in caching.stats().items():
+            total = hits + misses
+            ratio = hits / total * 100 if total else 0
+            self.stdout.write(
+                f"{kind}: попаданий {hits}, промахов {misses}, "
+                f"доля попаданий {ratio:.1f}%"
+            )
+        fill = caching.fill_stats()
+        self.stdout.write(
+            f"пересчёт: заранее {fill['early']}, отдано старое "
+            f"{fill['stale']}, дождались {fill['waited']}"
+        )
+        if options["reset"]:
+            caching.reset_stats()
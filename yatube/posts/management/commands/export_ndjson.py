@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from ... import ndjson
+
+
+class Command(BaseCommand):
+    """Выгружает группы, посты, комментарии и подписки в NDJSON."""
+
+    help = (
+        "Пишет по одной записи JSON на строку: группы, посты, "
+        "комментарии, подписки. Авторы — по username, группы — по slug."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-", help="Файл, по умолчанию stdout."
+        )
+        parser.add_argument(
+            "--models", nargs="+", choices=ndjson.MODELS, default=ndjson.MODELS
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        output = (
+            sys.stdout
+            if options["output"] == "-"
+            else open(options["output"], "w", encoding="utf-8")
+        )
+        written = 0
+        try:
+            for line in ndjson.export_lines(
+                options["models"], options["chunk_size"]
+            ):
+                output.write(line)
+                written += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f"Записей выгружено: {written} за {elapsed:.1f} с "
+            f"({written / max(elapsed, 1e-9):.0f} в секунду)"
+        )
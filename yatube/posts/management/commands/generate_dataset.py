@@ -0,0 +1,189 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from ...models import Comment, Follow, Group, Post
+from ...ndjson import bulk_create
+from .import_ndjson import REBUILD_COMMANDS
+
+User = get_user_model()
+
+
+def zipf(items, alpha, rng):
+    """Накопленные веса закона Ципфа по случайно переставленным items.
+
+    Первые элементы перестановки получают основную долю выборок:
+    так распределены авторы постов, популярность и обсуждения.
+    """
+    items = list(items)
+    rng.shuffle(items)
+    weights = accumulate(
+        1 / rank ** alpha for rank in range(1, len(items) + 1)
+    )
+    return items, list(weights)
+
+
+def batches(objects, size):
+    """Разбивает поток объектов на списки по size."""
+    objects = iter(objects)
+    return iter(lambda: list(islice(objects, size)), [])
+
+
+class Command(BaseCommand):
+    """Генерирует большой правдоподобный набор данных."""
+
+    help = (
+        "Пользователи, группы, посты с авторами по закону Ципфа, "
+        "комментарии к популярным постам и перекошенный граф подписок. "
+        "Пароль у всех пользователей общий (--password)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=100_000)
+        parser.add_argument("--comments", type=int, default=200_000)
+        parser.add_argument("--follows", type=int, default=20_000)
+        parser.add_argument("--alpha", type=float, default=1.1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--password", default="yatube")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.fake = Faker("ru_RU")
+        self.fake.seed_instance(options["seed"])
+        self.now = timezone.now()
+        started = time.perf_counter()
+        users = self.users()
+        groups = self.groups()
+        posts = self.posts(users, groups)
+        self.comments(users, posts)
+        self.follows(users)
+        self.stdout.write(
+            f"Данные созданы за {time.perf_counter() - started:.1f} с"
+        )
+        # bulk_create обходит сигналы: производные данные собираем заново.
+        for command in REBUILD_COMMANDS:
+            call_command(command, stdout=self.stdout)
+        cache.clear()
+
+    def insert(self, model, objects):
+        """Пишет объекты пачками и возвращает id новых строк."""
+        last_id = model.objects.aggregate(last=Max("id"))["last"] or 0
+        created = 0
+        for batch in batches(objects, self.options["batch_size"]):
+            with transaction.atomic():
+                bulk_create(model, batch)
+            created += len(batch)
+        self.stdout.write(f"{model._meta.verbose_name_plural}: {created}")
+        return list(
+            model.objects.filter(id__gt=last_id).values_list("id", flat=True)
+        )
+
+    def moment(self, days=365):
+        """Случайный момент за последние days дней."""
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def users(self):
+        password = make_password(self.options["password"])
+        fake = self.fake
+        return self.insert(
+            User,
+            (
+                User(
+                    username=f"{fake.user_name()}_{number}",
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    password=password,
+                    date_joined=self.moment(),
+                )
+                for number in range(self.options["users"])
+            ),
+        )
+
+    def groups(self):
+        seed = self.options["seed"]
+        return self.insert(
+            Group,
+            (
+                Group(
+                    title=self.fake.sentence(nb_words=3)[:200],
+                    slug=f"group-{seed}-{number}",
+                    description=self.fake.paragraph(),
+                )
+                for number in range(self.options["groups"])
+            ),
+        )
+
+    def posts(self, users, groups):
+        authors, author_weights = zipf(users, self.options["alpha"], self.rng)
+        groups, group_weights = zipf(groups, self.options["alpha"], self.rng)
+        rng, fake = self.rng, self.fake
+
+        def build():
+            author = rng.choices(authors, cum_weights=author_weights)[0]
+            group = None
+            # Примерно треть постов публикуется вне групп.
+            if groups and rng.random() < 0.7:
+                group = rng.choices(groups, cum_weights=group_weights)[0]
+            return Post(
+                text=fake.paragraph(nb_sentences=rng.randint(1, 8)),
+                author_id=author,
+                group_id=group,
+                pub_date=self.moment(),
+            )
+
+        return self.insert(
+            Post, (build() for _ in range(self.options["posts"]))
+        )
+
+    def comments(self, users, posts):
+        if not posts:
+            return []
+        posts, weights = zipf(posts, self.options["alpha"], self.rng)
+        rng, fake = self.rng, self.fake
+        return self.insert(
+            Comment,
+            (
+                Comment(
+                    post_id=rng.choices(posts, cum_weights=weights)[0],
+                    author_id=rng.choice(users),
+                    text=fake.sentence(),
+                    created=self.moment(30),
+                )
+                for _ in range(self.options["comments"])
+            ),
+        )
+
+    def follows(self, users):
+        """Подписчик случайный, автор — по популярности, без повторов."""
+        authors, weights = zipf(users, self.options["alpha"], self.rng)
+        wanted = min(self.options["follows"], len(users) * (len(users) - 1))
+        existing = set(Follow.objects.values_list("user_id", "author_id"))
+        pairs = set()
+        attempts = 0
+        while len(pairs) < wanted and attempts < wanted * 20:
+            attempts += 1
+            pair = (
+                self.rng.choice(users),
+                self.rng.choices(authors, cum_weights=weights)[0],
+            )
+            if pair[0] != pair[1] and pair not in existing:
+                pairs.add(pair)
+        return self.insert(
+            Follow,
+            (Follow(user_id=user, author_id=author) for user, author in pairs),
+        )
@@ -0,0 +1,71 @@
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from ... import caching, counts, feeds, ndjson
+
+REBUILD_COMMANDS = ("rebuild_counters", "rebuild_inbox", "rebuild_search")
+
+
+class Command(BaseCommand):
+    """Загружает группы, посты, комментарии и подписки из NDJSON."""
+
+    help = (
+        "Читает файл export_ndjson построчно и пишет пачками bulk_create, "
+        "затем пересобирает счётчики, ленты подписок и поиск."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл NDJSON или - для stdin.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Строк в одной транзакции.",
+        )
+        parser.add_argument(
+            "--no-rebuild",
+            action="store_true",
+            help="Не пересобирать производные данные после загрузки.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        importer = ndjson.Importer(options["batch_size"])
+        if options["path"] == "-":
+            loaded = importer.load(sys.stdin)
+        else:
+            with open(options["path"], encoding="utf-8") as lines:
+                loaded = importer.load(lines)
+        elapsed = time.perf_counter() - started
+        total = sum(loaded.values())
+        self.stdout.write(
+            ", ".join(f"{model}: {count}" for model, count in loaded.items())
+            + f"; новых пользователей: {importer.created_users}, "
+            f"групп: {importer.created_groups}"
+        )
+        self.stdout.write(
+            f"Записей загружено: {total} за {elapsed:.1f} с "
+            f"({total / max(elapsed, 1e-9):.0f} в секунду)"
+        )
+        if options["no_rebuild"]:
+            return
+        # bulk_create обходит сигналы: производные данные собираем заново.
+        for command in REBUILD_COMMANDS:
+            call_command(command, stdout=self.stdout)
+        affected = (
+            [feeds.ALL]
+            + [feeds.author_feed(author) for author in importer.authors]
+            + [
+                feeds.group_feed(group)
+                for group in importer.group_ids
+                if group is not None
+            ]
+        )
+        counts.forget(affected)
+        caching.bump(
+            affected
+            + [caching.comments_tag(post) for post in importer.commented]
+        )
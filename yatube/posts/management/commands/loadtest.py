@@ -0,0 +1,76 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...loadtest import (
+    PERCENTILES,
+    ROUTES,
+    WRITE_ROUTES,
+    HttpClient,
+    InProcessClient,
+    Sample,
+    run,
+)
+
+
+class Command(BaseCommand):
+    """Нагрузочный прогон по именованным маршрутам posts."""
+
+    help = (
+        "Несколько клиентов параллельно ходят по случайным маршрутам и "
+        "адресам из базы. Без --url запросы идут в WSGI-приложение в этом "
+        "процессе, с --url — по HTTP к запущенному серверу. Отчёт: "
+        "запросы в секунду и p50/p95/p99 по каждому маршруту."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="например http://127.0.0.1:8000")
+        parser.add_argument("--password", default="yatube")
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--routes", nargs="+", choices=ROUTES)
+        parser.add_argument(
+            "--writes",
+            action="store_true",
+            help="добавить маршруты, которые пишут в базу",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        routes = options["routes"] or [
+            name
+            for name in ROUTES
+            if options["writes"] or name not in WRITE_ROUTES
+        ]
+        try:
+            sample = Sample(random.Random(options["seed"]))
+        except ValueError as error:
+            raise CommandError(error)
+        if options["url"]:
+            def make_client(user):
+                return HttpClient(
+                    options["url"], user.username, options["password"]
+                )
+        else:
+            make_client = InProcessClient
+        report = run(
+            make_client,
+            sample,
+            routes,
+            options["clients"],
+            options["requests"],
+            options["seed"],
+        )
+        self.stdout.write(
+            f"Клиентов: {options['clients']}, "
+            f"за {report.elapsed:.1f} с"
+        )
+        header = "".join(f"{f'p{share}, мс':>10}" for share in PERCENTILES)
+        self.stdout.write(
+            f"{'маршрут':<18}{'запросов':>10}{'ошибок':>8}{'в с':>8}{header}"
+        )
+        for name, count, errors, rps, *latencies in report.rows():
+            values = "".join(f"{latency:>10.1f}" for latency in latencies)
+            self.stdout.write(
+                f"{name:<18}{count:>10}{errors:>8}{rps:>8.1f}{values}"
+            )
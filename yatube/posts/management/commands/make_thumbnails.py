@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from ... import thumbnails
+from ...models import Post
+
+
+class Command(BaseCommand):
+    """Готовит миниатюры постов, у которых их ещё нет."""
+
+    help = (
+        "Создаёт миниатюры картинок постов, загруженных в обход формы "
+        "или до появления фоновой обработки."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать миниатюры всех постов с картинками.",
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="")
+        if not options["all"]:
+            posts = posts.exclude(thumbnail_of=F("image"))
+        done = failed = 0
+        for post_id, name in posts.values_list("id", "image").iterator():
+            try:
+                thumbnails.generate(post_id, name)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f"post={post_id} {name}: {exc}")
+            else:
+                done += 1
+        self.stdout.write(f"Миниатюр создано: {done}, с ошибками: {failed}")
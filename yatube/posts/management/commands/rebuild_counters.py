@@ -0,0 +1,101 @@
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from ... import caching
+from ...models import Follow, Post, UserStats
+
+User = get_user_model()
+
+FIELDS = ("posts_count", "followers_count", "following_count")
+
+
+def _count_of(queryset, field):
+    """Коррелированный подзапрос: число строк queryset на пользователя."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("*"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    """Пересчитывает счётчики пользователей и сообщает о расхождениях."""
+
+    help = "Сверяет UserStats с фактическими данными и исправляет их."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только показать расхождения, ничего не меняя.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        actual = User.objects.annotate(
+            actual_posts_count=_count_of(Post.objects, "author"),
+            actual_followers_count=_count_of(Follow.objects, "author"),
+            actual_following_count=_count_of(Follow.objects, "user"),
+        ).values_list(
+            "pk",
+            "actual_posts_count",
+            "actual_followers_count",
+            "actual_following_count",
+        )
+        checked = drifted = missing = 0
+        rows = actual.order_by("pk").iterator()
+        size = options["batch_size"]
+        for batch in iter(lambda: list(islice(rows, size)), []):
+            batch_drifted, batch_missing = self.reconcile(
+                batch, options["check"]
+            )
+            checked += len(batch)
+            drifted += batch_drifted
+            missing += batch_missing
+        verb = "расходятся" if options["check"] else "исправлено"
+        self.stdout.write(
+            f"Пользователей проверено: {checked}, {verb}: {drifted}, "
+            f"без счётчиков: {missing}"
+        )
+
+    def reconcile(self, rows, check_only):
+        """Сравнивает пачку пользователей со счётчиками и правит их."""
+        stored = UserStats.objects.in_bulk([row[0] for row in rows])
+        to_create, to_update = [], []
+        for user_id, *values in rows:
+            expected = dict(zip(FIELDS, values))
+            stats = stored.get(user_id)
+            if stats is None:
+                to_create.append(UserStats(user_id=user_id, **expected))
+                continue
+            current = {field: getattr(stats, field) for field in FIELDS}
+            if current != expected:
+                if check_only:
+                    self.stdout.write(
+                        f"user={user_id}: {current} -> {expected}"
+                    )
+                for field, value in expected.items():
+                    setattr(stats, field, value)
+                to_update.append(stats)
+        if not check_only:
+            with transaction.atomic():
+                UserStats.objects.bulk_create(to_create)
+                UserStats.objects.bulk_update(to_update, FIELDS)
+            caching.bump(
+                [
+                    caching.stats_tag(stats.user_id)
+                    for stats in to_create + to_update
+                ]
+            )
+        return len(to_update), len(to_create)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ... import caching, fanout, feeds
+from ...models import Follow, Inbox, UserStats
+
+
+class Command(BaseCommand):
+    """Собирает материализованные ленты подписок заново."""
+
+    help = (
+        "Очищает ленты подписок и раскладывает посты авторов ниже "
+        "порога POSTS_FANOUT_THRESHOLD по их подписчикам."
+    )
+
+    def handle(self, *args, **options):
+        follows = Follow.objects.values_list("user_id", "author_id")
+        celebrities = {}
+        rebuilt = 0
+        with transaction.atomic():
+            # Ленты собираются с нуля, поэтому и отметки ставятся
+            # по самому порогу, без гистерезиса.
+            UserStats.objects.update(celebrity=False)
+            UserStats.objects.filter(
+                followers_count__gte=settings.POSTS_FANOUT_THRESHOLD
+            ).update(celebrity=True)
+            Inbox.objects.all().delete()
+            for user_id, author_id in follows.order_by("author_id"):
+                if author_id not in celebrities:
+                    celebrities[author_id] = fanout.is_celebrity(author_id)
+                if not celebrities[author_id]:
+                    fanout.backfill(user_id, author_id)
+                    rebuilt += 1
+        users = follows.order_by().values_list("user_id", flat=True)
+        caching.bump(
+            feeds.follow_feed(user_id) for user_id in users.distinct()
+        )
+        self.stdout.write(
+            f"Подписок разложено: {rebuilt}, "
+            f"авторов читается напрямую: {sum(celebrities.values())}"
+        )
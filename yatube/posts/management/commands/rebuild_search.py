@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ... import search
+
+
+class Command(BaseCommand):
+    """Перестраивает полнотекстовый индекс постов."""
+
+    help = (
+        "Заново заполняет индекс FTS5 по таблице постов: после массовых "
+        "вставок и правок в обход сигналов."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = search.rebuild()
+        self.stdout.write(f"Постов в индексе: {indexed}")
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from ... import media
+
+
+class Command(BaseCommand):
+    """Переносит картинки постов в шарды по содержимому."""
+
+    help = (
+        "Копирует картинки из плоского каталога posts/ в posts/ab/cd/ "
+        "под именами по SHA-256 (одинаковые файлы — в один), пачками "
+        "переписывает Post.image и удаляет старые файлы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Имён картинок в одной транзакции.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Потоков копирования файлов.",
+        )
+
+    def handle(self, *args, **options):
+        errors = []
+        done = media.shard_images(
+            options["batch_size"], options["workers"], errors
+        )
+        for error in errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            f"Файлов перенесено: {done['files']}, из них одинаковых: "
+            f"{done['duplicates']}, постов переписано: {done['posts']}, "
+            f"с ошибками: {len(errors)}"
+        )
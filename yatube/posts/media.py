@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from core.storage import CONTENT_NAME
+
+from . import caching, thumbnails
+from .models import Post
+
+
+def image_storage():
+    """Хранилище картинок постов."""
+    return Post._meta.get_field("image").storage
+
+
+def delete_image(name):
+    """Удаляет файл картинки и все её варианты."""
+    image_storage().delete(name)
+    for variant in thumbnails.variant_names(name):
+        default_storage.delete(variant)
+
+
+def release(name):
+    """Удаляет картинку, если на неё не ссылается ни один пост.
+
+    Одинаковые загрузки делят один файл (ContentAddressedStorage), так
+    что число ссылок на него — это число постов с этим именем. Файлы
+    со старыми именами не трогаем: их переносит shard_media. Файл,
+    который только что получила ещё не зафиксированная загрузка,
+    тоже остаётся (ContentAddressedStorage.deleting).
+    Возвращает, удалён ли файл.
+    """
+    if not name or not CONTENT_NAME.search(name):
+        return False
+    with image_storage().deleting(name) as free:
+        if not free or Post.objects.filter(image=name).exists():
+            return False
+        delete_image(name)
+    return True
+
+
+def release_on_commit(name):
+    """release() после фиксации транзакции, которая убрала ссылку."""
+    transaction.on_commit(lambda: release(name))
+
+
+def legacy_names(batch_size):
+    """Пачки имён картинок постов, ещё не перенесённых в шарды.
+
+    Имена читаются постранично по индексу, а не одним курсором:
+    между пачками таблица постов переписывается.
+    """
+    last = ""
+    while True:
+        names = list(
+            Post.objects.filter(image__gt=last)
+            .order_by("image")
+            .values_list("image", flat=True)
+            .distinct()[:batch_size]
+        )
+        if not names:
+            return
+        last = names[-1]
+        batch = [name for name in names if not CONTENT_NAME.search(name)]
+        if batch:
+            yield batch
+
+
+def copy_to_shard(name):
+    """Копирует картинку и её варианты под имя по содержимому.
+
+    Возвращает (новое имя, было ли такое содержимое уже сохранено).
+    Исходные файлы остаются до переписывания постов.
+    """
+    storage = image_storage()
+    with storage.open(name) as source:
+        target = storage.content_name(name, source)
+        duplicate = storage.exists(target)
+        storage.save(name, source)
+    for old, new in zip(
+        thumbnails.variant_names(name), thumbnails.variant_names(target)
+    ):
+        if default_storage.exists(old) and not default_storage.exists(new):
+            with default_storage.open(old) as variant:
+                default_storage.save(new, variant)
+    return target, duplicate
+
+
+def copy_or_error(name):
+    """copy_to_shard() для пула: (новое имя, дубликат ли, ошибка)."""
+    try:
+        return (*copy_to_shard(name), None)
+    except OSError as exc:
+        return None, False, exc
+
+
+def rewrite(moved):
+    """Переписывает имена картинок постов одним UPDATE на пачку."""
+    posts = Post.objects.filter(image__in=list(moved)).order_by()
+    ids = list(posts.values_list("id", flat=True))
+    posts.update(
+        image=Case(
+            *(When(image=old, then=Value(new)) for old, new in moved.items())
+        ),
+        thumbnail_of=Case(
+            *(
+                When(thumbnail_of=old, then=Value(new))
+                for old, new in moved.items()
+            ),
+            default=F("thumbnail_of"),
+        ),
+    )
+    # update() не вызывает сигналов, а в карточках адреса картинок.
+    caching.bump([caching.post_tag(pk) for pk in ids])
+    return len(ids)
+
+
+def shard_images(batch_size=100, workers=8, errors=None):
+    """Переносит картинки постов в шарды по содержимому.
+
+    Файлы пачки копируются параллельно в workers потоков, затем имена
+    у постов пачки переписываются в одной транзакции, и только после
+    неё удаляются старые файлы: прерванный перенос оставляет лишние
+    копии, но не битые ссылки. Ошибки чтения файлов пишутся в errors.
+    Возвращает {"files": …, "duplicates": …, "posts": …}.
+    """
+    done = {"files": 0, "duplicates": 0, "posts": 0}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in legacy_names(batch_size):
+            moved = {}
+            copies = pool.map(copy_or_error, batch)
+            for name, (target, duplicate, error) in zip(batch, copies):
+                if error is not None:
+                    if errors is not None:
+                        errors.append(f"{name}: {error}")
+                    continue
+                moved[name] = target
+                done["files"] += 1
+                done["duplicates"] += duplicate
+            if not moved:
+                continue
+            with transaction.atomic():
+                done["posts"] += rewrite(moved)
+            for old in moved:
+                delete_image(old)
+    return done
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Раскладываем уже существующие посты по лентам текущих подписчиков.
+BACKFILL_INBOX = """
+    INSERT INTO posts_inbox (user_id, post_id, author_id, pub_date)
+    SELECT f.user_id, p.id, p.author_id, p.pub_date
+    FROM posts_follow f
+    INNER JOIN posts_post p ON p.author_id = f.author_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inbox', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты подписок',
+                'verbose_name_plural': 'Ленты подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inbox',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='inbox_user_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inbox',
+            index=models.Index(fields=['user', 'author'], name='inbox_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inbox',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_inbox_user_post'),
+        ),
+        migrations.RunSQL(BACKFILL_INBOX, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:05
+
+from django.db import migrations
+
+# Полнотекстовый индекс постов (SQLite FTS5), rowid = id поста.
+# Токенизатор unicode61 приводит к нижнему регистру и кириллицу.
+CREATE_INDEX = """
+    CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+        text, tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+BACKFILL_INDEX = """
+    INSERT INTO posts_post_fts (rowid, text) SELECT id, text FROM posts_post
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_thumbnail_of'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [CREATE_INDEX, BACKFILL_INDEX],
+            "DROP TABLE posts_post_fts",
+        ),
+    ]
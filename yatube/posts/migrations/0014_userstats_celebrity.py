@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    """Авторы выше порога уже читались напрямую — отмечаем их."""
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers_count__gte=settings.POSTS_FANOUT_THRESHOLD
+    ).update(celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='celebrity',
+            field=models.BooleanField(default=False, verbose_name='Читается напрямую'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -27,10 +30,12 @@ class Post(models.Model):
 
     text = models.TextField("Текст поста", help_text="Введите текст поста")
     pub_date = models.DateTimeField("Дата публикации", auto_now_add=True)
+    # Поиск по автору и группе обслуживают составные индексы из Meta.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="posts",
+        db_index=False,
         verbose_name="Автор",
     )
     group = models.ForeignKey(
@@ -39,28 +44,66 @@ class Post(models.Model):
         related_name="posts",
         blank=True,
         null=True,
+        db_index=False,
         verbose_name="Группа",
         help_text="Группа, к которой будет относиться пост",
     )
-    image = models.ImageField("Картинка", upload_to="posts/", blank=True)
+    # Картинки называются по содержимому и раскладываются по шардам
+    # posts/ab/cd/ (core.storage.ContentAddressedStorage).
+    image = models.ImageField(
+        "Картинка",
+        upload_to="posts/",
+        storage=ContentAddressedStorage(),
+        blank=True,
+    )
+    # Имя картинки, для которой уже готова миниатюра (posts.thumbnails).
+    thumbnail_of = models.CharField(
+        max_length=100, blank=True, editable=False
+    )
+    # Ширина картинки после кадрирования: варианты шире неё не делаются.
+    image_width = models.PositiveIntegerField(null=True, editable=False)
 
     class Meta:
         """Meta class."""
 
         verbose_name = "Пост"
         verbose_name_plural = "Посты"
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-id"]
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="post_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+            # Поиск постов по имени картинки (posts.media, миниатюры).
+            models.Index(fields=["image"], name="post_image_idx"),
+        ]
 
     def __str__(self):
         """Выводим текст поста."""
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет пост в одной транзакции со счётчиками автора."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Создание таблицы Comment."""
 
     post = models.ForeignKey(
-        Post, on_delete=models.CASCADE, related_name="comments", null=True
+        Post,
+        on_delete=models.CASCADE,
+        related_name="comments",
+        null=True,
+        db_index=False,
     )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="comments", null=True
@@ -70,6 +113,17 @@ class Comment(models.Model):
     )
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        """Meta class."""
+
+        ordering = ["created", "id"]
+        indexes = [
+            models.Index(
+                fields=["post", "created", "id"],
+                name="comment_post_created_idx",
+            ),
+        ]
+
 
 class Follow(models.Model):
     """Создание таблицы Follow."""
@@ -95,3 +149,137 @@ class Follow(models.Model):
                 name="unique_user_author",
             )
         ]
+
+    def save(self, *args, **kwargs):
+        """Сохраняет подписку в одной транзакции со счётчиками."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Inbox(models.Model):
+    """Материализованная лента подписок: пост, разложенный подписчику."""
+
+    # Отдельный индекс не нужен: user — первое поле составных индексов.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="inbox",
+        db_index=False,
+        verbose_name="Подписчик",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="inbox_entries",
+        verbose_name="Пост",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    pub_date = models.DateTimeField("Дата публикации")
+
+    class Meta:
+        """Meta класс."""
+
+        verbose_name = "Запись ленты подписок"
+        verbose_name_plural = "Ленты подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"],
+                name="unique_inbox_user_post",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="inbox_user_pub_date_idx",
+            ),
+            models.Index(
+                fields=["user", "author"], name="inbox_user_author_idx"
+            ),
+        ]
+
+
+class UserStatsManager(models.Manager):
+    """Операции над счётчиками пользователей."""
+
+    def bump(self, user_id, **deltas):
+        """Атомарно сдвигает счётчики пользователя на deltas.
+
+        Если строки ещё нет, она строится по фактическим данным
+        (новая запись уже в них учтена). Уменьшать отсутствующие
+        счётчики незачем: так бывает при каскадном удалении
+        самого пользователя.
+        """
+        # Счётчик, уже разошедшийся с данными в ноль, не уводим в минус.
+        floors = {
+            f"{field}__gte": -delta
+            for field, delta in deltas.items()
+            if delta < 0
+        }
+        updated = (
+            self.filter(user_id=user_id, **floors).update(
+                **{field: F(field) + delta for field, delta in deltas.items()}
+            )
+        )
+        if not updated and any(delta > 0 for delta in deltas.values()):
+            self.rebuild(user_id)
+
+    def rebuild(self, user_id):
+        """Пересчитывает счётчики пользователя с нуля."""
+        stats, _ = self.update_or_create(
+            user_id=user_id,
+            defaults={
+                "posts_count": Post.objects.filter(author_id=user_id).count(),
+                "followers_count": Follow.objects.filter(
+                    author_id=user_id
+                ).count(),
+                "following_count": Follow.objects.filter(
+                    user_id=user_id
+                ).count(),
+            },
+        )
+        return stats
+
+    def for_user(self, user_id):
+        """Счётчики пользователя; отсутствующие строятся при чтении."""
+        stats = self.filter(user_id=user_id).first()
+        if stats is None:
+            with transaction.atomic():
+                stats = self.rebuild(user_id)
+        return stats
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики постов и подписок пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Пользователь",
+    )
+    posts_count = models.PositiveIntegerField("Постов", default=0)
+    followers_count = models.PositiveIntegerField("Подписчиков", default=0)
+    following_count = models.PositiveIntegerField("Подписок", default=0)
+    # Посты автора не раскладываются по лентам, а читаются при запросе.
+    celebrity = models.BooleanField("Читается напрямую", default=False)
+
+    objects = UserStatsManager()
+
+    class Meta:
+        """Meta класс."""
+
+        verbose_name = "Счётчики пользователя"
+        verbose_name_plural = "Счётчики пользователей"
+
+    def __str__(self):
+        """Счётчики в одну строку."""
+        return (
+            f"{self.posts_count} / {self.followers_count} / "
+            f"{self.following_count}"
+        )
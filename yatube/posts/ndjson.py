@@ -0,0 +1,233 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Порядок важен: посты ссылаются на группы, комментарии — на посты
+# из предыдущих строк.
+MODELS = ("group", "post", "comment", "follow")
+# Поля auto_now_add, значения которых берутся из файла.
+DATE_FIELDS = {Post: "pub_date", Comment: "created"}
+
+
+def _groups(chunk_size):
+    rows = Group.objects.order_by("id").values_list(
+        "slug", "title", "description"
+    )
+    for slug, title, description in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "model": "group",
+            "slug": slug,
+            "title": title,
+            "description": description,
+        }
+
+
+def _posts(chunk_size):
+    rows = Post.objects.order_by("id").values_list(
+        "id", "author__username", "group__slug", "text", "pub_date", "image"
+    )
+    for post_id, author, group, text, pub_date, image in rows.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            "model": "post",
+            "id": post_id,
+            "author": author,
+            "group": group,
+            "text": text,
+            "pub_date": pub_date,
+            "image": image,
+        }
+
+
+def _comments(chunk_size):
+    rows = Comment.objects.order_by("id").values_list(
+        "id", "post_id", "author__username", "text", "created"
+    )
+    for comment_id, post_id, author, text, created in rows.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            "model": "comment",
+            "id": comment_id,
+            "post": post_id,
+            "author": author,
+            "text": text,
+            "created": created,
+        }
+
+
+def _follows(chunk_size):
+    rows = Follow.objects.order_by("id").values_list(
+        "user__username", "author__username"
+    )
+    for user, author in rows.iterator(chunk_size=chunk_size):
+        yield {"model": "follow", "user": user, "author": author}
+
+
+EXPORTERS = {
+    "group": _groups,
+    "post": _posts,
+    "comment": _comments,
+    "follow": _follows,
+}
+
+
+def export_lines(models=MODELS, chunk_size=2000):
+    """Строки NDJSON выбранных моделей; база читается порциями."""
+    for model in MODELS:
+        if model in models:
+            for record in EXPORTERS[model](chunk_size):
+                yield json.dumps(
+                    record, cls=DjangoJSONEncoder, ensure_ascii=False
+                ) + "\n"
+
+
+def bulk_create(model, objects, **kwargs):
+    """bulk_create, после которого даты DATE_FIELDS остаются из объектов.
+
+    auto_now_add ставит при вставке текущее время, поэтому даты
+    возвращаются отдельным UPDATE по id; само поле модели не меняется.
+    Объекты без id получают id новых строк по порядку вставки, так что
+    вызывать функцию нужно внутри транзакции.
+    """
+    field = DATE_FIELDS.get(model)
+    if field is None:
+        return model.objects.bulk_create(objects, **kwargs)
+    dates = [getattr(obj, field) for obj in objects]
+    last_id = model.objects.aggregate(last=Max("id"))["last"] or 0
+    created = model.objects.bulk_create(objects, **kwargs)
+    if any(obj.pk is None for obj in created):
+        ids = model.objects.filter(id__gt=last_id).order_by("id")
+        for obj, pk in zip(created, ids.values_list("id", flat=True)):
+            obj.pk = pk
+    for obj, date in zip(created, dates):
+        setattr(obj, field, date)
+    model.objects.bulk_update(created, [field])
+    return created
+
+
+class Importer:
+    """Загружает строки NDJSON пачками bulk_create.
+
+    Авторы и группы ищутся в словарях, которые собираются один раз и
+    дополняются недостающими записями, id постов и комментариев
+    сохраняются из файла. Группы из записей group создаются сразу
+    и с описанием; группа, которой в файле нет, получает название
+    по slug. Сигналы не вызываются: счётчики, ленты, поиск и кэш
+    пересобираются после загрузки (см. import_ndjson).
+    """
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list("username", "id"))
+        self.groups = dict(Group.objects.values_list("slug", "id"))
+        self.pending = {model: [] for model in MODELS}
+        self.loaded = dict.fromkeys(MODELS, 0)
+        self.created_users = 0
+        self.created_groups = 0
+        self.authors = set()
+        self.group_ids = set()
+        self.commented = set()
+
+    def user_id(self, username):
+        if username not in self.users:
+            user = User(username=username)
+            user.set_unusable_password()
+            user.save()
+            self.users[username] = user.id
+            self.created_users += 1
+        return self.users[username]
+
+    def group_id(self, slug, title=None, description=""):
+        if slug is None:
+            return None
+        if slug not in self.groups:
+            group = Group.objects.create(
+                title=title or slug, slug=slug, description=description
+            )
+            self.groups[slug] = group.id
+            self.created_groups += 1
+        return self.groups[slug]
+
+    def add_group(self, record):
+        """Группы нужны постам по slug сразу, поэтому пишутся без пачек.
+
+        Уже существующие группы не меняются.
+        """
+        self.group_id(record["slug"], record["title"], record["description"])
+        self.loaded["group"] += 1
+
+    def build(self, record):
+        model = record["model"]
+        if model == "post":
+            post = Post(
+                id=record["id"],
+                author_id=self.user_id(record["author"]),
+                group_id=self.group_id(record["group"]),
+                text=record["text"],
+                pub_date=parse_datetime(record["pub_date"]),
+                image=record["image"],
+            )
+            self.authors.add(post.author_id)
+            self.group_ids.add(post.group_id)
+            return post
+        if model == "comment":
+            self.commented.add(record["post"])
+            return Comment(
+                id=record["id"],
+                post_id=record["post"],
+                author_id=self.user_id(record["author"]),
+                text=record["text"],
+                created=parse_datetime(record["created"]),
+            )
+        if model == "follow":
+            return Follow(
+                user_id=self.user_id(record["user"]),
+                author_id=self.user_id(record["author"]),
+            )
+        raise ValueError(f"Неизвестная модель: {model}")
+
+    def add(self, line):
+        """Разбирает строку и сбрасывает пачку, когда она наполнилась."""
+        record = json.loads(line)
+        if record["model"] == "group":
+            self.add_group(record)
+            return
+        obj = self.build(record)
+        self.pending[record["model"]].append(obj)
+        if len(self.pending[record["model"]]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленную пачку одной транзакцией."""
+        with transaction.atomic():
+            for model in MODELS:
+                objects = self.pending[model]
+                if objects:
+                    # Размер одного INSERT выбирает бэкенд: у SQLite есть
+                    # предел числа строк в составном SELECT. Подписки,
+                    # которые уже есть в базе, пропускаются.
+                    bulk_create(
+                        objects[0].__class__,
+                        objects,
+                        ignore_conflicts=model == "follow",
+                    )
+                    self.loaded[model] += len(objects)
+                    self.pending[model] = []
+
+    def load(self, lines):
+        """Загружает все строки, пустые пропускает."""
+        for line in lines:
+            if line.strip():
+                self.add(line)
+        self.flush()
+        return self.loaded
@@ -0,0 +1,205 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    """Курсор не удалось разобрать."""
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому общее число записей передают готовым.
+
+    Страница стоит один ограниченный SELECT вместо COUNT(*) + SELECT.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+    def trim(self, count):
+        """Урезает завышенный count: после count записей ничего нет."""
+        self._count = min(self._count, count)
+        self.__dict__.pop("num_pages", None)
+
+    def page(self, number):
+        """Не обрезает страницу по count: счётчик может отставать."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+
+class CursorPage(Sequence):
+    """Страница курсорного паджинатора.
+
+    Повторяет интерфейс Page, который нужен шаблонам, но не знает
+    ни номера страницы, ни общего количества записей.
+    """
+
+    is_cursor = True
+
+    def __init__(
+        self, object_list, paginator, has_next=False, has_previous=False
+    ):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return "<Cursor page of %s objects>" % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Паджинатор по ключу (keyset) без COUNT(*) и OFFSET.
+
+    Страница выбирается условием по полям сортировки относительно
+    курсора, поэтому её стоимость не зависит от глубины.
+    Последнее поле сортировки должно быть уникальным.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = (
+                object_list.query.order_by or object_list.model._meta.ordering
+            )
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip("-") for name in self.ordering]
+
+    def _values(self, obj):
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def encode_cursor(self, obj):
+        """Кодирует позицию записи в строку для URL."""
+        raw = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in self._values(obj)
+        ]
+        data = json.dumps(raw, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Разбирает курсор обратно в значения полей сортировки."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(raw, list) or len(raw) != len(self.fields):
+                raise InvalidCursor(cursor)
+            return [
+                self._field(name).to_python(value)
+                for name, value in zip(self.fields, raw)
+            ]
+        except (
+            binascii.Error,
+            TypeError,
+            UnicodeDecodeError,
+            ValueError,
+            ValidationError,
+        ) as error:
+            raise InvalidCursor(cursor) from error
+
+    def _field(self, name):
+        """Поле модели или аннотации, по которому идёт сортировка."""
+        annotation = self.object_list.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.object_list.model._meta.get_field(name)
+
+    def _keyset(self, values, forward):
+        """Условие «строго после» (или «строго до») позиции курсора.
+
+        Нестрогая граница по первому полю вынесена отдельно, чтобы
+        база читала диапазон индекса, а не перебирала ветки OR.
+        """
+        condition = Q()
+        lookups = []
+        for index, order in enumerate(self.ordering):
+            descending = order.startswith("-")
+            lookups.append("lt" if descending == forward else "gt")
+            name = self.fields[index]
+            step = Q(**{f"{name}__{lookups[-1]}": values[index]})
+            for previous, value in zip(self.fields[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        bound = Q(**{f"{self.fields[0]}__{lookups[0]}e": values[0]})
+        return bound & condition
+
+    def page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или до курсора before."""
+        queryset = self.object_list
+        if before:
+            values = self.decode_cursor(before)
+            reverse = [
+                name[1:] if name.startswith("-") else "-" + name
+                for name in self.ordering
+            ]
+            rows = list(
+                queryset.filter(self._keyset(values, forward=False))
+                .order_by(*reverse)[: self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[: self.per_page]
+            rows.reverse()
+            return CursorPage(
+                rows, self, has_next=True, has_previous=has_previous
+            )
+        if after:
+            queryset = queryset.filter(
+                self._keyset(self.decode_cursor(after), forward=True)
+            )
+        rows = list(queryset.order_by(*self.ordering)[: self.per_page + 1])
+        return CursorPage(
+            rows[: self.per_page],
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=bool(after),
+        )
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но при битом курсоре отдаёт первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
@@ -0,0 +1,153 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField, IntegerField
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginators import CursorPage, CursorPaginator
+
+TABLE = "posts_post_fts"
+# Границы совпадений из snippet(): управляющие символы не встречаются в
+# тексте постов и не затрагиваются экранированием HTML.
+MARK_START = "\x02"
+MARK_END = "\x03"
+SNIPPET_TOKENS = 24
+WORD = re.compile(r"\w+")
+
+
+def match_query(text):
+    """Выражение MATCH из пользовательского ввода.
+
+    Каждое слово берётся в кавычки и ищется по префиксу (стемминга в
+    FTS5 нет, так находятся и другие окончания), операторы FTS5 во вводе
+    не действуют. Пустая строка, если слов нет.
+    """
+    return " ".join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def matching(queryset, text):
+    """Посты queryset, текст которых подходит под запрос text."""
+    # RawSQL в id__in получил бы вторые скобки, и SQLite сравнил бы id
+    # только с первой строкой подзапроса.
+    return queryset.extra(
+        where=[
+            f"{Post._meta.db_table}.id IN "
+            f"(SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s)"
+        ],
+        params=[match_query(text)],
+    )
+
+
+def highlight(snippet):
+    """Фрагмент с совпадениями в <mark>, остальное экранировано."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, "<mark>")
+        .replace(MARK_END, "</mark>")
+    )
+
+
+def index_post(post_id, text):
+    """Добавляет или заменяет текст поста в индексе."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {TABLE} (rowid, text) VALUES (%s, %s)",
+            [post_id, text],
+        )
+
+
+def unindex_post(post_id):
+    """Убирает пост из индекса."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild():
+    """Заново строит индекс по всем постам, возвращает их число."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, text) "
+            f"SELECT id, text FROM {Post._meta.db_table}"
+        )
+        # Слияние сегментов: после массовой вставки запросы быстрее.
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная выдача поиска по релевантности (bm25).
+
+    Страница — один запрос к индексу FTS5 с условием по (rank, rowid)
+    и один запрос за постами по id. У постов страницы есть атрибуты
+    rank и snippet. Листается только вперёд.
+    """
+
+    ordering = ("rank", "id")
+    fields = ["rank", "id"]
+
+    def __init__(self, text, per_page, group=None, author=None):
+        self.query = match_query(text)
+        self.per_page = int(per_page)
+        self.group = group
+        self.author = author
+
+    def _field(self, name):
+        return FloatField() if name == "rank" else IntegerField()
+
+    def _rows(self, after):
+        sql = [
+            f"SELECT {TABLE}.rowid, {TABLE}.rank, "
+            f"snippet({TABLE}, 0, %s, %s, '…', %s) FROM {TABLE}"
+        ]
+        params = [MARK_START, MARK_END, SNIPPET_TOKENS]
+        where = [f"{TABLE} MATCH %s"]
+        params.append(self.query)
+        if self.group is not None or self.author is not None:
+            post_table = Post._meta.db_table
+            sql.append(f"JOIN {post_table} ON {post_table}.id = {TABLE}.rowid")
+            if self.group is not None:
+                where.append(f"{post_table}.group_id = %s")
+                params.append(self.group.pk)
+            if self.author is not None:
+                where.append(f"{post_table}.author_id = %s")
+                params.append(self.author.pk)
+        if after:
+            rank, post_id = self.decode_cursor(after)
+            where.append(
+                f"({TABLE}.rank > %s "
+                f"OR ({TABLE}.rank = %s AND {TABLE}.rowid > %s))"
+            )
+            params += [rank, rank, post_id]
+        sql.append("WHERE " + " AND ".join(where))
+        sql.append(f"ORDER BY {TABLE}.rank, {TABLE}.rowid LIMIT %s")
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(" ".join(sql), params)
+            return cursor.fetchall()
+
+    def page(self, after=None, before=None):
+        """Страница результатов после курсора after."""
+        if not self.query:
+            return CursorPage([], self)
+        rows = self._rows(after)
+        found = Post.objects.select_related("author", "group").in_bulk(
+            [post_id for post_id, _, _ in rows[: self.per_page]]
+        )
+        posts = []
+        for post_id, rank, snippet in rows[: self.per_page]:
+            post = found.get(post_id)
+            if post is None:
+                continue
+            post.rank = rank
+            post.snippet = highlight(snippet)
+            posts.append(post)
+        return CursorPage(
+            posts,
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=bool(after),
+        )
@@ -0,0 +1,186 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import caching, counts, fanout, feeds, identity, media, search
+from .models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    """Запоминает исходную группу, чтобы заметить перенос поста."""
+    instance._initial_group_id = instance.__dict__.get("group_id")
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance, **kwargs):
+    """Запоминает исходную картинку, чтобы заметить её замену."""
+    image = instance.__dict__.get("image")
+    instance._initial_image = getattr(image, "name", image)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый пост или перенос в другую группу меняет счётчики."""
+    if raw:
+        return
+    initial_group_id = instance._initial_group_id
+    instance._initial_group_id = instance.group_id
+    if created:
+        UserStats.objects.bump(instance.author_id, posts_count=1)
+        fanout.fan_out(instance)
+        # Ленты подписок читают версию ленты автора (fanout.following_tags).
+        counts.change(feeds.post_feeds(instance), 1)
+        caching.bump(feeds.post_feeds(instance))
+        return
+    caching.bump([caching.post_tag(instance.pk)])
+    if initial_group_id != instance.group_id:
+        if initial_group_id:
+            old_group = feeds.group_feed(initial_group_id)
+            counts.change([old_group], -1)
+            caching.bump([old_group])
+        if instance.group_id:
+            new_group = feeds.group_feed(instance.group_id)
+            counts.change([new_group], 1)
+            caching.bump([new_group])
+
+
+@receiver(post_save, sender=Post)
+def post_image_replaced(sender, instance, created, raw=False, **kwargs):
+    """Прежняя картинка удаляется, если других ссылок на неё нет."""
+    old, instance._initial_image = instance._initial_image, instance.image.name
+    if raw or created or not old or old == instance.image.name:
+        return
+    media.release_on_commit(old)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, update_fields=None, **kwargs):
+    """Текст поста попадает в полнотекстовый индекс."""
+    if update_fields is not None and "text" not in update_fields:
+        return
+    search.index_post(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    """Удалённый пост пропадает из поиска."""
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_image_released(sender, instance, **kwargs):
+    """Картинка удалённого поста удаляется, если других ссылок нет."""
+    if instance.image:
+        media.release_on_commit(instance.image.name)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Удалённый пост уменьшает счётчики лент и автора."""
+    UserStats.objects.bump(instance.author_id, posts_count=-1)
+    counts.change(feeds.post_feeds(instance), -1)
+    caching.bump(feeds.post_feeds(instance) + [caching.post_tag(instance.pk)])
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """Новая подписка меняет счётчики и состав ленты подписок."""
+    if raw or not created:
+        return
+    UserStats.objects.bump(instance.author_id, followers_count=1)
+    UserStats.objects.bump(instance.user_id, following_count=1)
+    if not fanout.promote(instance.author_id):
+        fanout.backfill(instance.user_id, instance.author_id)
+    caching.bump(
+        [
+            feeds.follow_feed(instance.user_id),
+            caching.stats_tag(instance.user_id),
+            caching.stats_tag(instance.author_id),
+        ]
+    )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Отписка меняет счётчики и состав ленты подписок."""
+    UserStats.objects.bump(instance.author_id, followers_count=-1)
+    UserStats.objects.bump(instance.user_id, following_count=-1)
+    fanout.prune(instance.user_id, instance.author_id)
+    if fanout.demote(instance.author_id):
+        # Автор только что опустился ниже нижней границы.
+        fanout.schedule_refill(instance.author_id)
+    caching.bump(
+        [
+            feeds.follow_feed(instance.user_id),
+            caching.stats_tag(instance.user_id),
+            caching.stats_tag(instance.author_id),
+        ]
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    """Комментарий меняет только список комментариев своего поста."""
+    if raw:
+        return
+    caching.bump([caching.comments_tag(instance.post_id)])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    """Название и адрес группы выводятся в карточках её постов."""
+    if raw or created:
+        return
+    caching.bump([caching.group_tag(instance.pk)])
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    """Посты удалённой группы остаются без неё, минуя сигналы Post."""
+    group = feeds.group_feed(instance.pk)
+    counts.forget([group])
+    caching.bump([group, caching.group_tag(instance.pk)])
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, raw=False, **kwargs):
+    """Счётчики нового пользователя — нули: строка заводится сразу.
+
+    Иначе первая подписка или профиль пересчитывали бы их COUNT-ами.
+    """
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    """Имя автора выводится в карточках его постов."""
+    update_fields = kwargs.get("update_fields")
+    if raw or created or update_fields == frozenset({"last_login"}):
+        # Вход пользователя обновляет только last_login.
+        return
+    caching.bump([caching.user_tag(instance.pk)])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_identity_changed(sender, instance, **kwargs):
+    """Группа по адресу и id читается из кэша объектов."""
+    identity.groups.forget(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_identity_changed(sender, instance, **kwargs):
+    """Пользователь по имени и id читается из кэша объектов.
+
+    Новый пользователь тоже сбрасывает кэш: его имя могло быть
+    закэшировано как несуществующее.
+    """
+    if kwargs.get("update_fields") == frozenset({"last_login"}):
+        return
+    identity.users.forget(instance)
@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..caching import render_cards, render_comments
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(page_obj):
+    """Карточки постов страницы из кэша фрагментов."""
+    return [mark_safe(card) for card in render_cards(page_obj.object_list)]
+
+
+@register.simple_tag
+def post_comments(post, comments):
+    """Первая порция комментариев поста из кэша фрагментов."""
+    return mark_safe(render_comments(post, comments))
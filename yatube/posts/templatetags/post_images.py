@@ -0,0 +1,20 @@
+from django import template
+
+from ..thumbnails import SIZE, sources, thumbnail_url
+
+register = template.Library()
+
+
+@register.inclusion_tag("includes/picture.html")
+def post_picture(post, style=""):
+    """Картинка поста с вариантами по ширине и формату.
+
+    Адреса собираются из имени картинки, без обращений к хранилищу.
+    """
+    return {
+        "src": thumbnail_url(post),
+        "sources": sources(post),
+        "width": SIZE[0],
+        "height": SIZE[1],
+        "style": style,
+    }
@@ -0,0 +1,123 @@
+import html
+import re
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.middleware.queries import QueryRecorder
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEST_OF_POST: int = 5
+
+
+class ScalableAdminTests(TestCase):
+    """Тесты списков админки для больших таблиц."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        cls.authors = [
+            User.objects.create_user(username=f"Author{i}") for i in range(3)
+        ]
+        cls.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="Описание"
+        )
+        for i in range(TEST_OF_POST):
+            post = Post.objects.create(
+                text=f"Тестовый пост {i}",
+                author=cls.authors[i % 3],
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post, author=cls.authors[i % 3], text="Комментарий"
+            )
+        for author in cls.authors[1:]:
+            Follow.objects.create(user=cls.authors[0], author=author)
+
+    def setUp(self):
+        """Фикстуры."""
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelists_without_n_plus_one(self):
+        """Списки не делают запроса на строку и не считают COUNT(*)."""
+        for model in (Post, Comment, Follow):
+            url = reverse(f"admin:posts_{model._meta.model_name}_changelist")
+            with self.subTest(model=model.__name__):
+                with QueryRecorder() as recorder:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(recorder.n_plus_one(), [])
+                self.assertFalse(
+                    any("COUNT(" in query.sql for query in recorder.queries)
+                )
+
+    def test_no_offset_page(self):
+        """Список по курсору не строит страницу паджинатора с OFFSET."""
+        url = reverse("admin:posts_post_changelist")
+        with mock.patch.object(
+            admin.site._registry[Post].paginator, "page"
+        ) as page:
+            response = self.client.get(url)
+        page.assert_not_called()
+        self.assertEqual(len(response.context["cl"].result_list), 5)
+        self.assertFalse(response.context["cl"].can_show_all)
+
+    def test_estimated_count(self):
+        """Без фильтров число строк — оценка по наибольшему id."""
+        Post.objects.filter(text="Тестовый пост 0").delete()
+        response = self.client.get(reverse("admin:posts_post_changelist"))
+        cl = response.context["cl"]
+        self.assertEqual(
+            cl.result_count, Post.objects.order_by("-id").first().id
+        )
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "тестовый"}
+        )
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_cursor_pages(self):
+        """Список листается курсором вперёд и назад без повторов."""
+        model_admin = admin.site._registry[Post]
+        url = reverse("admin:posts_post_changelist")
+        pages = []
+        with mock.patch.object(model_admin, "list_per_page", 2):
+            response = self.client.get(url)
+            while True:
+                pages.append(list(response.context["cl"].result_list))
+                found = re.search(
+                    r'href="([^"]+)">Следующая', response.content.decode()
+                )
+                if found is None:
+                    break
+                response = self.client.get(url + html.unescape(found[1]))
+            back = re.search(
+                r'href="([^"]+)">‹ Предыдущая', response.content.decode()
+            )
+            previous = self.client.get(url + html.unescape(back[1]))
+        self.assertEqual(
+            [post for page in pages for post in page],
+            list(Post.objects.all()),
+        )
+        self.assertEqual(
+            list(previous.context["cl"].result_list), pages[-2]
+        )
+
+    def test_date_hierarchy(self):
+        """Иерархия дат строится из MIN/MAX и календаря."""
+        post = Post.objects.first()
+        url = reverse("admin:posts_post_changelist")
+        response = self.client.get(url)
+        self.assertContains(response, f"pub_date__year={post.pub_date.year}")
+        response = self.client.get(url, {"pub_date__year": 2020})
+        self.assertContains(response, "pub_date__month=12")
+        response = self.client.get(
+            url, {"pub_date__year": 2020, "pub_date__month": 2}
+        )
+        self.assertContains(response, "pub_date__day=29")
+        self.assertNotContains(response, "pub_date__day=30")
@@ -0,0 +1,190 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.middleware.queries import QueryRecorder, load_budgets
+from posts import thumbnails
+from posts.api_urls import app_name, urlpatterns
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEST_OF_POST: int = 13
+
+
+class ApiTests(TestCase):
+    """Тесты JSON API лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(TEST_OF_POST):
+            cls.post = Post.objects.create(
+                text=f"Тестовый пост {i}", author=cls.author, group=cls.group
+            )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f"Комментарий {i}"
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get(self, url, data=None, client=None, status=200):
+        response = (client or self.guest_client).get(url, data)
+        self.assertEqual(response.status_code, status, response.content)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return json.loads(response.content)
+
+    def walk(self, url, data=None, client=None):
+        """Все страницы ленты по ссылкам next."""
+        items = []
+        page = self.get(url, data, client)
+        while True:
+            items.extend(page["results"])
+            if page["next"] is None:
+                return items
+            page = self.get(page["next"], client=client)
+
+    def test_feeds(self):
+        """Ленты отдают все посты в порядке сайта, страницами по курсору."""
+        expected = list(Post.objects.values_list("id", flat=True))
+        urls = (
+            reverse("api:index"),
+            reverse("api:group_list", args=(self.group.slug,)),
+            reverse("api:profile", args=(self.author.username,)),
+            reverse("api:follow_index"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                items = self.walk(url, {"limit": 4}, self.reader_client)
+                self.assertEqual([item["id"] for item in items], expected)
+        first = self.get(reverse("api:index"))["results"][0]
+        self.assertEqual(
+            first,
+            {
+                "id": self.post.id,
+                "text": self.post.text,
+                "pub_date": DjangoJSONEncoder().default(self.post.pub_date),
+                "author": "Author",
+                "group": "test-slug",
+                "image": None,
+                "thumbnail": None,
+            },
+        )
+
+    def test_metadata(self):
+        """Группа и счётчики автора приходят вместе с лентой."""
+        group = self.get(reverse("api:group_list", args=(self.group.slug,)))
+        self.assertEqual(group["group"]["title"], "Тестовая группа")
+        profile = self.get(
+            reverse("api:profile", args=(self.author.username,))
+        )
+        self.assertEqual(
+            profile["author"],
+            {
+                "username": "Author",
+                "posts_count": TEST_OF_POST,
+                "followers_count": 1,
+                "following_count": 0,
+            },
+        )
+
+    def test_sparse_fields(self):
+        """fields= оставляет только нужные поля и столбцы."""
+        with QueryRecorder() as recorder:
+            page = self.get(reverse("api:index"), {"fields": "id,author"})
+        self.assertEqual(set(page["results"][0]), {"id", "author"})
+        self.assertNotIn('"text"', recorder.queries[-1].sql)
+        detail = self.get(
+            reverse("api:post_detail", args=(self.post.id,)),
+            {"fields": "text"},
+        )
+        self.assertEqual(detail, {"text": self.post.text})
+
+    def test_thumbnail(self):
+        """URL миниатюры считается без модели так же, как в шаблонах."""
+        Post.objects.filter(pk=self.post.pk).update(
+            image="posts/a.jpg", thumbnail_of="posts/a.jpg"
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        detail = self.get(reverse("api:post_detail", args=(post.id,)))
+        self.assertEqual(detail["thumbnail"], thumbnails.thumbnail_url(post))
+        self.assertEqual(detail["image"], post.image.url)
+
+    def test_batch(self):
+        """Посты по списку id одним запросом, в порядке списка."""
+        ids = list(Post.objects.values_list("id", flat=True)[:3])
+        with QueryRecorder() as recorder:
+            data = self.get(
+                reverse("api:posts_batch"),
+                {"ids": f"{ids[2]},{ids[0]},999999,{ids[0]}", "fields": "id"},
+            )
+        self.assertEqual(recorder.count, 1)
+        self.assertEqual(
+            data,
+            {"results": [{"id": ids[2]}, {"id": ids[0]}], "missing": [999999]},
+        )
+        too_many = ",".join(str(pk) for pk in range(1, 102))
+        self.get(reverse("api:posts_batch"), {"ids": too_many}, status=400)
+
+    def test_comments(self):
+        """Комментарии поста по курсору."""
+        comments = self.walk(
+            reverse("api:post_comments", args=(self.post.id,)), {"limit": 2}
+        )
+        self.assertEqual(
+            [comment["text"] for comment in comments],
+            [f"Комментарий {i}" for i in range(3)],
+        )
+        self.assertEqual(comments[0]["author"], "Reader")
+
+    def test_errors(self):
+        """Ошибки — JSON с detail и подходящим статусом."""
+        cases = (
+            (reverse("api:index"), {"after": "битый"}, 400),
+            (reverse("api:index"), {"fields": "id,password"}, 400),
+            (reverse("api:index"), {"limit": "1000"}, 400),
+            (reverse("api:posts_batch"), {"ids": "1,a"}, 400),
+            (reverse("api:post_detail", args=(999999,)), None, 404),
+            (reverse("api:post_comments", args=(999999,)), None, 404),
+            (reverse("api:group_list", args=("nope",)), None, 404),
+            (reverse("api:follow_index"), None, 401),
+        )
+        for url, data, status in cases:
+            with self.subTest(url=url, data=data):
+                self.assertIn("detail", self.get(url, data, status=status))
+        response = self.guest_client.post(reverse("api:index"))
+        self.assertEqual(response.status_code, 405)
+
+    def test_budgets(self):
+        """Маршруты API укладываются в бюджет запросов."""
+        budgets = load_budgets()
+        args = {
+            "post_detail": (self.post.id,),
+            "post_comments": (self.post.id,),
+            "group_list": (self.group.slug,),
+            "profile": (self.author.username,),
+        }
+        for pattern in urlpatterns:
+            route = f"{app_name}:{pattern.name}"
+            with self.subTest(route=route):
+                url = reverse(route, args=args.get(pattern.name, ()))
+                with QueryRecorder() as recorder:
+                    self.reader_client.get(url, {"ids": self.post.id})
+                self.assertLessEqual(recorder.count, budgets[route])
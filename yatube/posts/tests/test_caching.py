@@ -0,0 +1,304 @@
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from posts import caching
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEST_OF_POST: int = 13
+
+
+class FragmentCacheTests(TestCase):
+    """Тесты кэша фрагментов лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(TEST_OF_POST):
+            Post.objects.create(
+                text=f"Тестовый пост {i}", author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def tearDown(self):
+        """Не оставляем закэшированных фрагментов другим тестам."""
+        cache.clear()
+
+    def urls(self):
+        return (
+            reverse("posts:index"),
+            reverse("posts:index") + "?page=2",
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:follow_index"),
+        )
+
+    def test_warm_page_from_cache(self):
+        """Повторная страница собирается из кэша фрагментов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                first = self.reader_client.get(url)
+                caching.reset_stats()
+                second = self.reader_client.get(url)
+                self.assertEqual(first.content, second.content)
+                hits = caching.stats()
+                self.assertEqual(hits["page"], (1, 0))
+                self.assertEqual(hits["card"][1], 0)
+
+    def test_index_without_queries(self):
+        """Тёплая главная для гостя не ходит в базу."""
+        self.guest_client.get(reverse("posts:index"))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse("posts:index"))
+        self.assertEqual(len(response.context["page_obj"]), 10)
+        self.assertContains(response, "Тестовый пост 12")
+
+    def test_header_rendered_per_request(self):
+        """Шапка страницы не попадает в кэш."""
+        self.guest_client.get(reverse("posts:index"))
+        response = self.reader_client.get(reverse("posts:index"))
+        self.assertContains(response, self.reader.username)
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertNotContains(response, reverse("posts:follow_index"))
+
+    def test_post_changes_reset_fragments(self):
+        """Новый, изменённый и удалённый пост видны сразу."""
+        url = reverse("posts:index")
+        self.guest_client.get(url)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertContains(self.guest_client.get(url), "Новый пост")
+        post.text = "Исправленный пост"
+        post.save()
+        response = self.guest_client.get(url)
+        self.assertContains(response, "Исправленный пост")
+        self.assertNotContains(response, "Новый пост")
+        post.delete()
+        self.assertNotContains(
+            self.guest_client.get(url), "Исправленный пост"
+        )
+
+    def test_follow_resets_follow_page(self):
+        """Отписка сразу очищает ленту подписок."""
+        url = reverse("posts:follow_index")
+        self.assertEqual(
+            len(self.reader_client.get(url).context["page_obj"]), 10
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(
+            len(self.reader_client.get(url).context["page_obj"]), 0
+        )
+
+    def test_cache_stats_command(self):
+        """Команда выводит долю попаданий."""
+        for _ in range(2):
+            self.guest_client.get(reverse("posts:index"))
+        out = StringIO()
+        call_command("cache_stats", "--reset", stdout=out)
+        self.assertIn("page: попаданий 1, промахов 1", out.getvalue())
+        self.assertIn("card: попаданий 10, промахов 10", out.getvalue())
+        self.assertEqual(caching.stats()["page"], (0, 0))
+
+
+class InvalidationTests(TestCase):
+    """Тесты сброса кэша по событиям, а не по таймауту."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            text="Тестовый пост", author=cls.author, group=cls.group
+        )
+        Post.objects.create(
+            text="Пост другой группы",
+            author=cls.reader,
+            group=cls.other_group,
+        )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def tearDown(self):
+        """Не оставляем закэшированных фрагментов другим тестам."""
+        cache.clear()
+
+    def test_new_post_appears_immediately(self):
+        """Новый пост сразу виден во всех своих лентах."""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:follow_index"),
+        )
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(
+            text="Свежий пост", author=self.author, group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), "Свежий пост")
+
+    def test_unrelated_group_stays_warm(self):
+        """Пост в одной группе не сбрасывает кэш другой."""
+        url = reverse("posts:group_list", args=(self.other_group.slug,))
+        self.client.get(url)
+        Post.objects.create(
+            text="Свежий пост", author=self.author, group=self.group
+        )
+        caching.reset_stats()
+        self.client.get(url)
+        self.assertEqual(caching.stats()["page"], (1, 0))
+        self.assertEqual(caching.stats()["card"], (1, 0))
+
+    def test_group_and_author_changes(self):
+        """Переименование группы и автора обновляет карточки."""
+        url = reverse("posts:index")
+        self.client.get(url)
+        self.group.title = "Новое название"
+        self.group.save()
+        self.author.first_name = "Лев"
+        self.author.last_name = "Толстой"
+        self.author.save()
+        caching.reset_stats()
+        response = self.client.get(url)
+        self.assertContains(response, "Все записи группы Новое название")
+        self.assertContains(response, "Автор: Лев Толстой")
+        self.assertEqual(caching.stats()["page"], (1, 0))
+        self.assertEqual(caching.stats()["card"], (1, 1))
+
+    def test_login_keeps_cards(self):
+        """Вход автора не сбрасывает его карточки."""
+        url = reverse("posts:index")
+        self.client.get(url)
+        self.client.force_login(self.author)
+        caching.reset_stats()
+        self.client.get(url)
+        self.assertEqual(caching.stats()["card"], (2, 0))
+
+    def test_comment_appears_immediately(self):
+        """Новый комментарий сразу виден, пост без него остаётся в кэше."""
+        url = reverse("posts:post_detail", args=(self.post.id,))
+        self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.reader, text="Свежий комментарий"
+        )
+        caching.reset_stats()
+        self.assertContains(self.client.get(url), "Свежий комментарий")
+        self.assertEqual(caching.stats()["comments"], (0, 1))
+        self.client.get(url)
+        self.assertEqual(caching.stats()["comments"], (1, 1))
+
+
+class FillTests(SimpleTestCase):
+    """Тесты пересчёта записей кэша без давки."""
+
+    key = "posts:test:fill"
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.calls = 0
+
+    def tearDown(self):
+        """Не оставляем записей другим тестам."""
+        cache.clear()
+
+    def compute(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return f"значение {self.calls}"
+
+    def fill(self):
+        return caching.fill("page", self.key, "test", self.compute)
+
+    def lock(self):
+        cache.add(caching.LOCK_KEY.format(self.key), 1)
+
+    def test_herd(self):
+        """Из многих одновременных промахов считает один запрос."""
+        self.fill()
+        cache.delete(self.key)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(self.fill())
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(set(results), {"значение 1", "значение 2"})
+        self.assertEqual(caching.fill_stats()["stale"], 7)
+        self.assertEqual(self.fill(), "значение 2")
+
+    def test_wait_for_fill(self):
+        """Без прошлого значения ждём чужой пересчёт."""
+        self.lock()
+
+        def other_request(seconds):
+            cache.set(self.key, ("чужое", 0, None))
+
+        with mock.patch.object(caching.time, "sleep", other_request):
+            self.assertEqual(self.fill(), "чужое")
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(caching.fill_stats()["waited"], 1)
+
+    @override_settings(POSTS_FILL_WAIT=0)
+    def test_lock_timeout(self):
+        """Не дождавшись пересчёта, запрос считает сам."""
+        self.lock()
+        self.assertEqual(self.fill(), "значение 1")
+
+    def test_refresh_early(self):
+        """Близко к сроку запись пересчитывается заранее."""
+        self.fill()
+        with mock.patch.object(caching.random, "random", return_value=1):
+            self.assertEqual(self.fill(), "значение 1")
+        with mock.patch.object(
+            caching.random, "random", return_value=1e-9
+        ), override_settings(POSTS_EARLY_REFRESH_BETA=10_000):
+            self.assertEqual(self.fill(), "значение 2")
+        self.assertEqual(caching.fill_stats()["early"], 1)
+        self.assertFalse(caching.refresh_early(1, None, time.time()))
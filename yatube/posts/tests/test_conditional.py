@@ -0,0 +1,150 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.middleware.queries import QueryRecorder
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+TEST_OF_POST: int = 13
+
+
+class ConditionalGetTests(TestCase):
+    """Тесты ETag и ответа 304 для лент и страницы поста."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(TEST_OF_POST):
+            cls.post = Post.objects.create(
+                text=f"Тестовый пост {i}", author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def tearDown(self):
+        """Не оставляем версий и фрагментов другим тестам."""
+        cache.clear()
+
+    def urls(self):
+        return (
+            reverse("posts:index"),
+            reverse("posts:index") + "?page=2",
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(self.post.id,)),
+            reverse("posts:follow_index"),
+        )
+
+    def etag(self, client, url):
+        """ETag страницы после прогрева кэша."""
+        client.get(url)
+        return client.get(url)["ETag"]
+
+    def test_not_modified(self):
+        """Совпавший ETag — 304 без шаблонов и почти без базы."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.etag(self.reader_client, url)
+                with QueryRecorder() as recorder:
+                    response = self.reader_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertFalse(response.templates)
+                # Сессия, пользователь и одна выборка id.
+                self.assertLessEqual(recorder.count, 3)
+
+    def test_viewer_in_etag(self):
+        """Гость и пользователь получают разные ETag."""
+        for url in self.urls()[:-1]:
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.etag(self.guest_client, url),
+                    self.etag(self.reader_client, url),
+                )
+
+    def test_changes_make_new_etag(self):
+        """Правка, новый пост, комментарий и подписка меняют ETag."""
+        index = reverse("posts:index")
+        detail = reverse("posts:post_detail", args=(self.post.id,))
+        profile = reverse("posts:profile", args=(self.author.username,))
+        changes = (
+            (index, lambda: Post.objects.get(pk=self.post.pk).save()),
+            (
+                index,
+                lambda: Post.objects.create(text="Новый", author=self.author),
+            ),
+            (
+                detail,
+                lambda: Comment.objects.create(
+                    post=self.post, author=self.reader, text="Комментарий"
+                ),
+            ),
+            (
+                profile,
+                lambda: Follow.objects.filter(user=self.reader).delete(),
+            ),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.etag(self.reader_client, url)
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.get("ETag"), etag)
+
+    def test_login_changes_detail_etag(self):
+        """Вход меняет CSRF-токен, поэтому и ETag страницы с формой."""
+        User.objects.create_user(username="Login", password="Pa55word!")
+        client = Client(enforce_csrf_checks=True)
+        login = reverse("users:login")
+        credentials = {"username": "Login", "password": "Pa55word!"}
+
+        def form_post(url, page, data):
+            token = re.search(
+                r'name="csrfmiddlewaretoken" value="([^"]+)"',
+                page.content.decode(),
+            ).group(1)
+            return client.post(url, {**data, "csrfmiddlewaretoken": token})
+
+        form_post(login, client.get(login), credentials)
+        url = reverse("posts:post_detail", args=(self.post.id,))
+        etag = self.etag(client, url)
+        self.assertEqual(
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        form_post(login, client.get(login), credentials)
+        page = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(page.status_code, 200)
+        response = form_post(
+            reverse("posts:add_comment", args=(self.post.id,)),
+            page,
+            {"text": "После входа"},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_cold_page_without_etag(self):
+        """Пока страница ленты не в кэше, ETag не выдаётся."""
+        response = self.guest_client.get(reverse("posts:index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
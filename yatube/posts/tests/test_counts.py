@@ -0,0 +1,241 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import feeds
+from posts.counts import COUNT_KEY, get_count
+from posts.fanout import follow_feed
+from posts.models import Follow, Group, Post, UserStats
+from posts.views import paginate_posts
+
+User = get_user_model()
+
+
+class FeedCountTests(TestCase):
+    """Тесты кэша счётчиков лент."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            Post.objects.create(
+                text=f"Тестовый пост {i}", author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.feeds = {
+            feeds.group_feed(self.group.id): self.group.posts.all(),
+            feeds.author_feed(self.author.id): self.author.posts.all(),
+        }
+
+    def tearDown(self):
+        """Не оставляем счётчиков другим тестам."""
+        cache.clear()
+
+    def warm(self):
+        for feed, queryset in self.feeds.items():
+            get_count(feed, queryset)
+
+    def cached(self, feed):
+        return cache.get(COUNT_KEY.format(feed))
+
+    def test_cold_count(self):
+        """Холодный кэш: точный счёт для фильтра и оценка для общей."""
+        for feed, queryset in self.feeds.items():
+            with self.subTest(feed=feed):
+                self.assertEqual(get_count(feed, queryset), 3)
+                self.assertEqual(self.cached(feed), 3)
+        last_id = Post.objects.order_by("-id").first().id
+        self.assertEqual(get_count(feeds.ALL, Post.objects.all()), last_id)
+
+    def test_estimate_once(self):
+        """Оценка общей ленты истекает, и дальше она считается точно."""
+        Post.objects.filter(pk=Post.objects.first().pk).delete()
+        cache.clear()
+        get_count(feeds.ALL, Post.objects.all())
+        cache.delete(COUNT_KEY.format(feeds.ALL))
+        self.assertEqual(get_count(feeds.ALL, Post.objects.all()), 2)
+        self.assertEqual(self.cached(feeds.ALL), 2)
+
+    def test_warm_count_without_queries(self):
+        """Тёплый счётчик не ходит в базу."""
+        self.warm()
+        with self.assertNumQueries(0):
+            for feed, queryset in self.feeds.items():
+                get_count(feed, queryset)
+
+    def test_create_and_delete(self):
+        """Создание и удаление поста сдвигают счётчики лент."""
+        self.warm()
+        post = Post.objects.create(
+            text="Новый пост", author=self.author, group=self.group
+        )
+        for feed in self.feeds:
+            with self.subTest(feed=feed):
+                self.assertEqual(self.cached(feed), 4)
+        post.delete()
+        for feed in self.feeds:
+            with self.subTest(feed=feed):
+                self.assertEqual(self.cached(feed), 3)
+
+    def test_move_to_other_group(self):
+        """Перенос поста в другую группу меняет счётчики обеих групп."""
+        get_count(feeds.group_feed(self.group.id), self.group.posts.all())
+        get_count(
+            feeds.group_feed(self.other_group.id),
+            self.other_group.posts.all(),
+        )
+        post = Post.objects.filter(group=self.group).first()
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.cached(feeds.group_feed(self.group.id)), 2)
+        self.assertEqual(
+            self.cached(feeds.group_feed(self.other_group.id)), 1
+        )
+
+    def test_create_then_save(self):
+        """Пост из формы, сохранённый ещё раз, не считается дважды."""
+        feed = feeds.group_feed(self.group.id)
+        get_count(feed, self.group.posts.all())
+        post = Post(text="Новый пост", author=self.author)
+        post.group = self.group
+        post.save()
+        post.save()
+        self.assertEqual(self.cached(feed), 4)
+        self.assertEqual(self.group.posts.count(), 4)
+
+    def test_follow_feed_uncounted(self):
+        """Ленту подписок считает COUNT, пост её счётчиков не трогает."""
+        feed = feeds.follow_feed(self.reader.id)
+        queryset = follow_feed(self.reader)
+        self.assertEqual(get_count(feed, queryset), 3)
+        self.assertIsNone(self.cached(feed))
+        Post.objects.create(text="Новый пост", author=self.author)
+        self.assertIsNone(self.cached(feed))
+        self.assertEqual(get_count(feed, queryset), 4)
+
+    def test_page_is_one_query(self):
+        """Страница ленты с тёплым счётчиком — один SELECT."""
+        self.warm()
+        request = RequestFactory().get("/")
+        with self.assertNumQueries(1):
+            context = paginate_posts(
+                request,
+                self.group.posts.all(),
+                feeds.group_feed(self.group.id),
+            )
+            self.assertEqual(len(context["page_obj"]), 3)
+            self.assertEqual(context["paginator"].count, 3)
+
+    def test_empty_tail_pages(self):
+        """Завышенная оценка не ведёт на пустые страницы в хвосте."""
+        for i in range(12):
+            Post.objects.create(text=f"Пост {i}", author=self.author)
+        # Удаляем старые посты: максимальный id остаётся прежним.
+        Post.objects.exclude(text__in=["Пост 10", "Пост 11"]).delete()
+        cache.clear()
+        request = RequestFactory().get("/", {"page": 2})
+        context = paginate_posts(request, Post.objects.all(), feeds.ALL)
+        self.assertEqual(context["page_obj"].number, 1)
+        self.assertEqual(len(context["page_obj"]), 2)
+        self.assertEqual(context["paginator"].num_pages, 1)
+
+
+class UserStatsTests(TestCase):
+    """Тесты денормализованных счётчиков пользователя."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+
+    def test_counters_follow_writes(self):
+        """Посты и подписки сдвигают счётчики в той же транзакции."""
+        post = Post.objects.create(text="Тестовый пост", author=self.author)
+        Follow.objects.create(user=self.reader, author=self.author)
+        author = UserStats.objects.get(user=self.author)
+        reader = UserStats.objects.get(user=self.reader)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(reader.following_count, 1)
+        post.delete()
+        Follow.objects.all().delete()
+        author.refresh_from_db()
+        reader.refresh_from_db()
+        self.assertEqual(author.posts_count, 0)
+        self.assertEqual(author.followers_count, 0)
+        self.assertEqual(reader.following_count, 0)
+
+    def test_delete_followed_author(self):
+        """Удаление автора с подписчиками не оставляет его счётчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        author_id = self.author.id
+        User.objects.filter(pk=author_id).delete()
+        self.assertFalse(UserStats.objects.filter(user_id=author_id).exists())
+        connection.check_constraints()
+
+    def test_profile_does_not_count_posts(self):
+        """Профиль и пост берут число постов из счётчика, а не COUNT."""
+        post = Post.objects.create(text="Тестовый пост", author=self.author)
+        urls = (
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(post.id,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.context["posts_count"], 1)
+                self.assertFalse(
+                    any(
+                        "COUNT(" in query["sql"].upper()
+                        for query in queries.captured_queries
+                    )
+                )
+
+    def test_rebuild_counters(self):
+        """Команда находит и исправляет расхождения счётчиков."""
+        Post.objects.bulk_create(
+            Post(text=f"Тестовый пост {i}", author=self.author)
+            for i in range(3)
+        )
+        UserStats.objects.filter(user=self.author).delete()
+        UserStats.objects.create(user=self.author, posts_count=7)
+        out = StringIO()
+        call_command("rebuild_counters", "--check", stdout=out)
+        self.assertIn("расходятся: 1", out.getvalue())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 7
+        )
+        call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertEqual(UserStats.objects.count(), User.objects.count())
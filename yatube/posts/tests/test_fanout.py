@@ -0,0 +1,125 @@
+from io import StringIO
+from itertools import chain
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import caching, fanout, feeds
+from posts.fanout import follow_feed
+from posts.models import Follow, Inbox, Post, UserStats
+
+User = get_user_model()
+
+
+class FollowInboxTests(TestCase):
+    """Тесты материализованной ленты подписок."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.post = Post.objects.create(text="Старый пост", author=cls.author)
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self):
+        self.client.get(
+            reverse("posts:profile_follow", args=(self.author.username,))
+        )
+
+    def test_follow_backfills_and_post_fans_out(self):
+        """Подписка добавляет старые посты, новый пост раскладывается."""
+        self.follow()
+        self.assertTrue(
+            Inbox.objects.filter(user=self.reader, post=self.post).exists()
+        )
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post, self.post])
+
+    def test_unfollow_prunes(self):
+        """Отписка убирает посты автора из ленты."""
+        self.follow()
+        self.client.get(
+            reverse("posts:profile_unfollow", args=(self.author.username,))
+        )
+        self.assertFalse(Inbox.objects.filter(user=self.reader).exists())
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(len(response.context["page_obj"]), 0)
+
+    def test_post_bumps_author_feed(self):
+        """Пост сдвигает версию ленты автора, а не лент подписчиков."""
+        self.follow()
+        url = reverse("posts:follow_index")
+        self.client.get(url)
+        with mock.patch.object(caching, "bump", wraps=caching.bump) as bump:
+            post = Post.objects.create(text="Новый пост", author=self.author)
+        bumped = set(
+            chain.from_iterable(args[0] for args, _ in bump.call_args_list)
+        )
+        self.assertIn(feeds.author_feed(self.author.id), bumped)
+        self.assertNotIn(feeds.follow_feed(self.reader.id), bumped)
+        response = self.client.get(url)
+        self.assertEqual(list(response.context["page_obj"]), [post, self.post])
+
+    def test_feed_reads_only_inbox(self):
+        """Без популярных авторов лента читается из неё одной."""
+        self.follow()
+        sql = str(follow_feed(self.reader).query)
+        self.assertIn("posts_inbox", sql)
+        self.assertNotIn("posts_follow", sql)
+
+    @override_settings(POSTS_FANOUT_THRESHOLD=1)
+    def test_celebrity_is_read_on_request(self):
+        """Посты автора выше порога не раскладываются, но видны в ленте."""
+        self.follow()
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(Inbox.objects.filter(user=self.reader).exists())
+        response = self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post, self.post])
+        response = self.client.get(
+            reverse("api:follow_index"), {"limit": 1, "fields": "id"}
+        )
+        self.assertEqual(response.json()["results"], [{"id": post.id}])
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(response.json()["results"], [{"id": self.post.id}])
+
+    @override_settings(
+        POSTS_FANOUT_THRESHOLD=2, POSTS_FANOUT_LEAVE_THRESHOLD=1
+    )
+    def test_celebrity_hysteresis(self):
+        """Отписка у порога не перекладывает ленты, ниже границы — в фоне."""
+        other = User.objects.create_user(username="Other")
+        Follow.objects.create(user=other, author=self.author)
+        self.follow()
+        self.assertTrue(fanout.is_celebrity(self.author.id))
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        with mock.patch.object(fanout, "schedule_refill") as schedule:
+            for _ in range(2):
+                Follow.objects.filter(user=self.reader).delete()
+                self.follow()
+            schedule.assert_not_called()
+            Follow.objects.filter(user=other).delete()
+            Follow.objects.filter(user=self.reader).delete()
+            schedule.assert_called_once_with(self.author.id)
+        self.assertFalse(UserStats.objects.get(user=self.author).celebrity)
+        Follow.objects.create(user=other, author=self.author)
+        Inbox.objects.filter(user=other).delete()
+        fanout.refill_author(self.author.id)
+        self.assertEqual(list(follow_feed(other)), [post, self.post])
+
+    def test_rebuild_inbox(self):
+        """Команда собирает ленты по текущим подпискам."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Inbox.objects.all().delete()
+        call_command("rebuild_inbox", stdout=StringIO())
+        self.assertEqual(list(follow_feed(self.reader)), [self.post])
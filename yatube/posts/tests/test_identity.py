@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import identity
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class IdentityMapTests(TestCase):
+    """Тесты кэша групп и пользователей."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username="Author", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый пост", author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_read_through(self):
+        """Первое чтение идёт в базу, следующие — из кэша."""
+        with self.assertNumQueries(2):
+            group = identity.groups.get("test-slug")
+            identity.users.get("Author")
+        with self.assertNumQueries(0):
+            self.assertEqual(identity.groups.get("test-slug"), group)
+            author = identity.users.get_or_404("Author")
+        self.assertEqual(group.title, "Тестовая группа")
+        self.assertEqual(author.get_full_name(), "Лев Толстой")
+
+    def test_missing(self):
+        """Несуществующий адрес помнится, пока его не создадут."""
+        url = reverse("posts:profile", args=("Nobody",))
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                identity.users.get_or_404("Nobody")
+        User.objects.create_user(username="Nobody")
+        self.assertEqual(self.guest_client.get(url).status_code, 200)
+
+    def test_invalidation(self):
+        """Смена адреса и названия группы видна сразу."""
+        identity.groups.get("test-slug")
+        self.group.slug = "new-slug"
+        self.group.title = "Новое название"
+        self.group.save()
+        self.assertIsNone(identity.groups.get("test-slug"))
+        self.assertEqual(
+            identity.groups.get("new-slug").title, "Новое название"
+        )
+        self.group.delete()
+        self.assertIsNone(identity.groups.get("new-slug"))
+
+    def test_attach(self):
+        """Авторы и группы постов подставляются пачкой без JOIN."""
+        posts = list(Post.objects.all())
+        identity.attach(posts)
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(0):
+            identity.attach(posts)
+            self.assertEqual(posts[0].author.username, "Author")
+            self.assertEqual(posts[0].group.slug, "test-slug")
+
+    def test_views(self):
+        """Страницы группы и автора берут их из кэша."""
+        cases = (
+            ("posts:group_list", identity.groups, "test-slug"),
+            ("posts:profile", identity.users, "Author"),
+            ("api:group_list", identity.groups, "test-slug"),
+            ("api:profile", identity.users, "Author"),
+        )
+        for route, objects, value in cases:
+            with self.subTest(route=route):
+                cache.clear()
+                url = reverse(route, args=(value,))
+                self.assertEqual(self.guest_client.get(url).status_code, 200)
+                with self.assertNumQueries(0):
+                    objects.get(value)
@@ -0,0 +1,93 @@
+import random
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+from posts import search
+from posts.loadtest import (
+    ROUTES,
+    WRITE_ROUTES,
+    InProcessClient,
+    Sample,
+    run,
+)
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class LoadTestTests(TransactionTestCase):
+    """Тесты генератора данных и нагрузочного прогона.
+
+    Клиенты работают в потоках со своими соединениями, поэтому данные
+    должны быть закоммичены: обычный TestCase держит их в транзакции.
+    """
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        call_command(
+            "generate_dataset",
+            users=20,
+            groups=3,
+            posts=200,
+            comments=100,
+            follows=30,
+            batch_size=50,
+            stdout=StringIO(),
+        )
+
+    def tearDown(self):
+        """Индекс поиска не модель: очищаем его сами."""
+        Post.objects.all().delete()
+        search.rebuild()
+        cache.clear()
+
+    def test_generate_dataset(self):
+        """Данные созданы, производные пересобраны, авторы перекошены."""
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertEqual(Follow.objects.count(), 30)
+        self.assertTrue(
+            Post.objects.filter(
+                pub_date__lt=timezone.now() - timedelta(days=1)
+            ).exists()
+        )
+        posts = Counter(Post.objects.values_list("author_id", flat=True))
+        (top, top_count), = posts.most_common(1)
+        median = sorted(posts.values())[len(posts) // 2]
+        self.assertGreater(top_count, 3 * median)
+        self.assertEqual(
+            UserStats.objects.get(user_id=top).posts_count, top_count
+        )
+        self.assertEqual(search.rebuild(), 200)
+        self.assertTrue(User.objects.first().check_password("yatube"))
+
+    def test_run_in_process(self):
+        """Каждый маршрут отвечает без ошибок, отчёт по маршрутам."""
+        sample = Sample(random.Random(0))
+        routes = [name for name in ROUTES if name not in WRITE_ROUTES]
+        report = run(InProcessClient, sample, routes, 3, 40)
+        rows = {row[0]: row for row in report.rows()}
+        self.assertEqual(rows["всего"][1], 120)
+        self.assertEqual(rows["всего"][2], 0)
+        self.assertEqual(set(rows) - {"всего"}, set(routes))
+        for name, count, errors, rps, p50, p95, p99 in rows.values():
+            self.assertLessEqual(p50, p95)
+            self.assertLessEqual(p95, p99)
+
+    def test_command(self):
+        """Команда по умолчанию не ходит в пишущие маршруты."""
+        out = StringIO()
+        call_command("loadtest", clients=2, requests=20, stdout=out)
+        report = out.getvalue()
+        self.assertIn("всего", report)
+        for name in WRITE_ROUTES:
+            self.assertNotIn(name, report)
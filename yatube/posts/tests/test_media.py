@@ -0,0 +1,134 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+from core.storage import CONTENT_NAME
+from posts import media, search, thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+
+def image_bytes(color="teal"):
+    buffer = BytesIO()
+    Image.new("RGB", (1000, 400), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def make_image(name="photo.PNG", color="teal"):
+    return SimpleUploadedFile(
+        name=name, content=image_bytes(color), content_type="image/png"
+    )
+
+
+class MediaStorageTests(TransactionTestCase):
+    """Тесты хранения картинок по содержимому."""
+
+    def setUp(self):
+        """Фикстуры: временный MEDIA_ROOT."""
+        cache.clear()
+        self.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.user = User.objects.create_user(username="Name")
+
+    def tearDown(self):
+        """Убираем файлы и посты из поискового индекса."""
+        Post.objects.all().delete()
+        search.rebuild()
+        self.settings.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create(self, image):
+        return Post.objects.create(author=self.user, text="Пост", image=image)
+
+    def test_content_names(self):
+        """Имя — хэш содержимого в шарде, одинаковые файлы хранятся раз."""
+        first = self.create(make_image())
+        second = self.create(make_image("copy.png"))
+        other = self.create(make_image(color="red"))
+        name = first.image.name
+        self.assertRegex(name, r"^posts/[0-9a-f]{2}/[0-9a-f]{2}/")
+        self.assertTrue(name.endswith(".png"))
+        self.assertTrue(CONTENT_NAME.search(name))
+        self.assertEqual(second.image.name, name)
+        self.assertNotEqual(other.image.name, name)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_reference_counting(self):
+        """Файл удаляется вместе с последним ссылающимся на него постом."""
+        first = self.create(make_image())
+        second = self.create(make_image())
+        name = first.image.name
+        thumbnails.generate(first.id, name)
+        first.delete()
+        self.assertTrue(default_storage.exists(name))
+        second.image = make_image(color="red")
+        second.save()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(
+            default_storage.exists(thumbnails.thumbnail_name(name))
+        )
+
+    def test_pending_upload_keeps_file(self):
+        """Файл, отданный незафиксированной загрузке, не удаляется."""
+        storage = media.image_storage()
+        with transaction.atomic():
+            name = storage.save("posts/photo.png", ContentFile(image_bytes()))
+            self.assertFalse(media.release(name))
+            self.assertTrue(storage.exists(name))
+        self.assertTrue(media.release(name))
+        self.assertFalse(storage.exists(name))
+
+    def test_thumbnails_reused(self):
+        """Повторная загрузка не пересоздаёт готовые миниатюры."""
+        post = self.create(make_image())
+        thumbnails.generate(post.id, post.image.name)
+        again = self.create(make_image())
+        with mock.patch.object(thumbnails, "render") as render:
+            thumbnails.generate(again.id, again.image.name, reuse=True)
+        render.assert_not_called()
+        again.refresh_from_db()
+        self.assertEqual(again.thumbnail_of, again.image.name)
+
+    def test_shard_media(self):
+        """Команда переносит плоский каталог в шарды и склеивает копии."""
+        names = [
+            default_storage.save(f"posts/{name}", ContentFile(image_bytes()))
+            for name in ("a.png", "b.png")
+        ]
+        posts = [self.create(name) for name in names + names[:1]]
+        thumbnails.generate(posts[0].id, names[0])
+        out = StringIO()
+        call_command("shard_media", batch_size=1, workers=2, stdout=out)
+        self.assertIn(
+            "Файлов перенесено: 2, из них одинаковых: 1, "
+            "постов переписано: 3, с ошибками: 0",
+            out.getvalue(),
+        )
+        target = media.image_storage().content_name(
+            "posts/a.png", ContentFile(image_bytes())
+        )
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.image.name, target)
+        self.assertEqual(posts[0].thumbnail_of, target)
+        self.assertTrue(
+            default_storage.exists(thumbnails.thumbnail_name(target))
+        )
+        for name in names:
+            self.assertFalse(default_storage.exists(name))
+            self.assertFalse(
+                default_storage.exists(thumbnails.thumbnail_name(name))
+            )
@@ -0,0 +1,141 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from posts import search
+from posts.fanout import follow_feed
+from posts.models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+PUB_DATE = datetime(2020, 5, 17, 10, 30, tzinfo=timezone.utc)
+
+
+class NdjsonTests(TestCase):
+    """Тесты выгрузки и загрузки NDJSON."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Author")
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="Описание"
+        )
+        for i in range(3):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f"Старый пост {i}"
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text=f"Комментарий {i}"
+            )
+        Post.objects.update(pub_date=PUB_DATE)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "dump.ndjson")
+
+    def tearDown(self):
+        """Убираем файл выгрузки и кэш."""
+        self.directory.cleanup()
+        cache.clear()
+
+    def test_export(self):
+        """Каждая строка — запись, ссылки по username и slug."""
+        call_command("export_ndjson", output=self.path, stderr=StringIO())
+        with open(self.path, encoding="utf-8") as dump:
+            records = [json.loads(line) for line in dump]
+        self.assertEqual(
+            [record["model"] for record in records],
+            ["group"] + ["post"] * 3 + ["comment"] * 3 + ["follow"],
+        )
+        self.assertEqual(
+            records[0],
+            {
+                "model": "group",
+                "slug": "test-slug",
+                "title": "Тестовая группа",
+                "description": "Описание",
+            },
+        )
+        self.assertEqual(records[1]["author"], "Author")
+        self.assertEqual(records[1]["group"], "test-slug")
+        self.assertEqual(
+            records[-1],
+            {"model": "follow", "user": "Reader", "author": "Author"},
+        )
+
+    def test_round_trip(self):
+        """Загрузка в пустую базу восстанавливает данные и производные."""
+        call_command("export_ndjson", output=self.path, stderr=StringIO())
+        expected = list(
+            Post.objects.values_list("id", "text", "pub_date", "group__slug")
+        )
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+        out = StringIO()
+        call_command("import_ndjson", self.path, batch_size=2, stdout=out)
+        self.assertIn(
+            "group: 1, post: 3, comment: 3, follow: 1", out.getvalue()
+        )
+        self.assertIn("новых пользователей: 2, групп: 1", out.getvalue())
+        group = Group.objects.get(slug="test-slug")
+        self.assertEqual(group.title, "Тестовая группа")
+        self.assertEqual(group.description, "Описание")
+        self.assertEqual(
+            list(
+                Post.objects.values_list(
+                    "id", "text", "pub_date", "group__slug"
+                )
+            ),
+            expected,
+        )
+        self.assertEqual(Comment.objects.count(), 3)
+        author = User.objects.get(username="Author")
+        reader = User.objects.get(username="Reader")
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(UserStats.objects.for_user(author.id).posts_count, 3)
+        self.assertEqual(follow_feed(reader).count(), 3)
+        self.assertEqual(
+            len(search.SearchPaginator("старый", 10).page()), 3
+        )
+
+    def test_existing_follow(self):
+        """Подписка, которая уже есть в базе, не ломает загрузку."""
+        created = "2019-01-02T03:04:05Z"
+        post = Post.objects.first()
+        with open(self.path, "w", encoding="utf-8") as dump:
+            for record in (
+                {"model": "follow", "user": "Reader", "author": "Author"},
+                {
+                    "model": "comment",
+                    "id": 1000,
+                    "post": post.id,
+                    "author": "Reader",
+                    "text": "Из файла",
+                    "created": created,
+                },
+            ):
+                dump.write(json.dumps(record) + "\n")
+        call_command(
+            "import_ndjson", self.path, no_rebuild=True, stdout=StringIO()
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(
+            Comment.objects.get(id=1000).created,
+            datetime(2019, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.author, text="Новый"
+        )
+        self.assertGreater(comment.created, PUB_DATE)
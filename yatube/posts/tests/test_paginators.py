@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+from posts.paginators import CursorPaginator
+
+User = get_user_model()
+TEST_OF_POST: int = 25
+PER_PAGE: int = 10
+
+
+class CursorPaginatorTests(TestCase):
+    """Тесты курсорного паджинатора."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        Post.objects.bulk_create(
+            Post(text=f"Тестовый пост {i}", author=cls.user)
+            for i in range(TEST_OF_POST)
+        )
+        cls.posts = list(Post.objects.order_by("-pub_date", "-id"))
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+
+    def tearDown(self):
+        """Не оставляем закэшированных страниц другим тестам."""
+        cache.clear()
+
+    def test_pages_follow_each_other(self):
+        """Страницы по курсору идут подряд без пропусков и повторов."""
+        page = self.paginator.page()
+        seen = list(page)
+        while page.has_next():
+            page = self.paginator.page(after=page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(seen, self.posts)
+        self.assertEqual(len(page), TEST_OF_POST % PER_PAGE)
+
+    def test_previous_page(self):
+        """Курсор before возвращает предыдущую страницу."""
+        first = self.paginator.page()
+        second = self.paginator.page(after=first.next_cursor)
+        back = self.paginator.page(before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor(self):
+        """Битый курсор отдаёт первую страницу."""
+        page = self.paginator.get_page(after="не-курсор")
+        self.assertEqual(list(page), self.posts[:PER_PAGE])
+        self.assertFalse(page.has_previous())
+
+    def test_cursor_page_has_no_count_query(self):
+        """Глубокая страница — один запрос без COUNT и OFFSET."""
+        cursor = self.paginator.encode_cursor(self.posts[PER_PAGE - 1])
+        with self.assertNumQueries(1) as queries:
+            list(self.paginator.page(after=cursor))
+        sql = queries.captured_queries[0]["sql"].upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_views_use_cursor_pagination(self):
+        """Ленты отдают страницы по курсору, если режим включён."""
+        client = Client()
+        response = client.get(reverse("posts:index"))
+        page = response.context["page_obj"]
+        self.assertEqual(list(page), self.posts[:PER_PAGE])
+        self.assertContains(response, f"?after={page.next_cursor}")
+        response = client.get(
+            reverse("posts:profile", kwargs={"username": self.user.username}),
+            {"after": page.next_cursor},
+        )
+        self.assertEqual(
+            list(response.context["page_obj"]),
+            self.posts[PER_PAGE:PER_PAGE * 2],
+        )
@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.middleware.queries import QueryRecorder, load_budgets
+from posts.models import Comment, Follow, Group, Post
+from posts.urls import app_name, urlpatterns
+
+User = get_user_model()
+TEST_OF_POST: int = 12
+FOLLOWERS: int = 20
+
+
+class QueryBudgetTests(TestCase):
+    """Бюджеты запросов маршрутов posts и поиск N+1."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Reader")
+        cls.groups = [
+            Group.objects.create(
+                title=f"Группа {i}", slug=f"group-{i}", description="Описание"
+            )
+            for i in range(3)
+        ]
+        cls.authors = [
+            User.objects.create_user(username=f"Author{i}") for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+        for i in range(TEST_OF_POST):
+            Post.objects.create(
+                text=f"Тестовый пост {i}",
+                author=cls.authors[i % 3],
+                group=cls.groups[i % 3],
+            )
+        cls.post = Post.objects.filter(author=cls.authors[0]).first()
+        for author in cls.authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text="Комментарий"
+            )
+        cls.own_post = Post.objects.create(
+            text="Пост читателя", author=cls.user, group=cls.groups[0]
+        )
+        # Автор, на которого читатель ещё не подписан: подписка на него
+        # проходит весь путь (лента, счётчики, теги). У него, как и у
+        # настоящих авторов, есть другие подписчики.
+        cls.stranger = User.objects.create_user(username="Stranger")
+        for i in range(3):
+            Post.objects.create(
+                text=f"Пост {i}", author=cls.stranger, group=cls.groups[2]
+            )
+        for i in range(FOLLOWERS):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f"Follower{i}"),
+                author=cls.stranger,
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        """Не оставляем закэшированных фрагментов другим тестам."""
+        cache.clear()
+
+    def requests(self):
+        """Запрос к каждому именованному маршруту: (метод, url, данные)."""
+        author = self.authors[1].username
+        return {
+            "index": ("get", reverse("posts:index"), None),
+            "group_list": (
+                "get",
+                reverse("posts:group_list", args=(self.groups[0].slug,)),
+                None,
+            ),
+            "profile": ("get", reverse("posts:profile", args=(author,)), None),
+            "post_detail": (
+                "get",
+                reverse("posts:post_detail", args=(self.post.id,)),
+                None,
+            ),
+            "post_comments": (
+                "get",
+                reverse("posts:post_comments", args=(self.post.id,)),
+                None,
+            ),
+            "post_create": (
+                "post",
+                reverse("posts:post_create"),
+                {"text": "Новый пост", "group": self.groups[1].id},
+            ),
+            "post_edit": (
+                "post",
+                reverse("posts:post_edit", args=(self.own_post.id,)),
+                {"text": "Исправленный пост"},
+            ),
+            "add_comment": (
+                "post",
+                reverse("posts:add_comment", args=(self.post.id,)),
+                {"text": "Новый комментарий"},
+            ),
+            "search": (
+                "get",
+                reverse("posts:search"),
+                {"q": "тестовый", "group": self.groups[0].slug},
+            ),
+            "follow_index": ("get", reverse("posts:follow_index"), None),
+            "profile_follow": (
+                "get",
+                reverse(
+                    "posts:profile_follow", args=(self.stranger.username,)
+                ),
+                None,
+            ),
+            "profile_unfollow": (
+                "get",
+                reverse("posts:profile_unfollow", args=(author,)),
+                None,
+            ),
+        }
+
+    def test_every_route_has_budget(self):
+        """У каждого именованного маршрута posts есть бюджет."""
+        budgets = load_budgets()
+        for pattern in urlpatterns:
+            with self.subTest(route=pattern.name):
+                self.assertIn(f"{app_name}:{pattern.name}", budgets)
+                self.assertIn(pattern.name, self.requests())
+
+    def test_budgets(self):
+        """Маршруты укладываются в бюджет и не делают N+1."""
+        budgets = load_budgets()
+        for name, (method, url, data) in self.requests().items():
+            route = f"{app_name}:{name}"
+            with self.subTest(route=route):
+                cache.clear()
+                with QueryRecorder() as recorder:
+                    getattr(self.client, method)(url, data)
+                self.assertLessEqual(
+                    recorder.count,
+                    budgets[route],
+                    "\n".join(query.sql for query in recorder.queries),
+                )
+                self.assertEqual(recorder.n_plus_one(), [])
+
+    def test_headers(self):
+        """Итог по запросам приходит в заголовках ответа."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertGreater(int(response["X-DB-Queries"]), 0)
+        self.assertIn("X-DB-Time", response)
+        self.assertEqual(response["X-DB-N-Plus-One"], "0")
+
+    def test_detects_n_plus_one(self):
+        """Повторы одного запроса из цикла находятся с местом вызова."""
+        with QueryRecorder() as recorder:
+            for post in Post.objects.all():
+                post.group.title
+        ((shape, repeats, origins),) = recorder.n_plus_one()
+        self.assertEqual(repeats, Post.objects.count())
+        self.assertIn('FROM "posts_group"', shape)
+        self.assertIn("posts/tests/test_query_budgets.py", origins[0])
+
+    def test_template_origin(self):
+        """Запрос из шаблона помечается именем шаблона и строкой."""
+        with QueryRecorder() as recorder:
+            self.client.get(
+                reverse("posts:post_detail", args=(self.post.id,))
+            )
+        origins = " ".join(query.origin for query in recorder.queries)
+        self.assertIn("includes/comment.html", origins)
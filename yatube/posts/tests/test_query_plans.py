@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import media, thumbnails
+from posts.models import Comment, Follow, Group, Post, UserStats
+from posts.paginators import CursorPaginator
+
+User = get_user_model()
+TEST_OF_POST: int = 25
+
+
+class QueryPlanTests(TestCase):
+    """Планы запросов лент: без полного просмотра таблиц и сортировки."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(TEST_OF_POST):
+            Post.objects.create(
+                text=f"Тестовый пост {i}", author=cls.author, group=cls.group
+            )
+        # Популярный автор читается при запросе (posts.fanout).
+        cls.celebrity = User.objects.create_user(username="Celebrity")
+        cls.fan = User.objects.create_user(username="Fan")
+        for author in (cls.author, cls.celebrity):
+            Follow.objects.create(user=cls.fan, author=author)
+        UserStats.objects.filter(user=cls.celebrity).update(celebrity=True)
+        for i in range(TEST_OF_POST):
+            Post.objects.create(
+                text=f"Пост популярного автора {i}", author=cls.celebrity
+            )
+        cls.post = Post.objects.filter(author=cls.author).first()
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f"Комментарий {i}"
+            )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        """Не оставляем закэшированных страниц другим тестам."""
+        cache.clear()
+
+    def urls(self):
+        return (
+            reverse("posts:index"),
+            reverse("posts:index") + "?page=2",
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(self.post.id,)),
+            reverse("posts:follow_index"),
+            reverse("posts:follow_index") + "?page=2",
+        )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_plans(self, url, client=None, ranged=False):
+        """Ни временных сортировок, ни полного просмотра таблиц.
+
+        SCAN допустим только как обход индекса по порядку, который
+        обрывает LIMIT; страницы по курсору (ranged) читают диапазон
+        индекса, то есть только SEARCH.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            (client or self.client).get(url)
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or "posts_" not in sql:
+                continue
+            for step in self.explain(sql):
+                with self.subTest(url=url, step=step, sql=sql):
+                    self.assertNotIn("TEMP B-TREE", step)
+                    # Обход подзапроса COUNT(*) не читает таблицу:
+                    # его собственные шаги проверяются отдельно.
+                    if not step.startswith("SCAN") or "subquery" in step:
+                        continue
+                    self.assertFalse(ranged)
+                    self.assertIn("USING INDEX", step)
+                    self.assertIn("LIMIT", sql)
+
+    def test_feed_plans(self):
+        """Запросы страниц идут по индексам."""
+        for url in self.urls():
+            self.assert_plans(url)
+
+    def test_celebrity_follow_plans(self):
+        """Лента с популярным автором сливает ветки, а не сортирует."""
+        fan = Client()
+        fan.force_login(self.fan)
+        for page in (1, 2, 3):
+            self.assert_plans(
+                f"{reverse('posts:follow_index')}?page={page}", fan
+            )
+        response = fan.get(reverse("posts:follow_index"))
+        self.assertEqual(
+            [post.id for post in response.context["page_obj"]],
+            list(
+                Post.objects.filter(
+                    author__in=(self.author, self.celebrity)
+                ).values_list("id", flat=True)[:10]
+            ),
+        )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_feed_plans(self):
+        """Курсорные страницы тоже читают диапазон индекса."""
+        cursor = CursorPaginator(Post.objects.all(), 10).encode_cursor(
+            Post.objects.filter(author=self.author)[9]
+        )
+        fan = Client()
+        fan.force_login(self.fan)
+        for url in self.urls():
+            for client in (self.client, fan):
+                self.assert_plans(
+                    f"{url.split('?')[0]}?after={cursor}", client, True
+                )
+                self.assert_plans(
+                    f"{url.split('?')[0]}?before={cursor}", client, True
+                )
+
+    def test_image_plans(self):
+        """Посты по имени картинки ищутся по индексу, без сортировки."""
+        name = f"posts/ab/cd/{'ab' * 32}.png"
+        with CaptureQueriesContext(connection) as queries:
+            media.release(name)
+            thumbnails.ready_width(name)
+            list(media.legacy_names(10))
+            media.rewrite({name: "posts/moved.png"})
+        statements = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("SELECT", "UPDATE"))
+            and "posts_post" in query["sql"]
+        ]
+        self.assertEqual(len(statements), 5)
+        for sql in statements:
+            plan = self.explain(sql)
+            with self.subTest(sql=sql, plan=plan):
+                self.assertTrue(
+                    any("post_image_idx" in step for step in plan)
+                )
+                self.assertFalse(any("TEMP B-TREE" in step for step in plan))
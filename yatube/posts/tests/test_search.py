@@ -0,0 +1,137 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Тесты полнотекстового поиска."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        cls.other = User.objects.create_user(username="Other")
+        cls.group = Group.objects.create(
+            title="Тестовая группа", slug="test-slug", description="Описание"
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text="Утром над рекой стоял туман, а потом выглянуло солнце",
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other, text="Туман туман туман"
+        )
+
+    def setUp(self):
+        """Фикстуры."""
+        self.client = Client()
+
+    def find(self, text, **filters):
+        return [
+            post.id
+            for post in search.SearchPaginator(text, 10, **filters).page()
+        ]
+
+    def test_match_query(self):
+        """Операторы FTS5 и кавычки во вводе не ломают запрос."""
+        self.assertEqual(
+            search.match_query('ТУМАН" OR -'), '"ТУМАН"* "OR"*'
+        )
+        self.assertEqual(search.match_query("  ?! "), "")
+        self.assertEqual(self.find('туман" OR NEAR('), [])
+
+    def test_ranked(self):
+        """Пост с большим числом совпадений выше, регистр не важен."""
+        self.assertEqual(
+            self.find("ТУМАН"), [self.other_post.id, self.post.id]
+        )
+        self.assertEqual(self.find("рек"), [self.post.id])
+
+    def test_filters(self):
+        """Результаты фильтруются по группе и автору."""
+        self.assertEqual(
+            self.find("туман", group=self.group), [self.post.id]
+        )
+        self.assertEqual(
+            self.find("туман", author=self.other), [self.other_post.id]
+        )
+
+    def test_index_follows_posts(self):
+        """Правка и удаление поста сразу видны в поиске."""
+        self.post.text = "Ясный день"
+        self.post.save()
+        self.assertEqual(self.find("туман"), [self.other_post.id])
+        self.assertEqual(self.find("ясный"), [self.post.id])
+        Post.objects.filter(pk=self.other_post.pk).delete()
+        self.assertEqual(self.find("туман"), [])
+
+    def test_cursor(self):
+        """Выдача листается курсором без повторов."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f"Облако номер {i}")
+            for i in range(5)
+        )
+        search.rebuild()
+        paginator = search.SearchPaginator("облако", 2)
+        seen = []
+        page = paginator.page()
+        while True:
+            seen += [post.id for post in page]
+            if not page.has_next():
+                break
+            page = paginator.page(after=page.next_cursor)
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_view(self):
+        """Страница поиска подсвечивает совпадения и экранирует текст."""
+        Post.objects.create(author=self.user, text="<b>Ночной</b> туман")
+        response = self.client.get(
+            reverse("posts:search"), {"q": "ночной"}
+        )
+        self.assertContains(response, "&lt;b&gt;<mark>Ночной</mark>")
+        self.assertNotContains(response, "<b>Ночной")
+        response = self.client.get(
+            reverse("posts:search"), {"q": "туман", "author": "Nobody"}
+        )
+        self.assertContains(response, "Такого автора нет")
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по тому же индексу."""
+        admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "РЕК"}
+        )
+        self.assertEqual(
+            list(response.context["cl"].result_list), [self.post]
+        )
+
+    def test_admin_finds_all(self):
+        """Поиск в админке находит все подходящие посты, а не первый."""
+        admin = User.objects.create_superuser("admin", "a@a.ru", "pass")
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("admin:posts_post_changelist"), {"q": "туман"}
+        )
+        self.assertEqual(
+            set(response.context["cl"].result_list),
+            {self.post, self.other_post},
+        )
+
+    def test_rebuild_search(self):
+        """Команда восстанавливает индекс после записей в обход ORM."""
+        Post.objects.filter(pk=self.post.pk).update(text="Тихий вечер")
+        out = StringIO()
+        call_command("rebuild_search", stdout=out)
+        self.assertIn("Постов в индексе: 2", out.getvalue())
+        self.assertEqual(self.find("вечер"), [self.post.id])
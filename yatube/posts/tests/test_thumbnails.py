@@ -0,0 +1,197 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name="photo.png", size=(1600, 800)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, "PNG")
+    return SimpleUploadedFile(
+        name=name, content=buffer.getvalue(), content_type="image/png"
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    """Тесты фоновых миниатюр."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user, text="Тестовый пост", image=make_image()
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        """Не оставляем закэшированных карточек другим тестам."""
+        cache.clear()
+
+    def test_generate(self):
+        """Миниатюра получает предсказуемое имя и нужный размер."""
+        name = self.post.image.name
+        thumbnails.generate(self.post.id, name)
+        target = thumbnails.thumbnail_name(name)
+        self.assertEqual(target, f"thumbs/{name[:-4]}_960x339.jpg")
+        with default_storage.open(target) as thumb:
+            self.assertEqual(Image.open(thumb).size, (960, 339))
+        for width in thumbnails.WIDTHS:
+            for image_format in thumbnails.FORMATS:
+                with self.subTest(width=width, image_format=image_format):
+                    variant = thumbnails.variant_name(
+                        name, width, image_format
+                    )
+                    with default_storage.open(variant) as thumb:
+                        image = Image.open(thumb)
+                        self.assertEqual(image.format, image_format)
+                        self.assertEqual(image.width, width)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_of, name)
+        thumbnails.generate(self.post.id, name)
+        self.assertTrue(default_storage.exists(target))
+
+    def test_pages_do_not_wait(self):
+        """До готовности миниатюры страница показывает картинку."""
+        url = reverse("posts:post_detail", args=(self.post.id,))
+        self.assertContains(self.client.get(url), self.post.image.url)
+        thumbnails.generate(self.post.id, self.post.image.name)
+        thumb_url = default_storage.url(
+            thumbnails.thumbnail_name(self.post.image.name)
+        )
+        self.assertContains(self.client.get(url), thumb_url)
+
+    def test_picture_markup(self):
+        """Готовые варианты выводятся через srcset каждого формата."""
+        url = reverse("posts:post_detail", args=(self.post.id,))
+        self.assertNotContains(self.client.get(url), "<source")
+        thumbnails.generate(self.post.id, self.post.image.name)
+        response = self.client.get(url)
+        for image_format in thumbnails.FORMATS:
+            with self.subTest(image_format=image_format):
+                self.assertContains(
+                    response, thumbnails.ENCODERS[image_format][1]
+                )
+        small = thumbnails.variant_name(self.post.image.name, 480)
+        self.assertContains(response, f"{default_storage.url(small)} 480w")
+
+    def test_card_switches_to_thumbnail(self):
+        """Готовая миниатюра сбрасывает карточку поста в кэше."""
+        url = reverse("posts:index")
+        self.assertContains(self.client.get(url), self.post.image.url)
+        thumbnails.generate(self.post.id, self.post.image.name)
+        self.assertContains(
+            self.client.get(url),
+            thumbnails.thumbnail_name(self.post.image.name),
+        )
+
+    def test_stale_thumbnail_ignored(self):
+        """Миниатюра старой картинки не показывается для новой."""
+        thumbnails.generate(self.post.id, self.post.image.name)
+        self.post.image = make_image("other.png")
+        self.post.save()
+        self.post.refresh_from_db()
+        self.assertEqual(
+            thumbnails.thumbnail_url(self.post), self.post.image.url
+        )
+
+    def test_small_source_not_upscaled(self):
+        """Варианты шире исходника не делаются и не попадают в srcset."""
+        post = Post.objects.create(
+            author=self.user, text="Узкая", image=make_image(size=(700, 300))
+        )
+        name = post.image.name
+        thumbnails.generate(post.id, name)
+        post.refresh_from_db()
+        self.assertEqual(post.image_width, 700)
+        small = thumbnails.variant_name(name, 480)
+        self.assertEqual(thumbnails.thumbnail_name(name, 700), small)
+        self.assertTrue(default_storage.exists(small))
+        self.assertFalse(
+            default_storage.exists(thumbnails.variant_name(name, 960))
+        )
+        self.assertEqual(
+            thumbnails.thumbnail_url(post), default_storage.url(small)
+        )
+        srcset = thumbnails.sources(post)[0]["srcset"]
+        self.assertEqual(srcset, f"{default_storage.url(small)} 480w")
+
+    def test_tiny_source_served_as_is(self):
+        """Картинка уже всех вариантов показывается сама."""
+        post = Post.objects.create(
+            author=self.user, text="Иконка", image=make_image(size=(300, 200))
+        )
+        thumbnails.generate(post.id, post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(thumbnails.thumbnail_url(post), post.image.url)
+        self.assertEqual(thumbnails.sources(post), [])
+        self.assertFalse(
+            any(
+                map(
+                    default_storage.exists,
+                    thumbnails.variant_names(post.image.name),
+                )
+            )
+        )
+
+    def test_form_schedules_thumbnail(self):
+        """Сохранение через форму ставит миниатюру в очередь."""
+        with mock.patch.object(thumbnails, "schedule") as schedule:
+            self.client.post(
+                reverse("posts:post_create"),
+                {"text": "Новый пост", "image": make_image("new.png")},
+            )
+            self.client.post(
+                reverse("posts:post_edit", args=(self.post.id,)),
+                {"text": "Только текст"},
+            )
+        self.assertEqual(schedule.call_count, 1)
+        self.assertEqual(
+            schedule.call_args[0][0], Post.objects.get(text="Новый пост")
+        )
+
+    def test_worker_logs_errors(self):
+        """Ошибка в фоновом потоке попадает в лог, а не теряется."""
+        with mock.patch.object(
+            thumbnails, "close_old_connections"
+        ), self.assertLogs("yatube.thumbnails", "ERROR") as logs:
+            thumbnails._generate_in_worker(self.post.id, "posts/missing.png")
+        self.assertIn(f"поста {self.post.id}", logs.output[0])
+        self.assertIn("posts/missing.png", logs.output[0])
+
+    def test_make_thumbnails(self):
+        """Команда доделывает недостающие миниатюры."""
+        out = StringIO()
+        call_command("make_thumbnails", stdout=out)
+        self.assertIn("Миниатюр создано: 1, с ошибками: 0", out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail_of, self.post.image.name)
+        call_command("make_thumbnails", stdout=out)
+        self.assertIn("Миниатюр создано: 0", out.getvalue())
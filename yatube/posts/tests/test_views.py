@@ -1,8 +1,10 @@
+import re
+
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from posts.models import Comment, Follow, Group, Post
 
@@ -257,14 +259,13 @@ class PostPagesTests(TestCase):
         )
 
     def test_cache_in_index(self):
-        """Проверка кеширования index.html."""
+        """Проверка кеширования index.html: удаление сбрасывает кэш."""
         response = self.guest_client.get(reverse("posts:index"))
         r_1 = response.content
-        Post.objects.get(id=1).delete()
         response2 = self.guest_client.get(reverse("posts:index"))
         r_2 = response2.content
         self.assertEqual(r_1, r_2)
-        cache.clear()
+        Post.objects.get(id=1).delete()
         response3 = self.guest_client.get(reverse("posts:index"))
         r_3 = response3.content
         self.assertNotEqual(r_1, r_3)
@@ -290,3 +291,66 @@ class PostPagesTests(TestCase):
         Follow.objects.all().delete()
         r_3 = self.authorized_client.get(reverse("posts:follow_index"))
         self.assertEqual(len(r_3.context["page_obj"]), 0)
+
+
+@override_settings(POSTS_COMMENTS_PER_PAGE=2)
+class CommentPagesTests(TestCase):
+    """Тесты порций комментариев поста."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Фикстуры."""
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Name")
+        cls.post = Post.objects.create(author=cls.user, text="Тестовый пост")
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f"Комментарий {i}")
+            for i in range(5)
+        )
+
+    def setUp(self):
+        """Фикстуры."""
+        cache.clear()
+        self.client = Client()
+
+    def tearDown(self):
+        """Не оставляем закэшированных порций другим тестам."""
+        cache.clear()
+
+    def more_link(self, response):
+        """Адрес следующей порции из кнопки «Показать ещё»."""
+        match = re.search(
+            r'data-comments-more\s+href="([^"]+)"', response.content.decode()
+        )
+        return match and match.group(1)
+
+    def test_comments_in_chunks(self):
+        """Страница поста ограничена порцией, остальные идут по курсору."""
+        response = self.client.get(
+            reverse("posts:post_detail", args=(self.post.id,))
+        )
+        self.assertContains(response, "Комментарий 1")
+        self.assertNotContains(response, "Комментарий 2")
+        chunks = []
+        url = self.more_link(response)
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            chunks.append(
+                re.findall(r"Комментарий \d", response.content.decode())
+            )
+            url = self.more_link(response)
+        self.assertEqual(
+            chunks,
+            [["Комментарий 2", "Комментарий 3"], ["Комментарий 4"]],
+        )
+
+    def test_comments_bad_cursor(self):
+        """Битый курсор и несуществующий пост дают 404."""
+        url = reverse("posts:post_comments", args=(self.post.id,))
+        self.assertEqual(
+            self.client.get(url, {"after": "broken"}).status_code, 404
+        )
+        missing = reverse("posts:post_comments", args=(self.post.id + 1,))
+        self.assertEqual(self.client.get(missing).status_code, 404)
+        self.assertContains(self.client.get(url), "Комментарий 0")
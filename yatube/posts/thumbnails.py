@@ -0,0 +1,242 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from . import caching
+from .models import Post
+
+SIZE = (960, 339)
+# Ширины вариантов: телефон, обычный и плотный экран. Варианты шире
+# исходника не делаются: увеличение только добавило бы байтов.
+WIDTHS = (480, 960, 1440)
+
+Image.init()
+# Формат Pillow -> (расширение, MIME, параметры кодировщика). Современные
+# форматы включаются, только если их умеет собранный Pillow.
+ENCODERS = {
+    "AVIF": ("avif", "image/avif", {"quality": 60}),
+    "WEBP": ("webp", "image/webp", {"quality": 80, "method": 4}),
+    "JPEG": ("jpg", "image/jpeg", {"quality": 85, "optimize": True}),
+}
+FORMATS = tuple(name for name in ENCODERS if name in Image.SAVE)
+FALLBACK = "JPEG"
+
+_executor = None
+
+logger = logging.getLogger("yatube.thumbnails")
+
+
+def variant_size(width):
+    return width, round(width * SIZE[1] / SIZE[0])
+
+
+def variant_name(name, width=SIZE[0], image_format=FALLBACK):
+    """Имя варианта выводится из имени картинки, без поиска в хранилище."""
+    stem = os.path.splitext(name)[0]
+    width, height = variant_size(width)
+    return f"thumbs/{stem}_{width}x{height}.{ENCODERS[image_format][0]}"
+
+
+def source_width(image):
+    """Ширина картинки после кадрирования под пропорции SIZE."""
+    return min(image.width, round(image.height * SIZE[0] / SIZE[1]))
+
+
+def variant_widths(image_width=None):
+    """Ширины вариантов картинки шириной image_width.
+
+    None — картинка обработана, когда варианты делались всех ширин.
+    """
+    if image_width is None:
+        return WIDTHS
+    return tuple(width for width in WIDTHS if width <= image_width)
+
+
+def variant_names(name, image_width=None):
+    """Имена вариантов картинки name (без image_width — всех возможных)."""
+    return [
+        variant_name(name, width, image_format)
+        for width in variant_widths(image_width)
+        for image_format in FORMATS
+    ]
+
+
+def thumbnail_name(name, image_width=None):
+    """Основная миниатюра: JPEG шириной SIZE или уже, если исходник уже.
+
+    None, если исходник уже всех вариантов.
+    """
+    widths = [w for w in variant_widths(image_width) if w <= SIZE[0]]
+    if not widths:
+        return None
+    return variant_name(name, max(widths))
+
+
+def thumbnail_url(post):
+    """URL миниатюры поста или, пока её нет, самой картинки."""
+    return image_thumbnail_url(
+        post.image.name, post.thumbnail_of, post.image_width
+    )
+
+
+def image_thumbnail_url(name, thumbnail_of, image_width=None):
+    """То же по имени картинки, без модели (для строк values())."""
+    if not name:
+        return ""
+    if thumbnail_of == name:
+        thumbnail = thumbnail_name(name, image_width)
+        if thumbnail is not None:
+            return default_storage.url(thumbnail)
+    return default_storage.url(name)
+
+
+def sources(post):
+    """Наборы srcset по форматам, от самого компактного к JPEG.
+
+    Пустой список, пока варианты не готовы.
+    """
+    if not post.image or post.thumbnail_of != post.image.name:
+        return []
+    widths = variant_widths(post.image_width)
+    if not widths:
+        return []
+    return [
+        {
+            "type": ENCODERS[image_format][1],
+            "srcset": ", ".join(
+                "%s %dw"
+                % (
+                    default_storage.url(
+                        variant_name(post.image.name, width, image_format)
+                    ),
+                    width,
+                )
+                for width in widths
+            ),
+        }
+        for image_format in FORMATS
+    ]
+
+
+def render_variants(source):
+    """Все варианты картинки за одно декодирование.
+
+    Кадрирование делается один раз до наибольшей ширины, меньшие
+    варианты уменьшаются из него; ширины больше исходника
+    пропускаются. Возвращает (ширину после кадрирования,
+    {(ширина, формат): байты}).
+    """
+    image = Image.open(source)
+    # JPEG декодируется сразу в уменьшенном масштабе (DCT), но не меньше
+    # наибольшего варианта при любом повороте из EXIF.
+    image.draft("RGB", (max(WIDTHS), max(WIDTHS)))
+    image = ImageOps.exif_transpose(image)
+    image_width = source_width(image)
+    widths = variant_widths(image_width)
+    if not widths:
+        return image_width, {}
+    image = ImageOps.fit(
+        image, variant_size(max(widths)), Image.LANCZOS
+    ).convert("RGB")
+    variants = {}
+    for width in sorted(widths, reverse=True):
+        if image.width != width:
+            image = image.resize(variant_size(width), Image.LANCZOS)
+        for image_format in FORMATS:
+            buffer = BytesIO()
+            image.save(buffer, image_format, **ENCODERS[image_format][2])
+            variants[width, image_format] = buffer.getvalue()
+    return image_width, variants
+
+
+def ready_width(name):
+    """Ширина уже готовых вариантов картинки name или None.
+
+    Имя картинки задаётся её содержимым, так что повторная загрузка
+    того же файла получает те же варианты.
+    """
+    image_width = (
+        Post.objects.filter(image=name, thumbnail_of=name)
+        .exclude(image_width=None)
+        .order_by()
+        .values_list("image_width", flat=True)
+        .first()
+    )
+    if image_width is None or not all(
+        map(default_storage.exists, variant_names(name, image_width))
+    ):
+        return None
+    return image_width
+
+
+def generate(post_id, name, reuse=False):
+    """Делает варианты картинки name и отмечает их у поста.
+
+    С reuse готовые варианты (ready_width) не пересоздаются.
+    """
+    image_width = ready_width(name) if reuse else None
+    if image_width is None:
+        image_width = render(name)
+    updated = Post.objects.filter(pk=post_id, image=name).update(
+        thumbnail_of=name, image_width=image_width
+    )
+    if updated:
+        # update() не вызывает сигналов, а карточка теперь другая.
+        caching.bump([caching.post_tag(post_id)])
+
+
+def render(name):
+    """Записывает варианты картинки name; возвращает её ширину."""
+    with default_storage.open(name) as source:
+        image_width, variants = render_variants(source)
+    for (width, image_format), content in variants.items():
+        target = variant_name(name, width, image_format)
+        # Storage дописал бы к занятому имени суффикс, а имя должно
+        # оставаться предсказуемым.
+        default_storage.delete(target)
+        default_storage.save(target, ContentFile(content))
+    return image_width
+
+
+def _generate_in_worker(post_id, name):
+    # Исключение из future пула никто не читает: без лога оно пропадёт.
+    try:
+        generate(post_id, name, reuse=True)
+    except Exception:
+        logger.exception(
+            "Не удалось сделать миниатюры поста %s (%s)", post_id, name
+        )
+    finally:
+        close_old_connections()
+
+
+def executor():
+    """Общий пул потоков для миниатюр, создаётся при первом посте."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+            thread_name_prefix="thumbnails",
+        )
+    return _executor
+
+
+def schedule(post):
+    """Ставит миниатюры в очередь после фиксации транзакции.
+
+    Запрос не ждёт Pillow: до готовности шаблоны показывают
+    исходную картинку.
+    """
+    if not post.image:
+        return
+    post_id, name = post.pk, post.image.name
+    transaction.on_commit(
+        lambda: executor().submit(_generate_in_worker, post_id, name)
+    )
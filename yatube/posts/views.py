@@ -1,22 +1,65 @@
-from django.contrib.auth import get_user_model
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from core.degraded import keeps_stale_copy
+from core.replicas import replica_reads
 
-User = get_user_model()
+from . import conditional, fanout, feeds, identity, thumbnails
+from .caching import cache_page_ids, render_comments
+from .counts import get_count
+from .fanout import follow_feed
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Follow, Post, UserStats
+from .paginators import CountedPaginator, CursorPaginator, InvalidCursor
+from .search import SearchPaginator
 
 POST_LIMIT = 10
 
 
-def paginate_posts(request, posts):
-    """Паджинатор."""
-    paginator = Paginator(posts, POST_LIMIT)
+def load_page(paginator, number, feed, posts, tags=()):
+    """Страница паджинатора; для ленты feed — по списку id из кэша."""
+    page_obj = paginator.get_page(number)
+    if feed is not None:
+        cache_page_ids(page_obj, feed, posts, tags)
+    return page_obj
+
+
+def paginate_posts(request, posts, feed=None, count=None, tags=()):
+    """Паджинатор.
+
+    Число постов можно передать готовым (count) или взять из кэша
+    счётчиков известной ленты feed. Для ленты feed список id постов
+    страницы кэшируется до смены версий её и тегов tags, карточки
+    рендерит тег post_cards.
+    """
+    if settings.POSTS_CURSOR_PAGINATION:
+        paginator = CursorPaginator(posts, POST_LIMIT)
+        page_obj = paginator.get_page(
+            after=request.GET.get("after"), before=request.GET.get("before")
+        )
+        return {
+            "paginator": paginator,
+            "page_number": None,
+            "page_obj": page_obj,
+        }
+    if count is None and feed is not None:
+        count = get_count(feed, posts)
+    if count is None:
+        paginator = Paginator(posts, POST_LIMIT)
+    else:
+        paginator = CountedPaginator(posts, POST_LIMIT, count)
     page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    page_obj = load_page(paginator, page_number, feed, posts, tags)
+    while count is not None and not page_obj and page_obj.number > 1:
+        # Счётчик завышен (оценка общей ленты): хвост ленты пуст.
+        paginator.trim((page_obj.number - 1) * POST_LIMIT)
+        page_obj = load_page(
+            paginator, paginator.num_pages, feed, posts, tags
+        )
     return {
         "paginator": paginator,
         "page_number": page_number,
@@ -24,59 +67,76 @@ def paginate_posts(request, posts):
     }
 
 
-@cache_page(20)
+@keeps_stale_copy
+@replica_reads
+@condition(etag_func=conditional.index_etag)
 def index(request):
     """Генерирует index.html."""
     template = "posts/index.html"
-    posts = Post.objects.select_related("author").order_by("-pub_date")
-    context = paginate_posts(request, posts)
+    posts = Post.objects.select_related("author", "group")
+    context = paginate_posts(request, posts, feeds.ALL)
     return render(request, template, context)
 
 
+@keeps_stale_copy
+@replica_reads
+@condition(etag_func=conditional.group_etag)
 def group_posts(request, slug):
     """Генерирует group_list.html."""
     template = "posts/group_list.html"
-    group = get_object_or_404(Group, slug=slug)
+    group = identity.groups.get_or_404(slug)
     context = {
         "group": group,
     }
     context.update(
-        paginate_posts(request, group.posts.select_related("author"))
+        paginate_posts(
+            request,
+            group.posts.select_related("author", "group"),
+            feeds.group_feed(group.id),
+        )
     )
     return render(request, template, context)
 
 
+@keeps_stale_copy
+@replica_reads
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
     """Генерирует profile.html."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    posts_count = post_list.count()
+    author = identity.users.get_or_404(username)
+    stats = UserStats.objects.for_user(author.id)
     following = (
         request.user.is_authenticated
         and author.following.filter(user=request.user).exists()
     )
     context = {
         "author": author,
-        "posts": post_list,
-        "posts_count": posts_count,
+        "posts_count": stats.posts_count,
+        "stats": stats,
         "following": following,
     }
     context.update(
         paginate_posts(
             request,
-            author.posts.all().order_by("-pub_date").select_related("group"),
+            author.posts.select_related("group"),
+            feeds.author_feed(author.id),
+            count=stats.posts_count,
         )
     )
     return render(request, "posts/profile.html", context)
 
 
+@keeps_stale_copy
+@replica_reads
+@condition(etag_func=conditional.post_detail_etag)
 def post_detail(request, post_id):
     """Генерирует post_detail.html."""
-    posts = get_object_or_404(Post, id=post_id)
-    author = posts.author
+    posts = get_object_or_404(
+        Post.objects.select_related("author", "group"), id=post_id
+    )
     comments = posts.comments.select_related("author")
     form = CommentForm()
-    posts_count = Post.objects.filter(author=author).count()
+    posts_count = UserStats.objects.for_user(posts.author_id).posts_count
     context = {
         "posts": posts,
         "posts_count": posts_count,
@@ -86,6 +146,44 @@ def post_detail(request, post_id):
     return render(request, "posts/post_detail.html", context)
 
 
+@replica_reads
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста фрагментом HTML."""
+    post = get_object_or_404(Post.objects.only("id"), id=post_id)
+    comments = post.comments.select_related("author")
+    after = request.GET.get("after")
+    if after:
+        paginator = CursorPaginator(
+            comments, settings.POSTS_COMMENTS_PER_PAGE
+        )
+        try:
+            paginator.decode_cursor(after)
+        except InvalidCursor:
+            raise Http404("Неверный курсор комментариев.")
+    return HttpResponse(render_comments(post, comments, after))
+
+
+@replica_reads
+def search(request):
+    """Полнотекстовый поиск постов с фильтрами по группе и автору."""
+    form = SearchForm(request.GET or None)
+    context = {"form": form}
+    if form.is_valid():
+        paginator = SearchPaginator(
+            form.cleaned_data["q"],
+            POST_LIMIT,
+            group=form.cleaned_data["group"],
+            author=form.cleaned_data["author"],
+        )
+        page_obj = paginator.get_page(after=request.GET.get("after"))
+        context["page_obj"] = page_obj
+        if page_obj.has_next():
+            query = request.GET.copy()
+            query["after"] = page_obj.next_cursor
+            context["next_query"] = query.urlencode()
+    return render(request, "posts/search.html", context)
+
+
 @login_required
 def post_create(request):
     """Генерирует post_create.html."""
@@ -95,6 +193,7 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            thumbnails.schedule(post)
             return redirect("posts:profile", request.user)
         return render(request, "posts/create_post.html", {"form": form})
     form = PostForm()
@@ -113,6 +212,8 @@ def post_edit(request, post_id):
         return redirect("posts:post_detail", post.id)
     if form.is_valid():
         post = form.save()
+        if "image" in form.changed_data:
+            thumbnails.schedule(post)
         return redirect("posts:post_detail", post.id)
     return render(
         request,
@@ -136,21 +237,25 @@ def add_comment(request, post_id):
         return redirect("posts:post_detail", post_id=post_id)
 
 
+@replica_reads
 @login_required
+@condition(etag_func=conditional.follow_index_etag)
 def follow_index(request):
     """Генерирует страницу подписок."""
-    follower = Follow.objects.filter(user=request.user).values_list(
-        "author_id", flat=True
+    posts = follow_feed(request.user).select_related("author", "group")
+    context = paginate_posts(
+        request,
+        posts,
+        feeds.follow_feed(request.user.id),
+        tags=fanout.following_tags(request.user.id),
     )
-    posts = Post.objects.filter(author_id__in=follower)
-    context = paginate_posts(request, posts)
     return render(request, "posts/follow.html", context)
 
 
 @login_required
 def profile_follow(request, username):
     """Возможность подписаться."""
-    author = get_object_or_404(User, username=username)
+    author = identity.users.get_or_404(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("posts:follow_index")
@@ -159,6 +264,6 @@ def profile_follow(request, username):
 @login_required
 def profile_unfollow(request, username):
     """Возможность отписаться."""
-    author = get_object_or_404(User, username=username)
+    author = identity.users.get_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect("posts:follow_index")
@@ -1,5 +1,7 @@
 import os
 
+from core.cache.config import cache_config
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -30,6 +32,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.static.StaticFilesMiddleware",
+    "core.middleware.degraded.DegradedModeMiddleware",
+    "core.middleware.replicas.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -64,8 +69,21 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
-    }
+    },
+    # Замена реплики для разработки: копия основной базы, которую
+    # обновляет manage.py sync_replica.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.replica.sqlite3"),
+        "TEST": {"MIRROR": "default"},
+    },
 }
+# Ленты и страницы постов (представления с core.replicas.replica_reads)
+# читают реплику, если она отстала не больше чем на MAX_LAG секунд и
+# снята после последней записи пользователя; иначе — основную базу.
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+DATABASE_REPLICAS = ["replica"]
+DATABASE_REPLICA_MAX_LAG = 5
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -97,8 +115,20 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
+# collectstatic собирает статику в STATIC_ROOT с хэшем в именах и
+# сжатыми копиями .gz (и .br, если установлен пакет brotli); отдаёт её
+# core.middleware.static.StaticFilesMiddleware.
+STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+STATICFILES_STORAGE = "core.storage.CompressedManifestStorage"
 
 
+# Сессии пишутся в базу и в кэш, читаются из кэша; пользователь сессии
+# тоже берётся из кэша (core.auth.CachedModelBackend). Так страницы для
+# вошедших пользователей не ходят в базу за их личностью.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTHENTICATION_BACKENDS = ["core.auth.CachedModelBackend"]
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
@@ -109,8 +139,100 @@ CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+# Кэш задаётся адресом: locmem:// (по умолчанию), file:///каталог,
+# sqlite:///файл или redis://хост:порт/база. CACHE_LOCAL_ENTRIES > 0
+# ставит перед общим кэшем LRU процесса; изменяемые ключи (версии,
+# счётчики, сессии, пользователи) всегда читаются из общего кэша.
+CACHES = cache_config(
+    os.getenv("CACHE_URL", "locmem://"),
+    local_entries=int(os.getenv("CACHE_LOCAL_ENTRIES", 0)),
+    shared_only=(
+        "posts:version:",
+        "posts:count:",
+        "posts:cache:",
+        "posts:identity:",
+        "core:user:",
+        "django.contrib.sessions.cached_db",
+    ),
+)
+
+# Курсорная пагинация лент (?after=<cursor>) вместо номеров страниц:
+# без COUNT(*) и OFFSET, глубокие страницы стоят столько же, сколько первая.
+POSTS_CURSOR_PAGINATION = False
+
+# Счётчики постов в лентах (общая, группы, автора, подписок) в кэше.
+# Точные значения обновляются сигналами, оценки — перечитываются чаще.
+POSTS_COUNT_TIMEOUT = 60 * 60
+POSTS_COUNT_ESTIMATE_TIMEOUT = 5 * 60
+
+# Лента подписок раскладывается по подписчикам при публикации поста.
+# Авторы, у которых подписчиков не меньше порога, читаются при запросе.
+POSTS_FANOUT_THRESHOLD = 1000
+# Обратно автор раскладывается, только опустившись ниже этой границы:
+# подписка и отписка на самом пороге не перекладывают ленты заново.
+POSTS_FANOUT_LEAVE_THRESHOLD = 900
+
+# Кэш фрагментов лент: списки id постов страниц, карточки постов и
+# комментарии. Ключи версионируются тегами, которые сдвигают сигналы
+# Post, Comment, Group, Follow и User, поэтому таймаут только ограничивает
+# расхождение от записей в обход ORM.
+POSTS_CACHE_TIMEOUT = 60 * 60
+
+# Группы по slug и пользователи по username (и те и другие по id) для
+# страниц и карточек берутся из кэша объектов posts.identity; адреса,
+# которых нет, помнятся POSTS_IDENTITY_MISSING_TIMEOUT секунд.
+POSTS_IDENTITY_TIMEOUT = 60 * 60
+POSTS_IDENTITY_MISSING_TIMEOUT = 60
+
+# Промах списка страницы ленты или фрагмента пересчитывает один запрос,
+# он держит блокировку в кэше не дольше POSTS_FILL_LOCK_TIMEOUT секунд.
+# Остальные получают прошлое значение, а если его нет — ждут до
+# POSTS_FILL_WAIT секунд. POSTS_EARLY_REFRESH_BETA > 1 пересчитывает
+# записи раньше их срока, 0 — отключает ранний пересчёт.
+POSTS_FILL_LOCK_TIMEOUT = 10
+POSTS_FILL_WAIT = 1.0
+POSTS_EARLY_REFRESH_BETA = 1.0
+
+# Комментарии на странице поста выводятся порциями, следующие порции
+# подгружаются с posts/<id>/comments/?after=<cursor>.
+POSTS_COMMENTS_PER_PAGE = 20
+
+# Миниатюры картинок постов готовит фоновый пул потоков после сохранения
+# поста, страницы не ждут Pillow.
+POSTS_THUMBNAIL_WORKERS = 2
+
+# Списки админки не считают COUNT(*) по всей таблице: без фильтров число
+# строк оценивается, с фильтрами — считается не дальше предела.
+POSTS_ADMIN_COUNT_LIMIT = 10000
+
+# Аварийный режим (core.degraded): если за DEGRADED_WINDOW секунд не меньше
+# DEGRADED_FAILURE_RATE запросов к базе упали или шли дольше
+# DEGRADED_SLOW_QUERY секунд, ленты и посты отдаются из копий последних
+# удачных анонимных ответов, а запись отвечает 503. Через
+# DEGRADED_COOLDOWN секунд один запрос проверяет, ожила ли база.
+DEGRADED_WINDOW = 10
+DEGRADED_MIN_QUERIES = 5
+DEGRADED_SLOW_QUERY = 0.5
+DEGRADED_FAILURE_RATE = 0.5
+DEGRADED_COOLDOWN = 15
+DEGRADED_COPY_TIMEOUT = 60 * 60 * 24
+DEGRADED_COPY_REFRESH = 60
+
+# Учёт запросов к базе на каждый ответ (заголовки X-DB-*, лог
+# yatube.queries) и бюджеты запросов маршрутов, проверяемые тестами.
+QUERY_BUDGET_FILES = [os.path.join(BASE_DIR, "posts", "query_budgets.json")]
+QUERY_N_PLUS_ONE_THRESHOLD = 3
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "yatube.queries": {
+            "handlers": ["console"],
+            "level": os.getenv("QUERY_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
+if DEBUG:
+    MIDDLEWARE.insert(0, "core.middleware.queries.QueryBudgetMiddleware")